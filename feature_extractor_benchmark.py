@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Feature Extractor Benchmark
+Compares descriptor extraction time and descriptors per ROI of ORB keypoint
+detection and the dense grid extractors on the same preprocessed images
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pipelines.features import DenseDescriptorExtractor, FeaturePipeline, ORBFeatureExtractor, compare_extractors
+from pipelines.sources import create_source
+
+
+def read_rois(source, count, pipeline):
+    """Read up to `count` frames and preprocess them (grayscale, target size) like the classifier does."""
+    rois = []
+    for _ in range(count):
+        ok, frame = source.read()
+        if not ok:
+            break
+        rois.append(pipeline.preprocess_image(frame))
+    return rois
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark descriptor extractors (time and descriptors per ROI)')
+    parser.add_argument('--source', default='synthetic',
+                        help='Frame source: synthetic[:SEED], images:DIR, video:PATH or camera[:N] (default: synthetic)')
+    parser.add_argument('--images', type=int, default=200, help='ROIs to extract from (default: 200)')
+    parser.add_argument('--size', type=int, default=128, help='ROI side in pixels (default: 128)')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed passes; the fastest is reported (default: 3)')
+    parser.add_argument('--json', default=None, help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    pipeline = FeaturePipeline(target_size=(args.size, args.size), use_scaler=False)
+    try:
+        with create_source(args.source, 480, 360) as source:
+            rois = read_rois(source, args.images, pipeline)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    if not rois:
+        print("❌ No images to benchmark")
+        return
+
+    image_size = (args.size, args.size)
+    extractors = {
+        'orb': ORBFeatureExtractor(),
+        'dense orb': DenseDescriptorExtractor(image_size=image_size)
+    }
+    if hasattr(cv2, 'xfeatures2d'):
+        extractors['dense brief'] = DenseDescriptorExtractor(image_size=image_size, descriptor='brief')
+    else:
+        print("⚠️ opencv-contrib not installed, skipping dense BRIEF")
+
+    results = compare_extractors(rois, extractors, repeats=args.repeats)
+
+    print("=" * 70)
+    print("  FEATURE EXTRACTOR BENCHMARK")
+    print("=" * 70)
+    print(f"📐 {len(rois)} ROIs from {args.source}, {args.size}x{args.size}, best of {args.repeats}")
+    print(f"\n   {'Extractor':<14} {'us/ROI':>9} {'Desc/ROI':>9} {'Empty':>6}")
+    for name, result in results.items():
+        print(f"   {name:<14} {result['us_per_image']:>9.1f} {result['mean_descriptors']:>9.1f} "
+              f"{result['empty_images']:>6}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'size': args.size, 'images': len(rois), 'results': results}, f, indent=2)
+        print(f"\n💾 Saved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Feature Store Determinism Check
+Builds the BoVW codebook twice from the same images and verifies both runs
+produce the same feature store key, so repeated experiments hit the store
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pipelines.feature_store import FeatureStore, codebook_settings
+from pipelines.features import FeaturePipeline
+from pipelines.sources import create_source
+
+
+def write_frames(source_spec, count, out_dir, width=320, height=240):
+    """Write `count` frames of a frame source as JPEGs, returning (path, label) split data."""
+    split_data = []
+    with create_source(source_spec, width, height) as source:
+        for i in range(count):
+            ok, frame = source.read()
+            if not ok:
+                break
+            path = Path(out_dir) / f"frame_{i:04d}.jpg"
+            cv2.imwrite(str(path), frame)
+            split_data.append((path, i % 2))
+    return split_data
+
+
+def run_key(split_data, store, args, reuse=False):
+    """Store key of the split after building (or, with `reuse`, loading) a fresh pipeline's codebook."""
+    pipeline = FeaturePipeline(extractor=args.extractor, bovw_n_clusters=args.clusters)
+    settings_key = codebook_settings(pipeline, split_data)
+    if not (reuse and store.load_codebook(pipeline, settings_key)):
+        images = [cv2.imread(str(path)) for path, _ in split_data]
+        pipeline.build_codebook(images, max_descriptors=args.max_descriptors, verbose=False)
+        store.save_codebook(pipeline, settings_key)
+    return store.key(pipeline, split_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that identical codebook builds give the same feature store key')
+    parser.add_argument('--source', default='synthetic',
+                        help='Frame source: synthetic[:SEED], images:DIR or video:PATH (default: synthetic)')
+    parser.add_argument('--images', type=int, default=40, help='Images in the split (default: 40)')
+    parser.add_argument('--extractor', default='orb', choices=['orb', 'dense'], help='Descriptor extractor')
+    parser.add_argument('--clusters', type=int, default=64, help='Visual words (default: 64)')
+    parser.add_argument('--max-descriptors', type=int, default=200,
+                        help='Codebook descriptor budget; below the total to exercise subsampling (default: 200)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("  FEATURE STORE DETERMINISM CHECK")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            split_data = write_frames(args.source, args.images, tmp_dir)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if not split_data:
+            print("❌ No frames to build a codebook from")
+            sys.exit(1)
+
+        store = FeatureStore(Path(tmp_dir) / 'store')
+        print(f"📐 {len(split_data)} images, {args.extractor} extractor, {args.clusters} words, "
+              f"{args.max_descriptors} descriptors")
+
+        keys = {
+            'build 1': run_key(split_data, store, args),
+            'build 2': run_key(split_data, store, args),
+            'reused': run_key(split_data, store, args, reuse=True)
+        }
+
+    for name, key in keys.items():
+        print(f"   {name:<8} {key}")
+
+    if len(set(keys.values())) != 1:
+        print("❌ Store keys differ: identical runs would miss the feature store")
+        sys.exit(1)
+    print("✅ Identical runs produce the same store key")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,12 +11,42 @@ var webcam_connected: bool = false
 var server_host: String = "127.0.0.1"
 var server_port: int = 8888  # UDP port (same as udp_webcam_server.py)
 
+# Stream profile opsional, dikirim saat REGISTER (mis. {"w": 320, "q": 30})
+# Kosong = profile default server
+var stream_profile: Dictionary = {}
+
 # Buffer untuk menyimpan data yang diterima
 var receive_buffer: PackedByteArray = PackedByteArray()
 var packet_sequence: int = 0
 var total_packets: int = 0
 var received_packets: Dictionary = {}
+var parity_packets: Dictionary = {}  # FEC group index -> XOR parity payload
 var current_frame_id: int = -1
+var last_frame_id: int = -1  # Frame terakhir yang dimulai (untuk menolak paket terlambat)
+
+# Layout frame saat ini dari header v2 (FEC)
+var frame_length: int = 0
+var fec_group: int = 0
+var fec_payload_size: int = 0
+var frame_crc: int = -1  # CRC32 frame dari header v2 (-1 = header v1, tanpa CRC)
+var frame_capture_us: int = 0  # Timestamp capture di server (mikrodetik sejak epoch)
+var frame_codec: int = CODEC_JPEG  # Codec frame dari header v2 (pipelines/encoders.py)
+var frame_encoded_us: int = 0  # Timestamp selesai encode di server (0 = tidak ada)
+var frame_first_packet_us: int = 0  # Waktu lokal paket pertama frame (Time.get_ticks_usec)
+var displayed_frame_length: int = -1  # Panjang & CRC32 frame yang sedang ditampilkan (untuk paket repeat)
+var displayed_frame_crc: int = -1
+var keyframe_requests: int = 0
+var packets_recovered: int = 0
+var frames_corrupt: int = 0
+var crc_table: PackedInt64Array = PackedInt64Array()
+
+# Verifikasi CRC32 frame di client (opsional): loop per byte di GDScript memakan beberapa ms
+# per frame di main thread, sedangkan checksum UDP sudah menangkap sebagian besar kerusakan
+@export var verify_crc: bool = false
+
+# Rekonstruksi paket hilang dari parity FEC (opsional): XOR di GDScript berjalan di main thread;
+# jika nonaktif, paket parity diabaikan dan paket yang hilang diminta ulang lewat NACK
+@export var use_fec_recovery: bool = false
 
 # Statistics
 var frames_received: int = 0
@@ -28,11 +58,51 @@ var total_packets_received: int = 0
 # UDP Configuration
 const MAX_PACKET_SIZE = 60000  # Maximum UDP packet payload
 const FRAME_TIMEOUT = 2.0  # Detik untuk timeout frame incomplete
+
+# Header v2 (pipelines/protocol.py)
+const PROTOCOL_MAGIC = 0xAC
+const HEADER_V2_SIZE = 32
+const HEADER_V2_TIMING_SIZE = 48  # Header dengan timestamp processed/encoded
+const FLAG_PARITY = 0x01
+const FLAG_REPEAT = 0x02  # Paket header saja: scene tidak berubah, tampilkan ulang frame terakhir
+const CODEC_JPEG = 0
+const CODEC_WEBP = 1
+const CODEC_YUV420 = 2  # Raw, hanya untuk client Python di loopback (tidak didukung di sini)
 var frame_timeout_timer: float = 0.0
 
+# Selective retransmission: minta ulang paket yang hilang sekali per frame
+const NACK_DELAY = 0.02  # Detik tanpa paket baru sebelum mengirim NACK
+var nack_timer: float = 0.0
+var nack_sent: bool = false
+var nacks_sent: int = 0
+
+# Heartbeat: server mengeluarkan client yang tidak mengirim PING (default 10 detik)
+const HEARTBEAT_INTERVAL = 2.0
+var heartbeat_timer: float = 0.0
+
+# Laporan latency: setiap frame ke-N kirim LAT:{json} agar server bisa mengukur latency end-to-end
+const LATENCY_REPORT_EVERY = 15
+
+# Mode multicast: server memberi tahu grup lewat balasan REGISTERED:MULTICAST:<grup>:<port>
+var multicast_socket: PacketPeerUDP = null
+
+# Transport shared memory (Godot dan server di mesin yang sama, server dengan --shm):
+# frame RGBA mentah dibaca dari file ring buffer setelah doorbell SHM:<seq>, tanpa encode/decode JPEG
+# Layout file: lihat pipelines/shm_transport.py
+var use_shared_memory: bool = false
+var shm_file: FileAccess = null
+var shm_slots: int = 0
+var shm_slot_size: int = 0
+const SHM_MAGIC = "ACSHMRNG"
+const SHM_RING_HEADER_SIZE = 64
+const SHM_SLOT_HEADER_SIZE = 64
+const SHM_FORMAT_RGBA = 1
+
 func _ready():
 	"""Inisialisasi saat node ready"""
 	print("=== UDPAccessoryWebcamManager initialized ===")
+	if verify_crc:
+		_build_crc_table()
 	set_process(false)  # Disabled sampai connect dipanggil
 
 func connect_to_webcam_server():
@@ -50,9 +120,8 @@ func connect_to_webcam_server():
 		# Set target server
 		udp_socket.set_dest_address(server_host, server_port)
 		
-		# Kirim REGISTER message ke server
-		var register_msg = "REGISTER".to_utf8_buffer()
-		udp_socket.put_packet(register_msg)
+		_send_register()
+		heartbeat_timer = 0.0
 		
 		print("✅ UDP socket bound, sent REGISTER to %s:%d" % [server_host, server_port])
 		print("🔧 Enabling _process() for packet polling...")
@@ -63,45 +132,201 @@ func connect_to_webcam_server():
 		print("❌ Failed to bind UDP socket: %d" % result)
 		error_message.emit("Failed to bind UDP socket")
 
+func _send_register():
+	"""Kirim REGISTER message ke server (dengan stream profile jika ada)"""
+	var profile = stream_profile.duplicate()
+	if use_shared_memory:
+		profile["transport"] = "shm"
+	var register_text = "REGISTER"
+	if not profile.is_empty():
+		register_text += ":" + JSON.stringify(profile)
+	udp_socket.put_packet(register_text.to_utf8_buffer())
+
 func _process(delta):
 	"""Process dipanggil setiap frame untuk menerima data"""
 	if not udp_socket or not webcam_connected:
 		return
 	
+	# Heartbeat supaya server tahu client masih hidup
+	heartbeat_timer += delta
+	if heartbeat_timer >= HEARTBEAT_INTERVAL:
+		heartbeat_timer = 0.0
+		udp_socket.put_packet("PING".to_utf8_buffer())
+	
 	# Update frame timeout
 	if current_frame_id >= 0:
 		frame_timeout_timer += delta
 		if frame_timeout_timer > FRAME_TIMEOUT:
 			print("⏰ Frame %d timeout - discarding incomplete frame" % current_frame_id)
 			_reset_frame_buffer()
+		else:
+			nack_timer += delta
+			if nack_timer > NACK_DELAY and not nack_sent:
+				_send_nack()
 	
-	# Baca semua paket yang tersedia
-	while udp_socket.get_available_packet_count() > 0:
-		var packet = udp_socket.get_packet()
-		if packet.size() > 0:
+	# Baca semua paket yang tersedia (unicast, lalu multicast jika aktif)
+	_poll_socket(udp_socket)
+	if multicast_socket:
+		_poll_socket(multicast_socket)
+
+func _poll_socket(socket: PacketPeerUDP):
+	"""Baca semua paket yang tersedia dari satu socket"""
+	while socket.get_available_packet_count() > 0:
+		var packet = socket.get_packet()
+		if packet.size() == 0:
+			continue
+		# Pesan kontrol berupa teks ASCII (huruf besar); header v1 diawali 0x00, v2 diawali magic
+		if packet[0] >= 0x41 and packet[0] <= 0x5A:
+			_handle_control_message(packet.get_string_from_utf8())
+		else:
 			_process_packet(packet)
 
+func _handle_control_message(message: String):
+	"""Proses balasan teks dari server (REGISTERED, PONG, UNREGISTERED, ...)"""
+	if message.begins_with("SHM:"):
+		if shm_file:
+			_read_shm_frame(int(message.substr(4)))
+	elif message == "UNREGISTERED":
+		# Server sudah mengeluarkan client ini (timeout), daftar ulang
+		print("💤 Server forgot this client, re-registering")
+		_send_register()
+	elif message.begins_with("REGISTERED:MULTICAST:") and multicast_socket == null:
+		var parts = message.split(":")
+		if parts.size() >= 4:
+			_join_multicast(parts[2], int(parts[3]))
+	elif message.begins_with("REGISTERED:SHM:") and shm_file == null:
+		_open_shm_ring(message.substr("REGISTERED:SHM:".length()))
+
+func _open_shm_ring(path: String):
+	"""Buka file ring buffer shared memory yang diumumkan server"""
+	var file = FileAccess.open(path, FileAccess.READ)
+	if file == null:
+		print("❌ Tidak bisa membuka ring shared memory %s: %d" % [path, FileAccess.get_open_error()])
+		return
+	# Header ring: magic (8), version (u16), slots (u16), slot size (u32), ...
+	var header = file.get_buffer(16)
+	if header.size() < 16 or header.slice(0, 8).get_string_from_ascii() != SHM_MAGIC:
+		print("❌ Bukan file ring frame: %s" % path)
+		file.close()
+		return
+	shm_slots = header.decode_u16(10)
+	shm_slot_size = header.decode_u32(12)
+	shm_file = file
+	print("🧠 Shared memory ring: %s (%d slots)" % [path, shm_slots])
+
+func _read_shm_frame(sequence: int):
+	"""Salin frame dengan sequence ini dari ring buffer dan tampilkan"""
+	var start_us = Time.get_ticks_usec()
+	var offset = SHM_RING_HEADER_SIZE + (sequence % shm_slots) * shm_slot_size
+	shm_file.seek(offset)
+	# Header slot: sequence (u64), capture (u64), processed (u64), width, height (u16),
+	# channels, format (u8), length (u32)
+	var header = shm_file.get_buffer(SHM_SLOT_HEADER_SIZE)
+	if header.decode_u64(0) != sequence:
+		return  # Slot sudah ditimpa frame yang lebih baru
+	var width = header.decode_u16(24)
+	var height = header.decode_u16(26)
+	var pixel_format = header[29]
+	var length = header.decode_u32(30)
+	if pixel_format != SHM_FORMAT_RGBA:
+		print("❌ Shared memory format %d tidak didukung (jalankan server dengan --shm-format rgba)" % pixel_format)
+		return
+	
+	var pixels = shm_file.get_buffer(length)
+	# Server mengosongkan sequence slot sebelum menulis ulang: cek lagi agar frame tidak sobek
+	shm_file.seek(offset)
+	if shm_file.get_64() != sequence:
+		return
+	
+	var image = Image.create_from_data(width, height, false, Image.FORMAT_RGBA8, pixels)
+	var texture = ImageTexture.new()
+	texture.set_image(image)
+	frame_received.emit(texture)
+	frames_received += 1
+	_update_fps()
+	
+	var capture_us = header.decode_u64(8)
+	if capture_us > 0 and frames_received % LATENCY_REPORT_EVERY == 0:
+		_send_latency_report(sequence, capture_us, 0, 0, Time.get_ticks_usec() - start_us)
+
+func _join_multicast(group: String, port: int):
+	"""Bind ke port multicast dan join grup di semua interface"""
+	multicast_socket = PacketPeerUDP.new()
+	var result = multicast_socket.bind(port)
+	if result != OK:
+		print("❌ Failed to bind multicast port %d: %d" % [port, result])
+		multicast_socket = null
+		return
+	
+	var joined = 0
+	for iface in IP.get_local_interfaces():
+		if multicast_socket.join_multicast_group(group, iface["name"]) == OK:
+			joined += 1
+	print("📡 Joined multicast %s:%d on %d interface(s)" % [group, port, joined])
+
 func _process_packet(packet: PackedByteArray):
 	"""Proses paket UDP yang diterima"""
 	total_packets_received += 1
 	
-	# Struktur paket dari udp_webcam_server.py:
+	# Header v1 dari udp_webcam_overlay_server.py:
 	# [0-3]: Sequence number (4 bytes, uint32 big-endian)
 	# [4-7]: Total packets (4 bytes, uint32 big-endian)
 	# [8-11]: Packet index (4 bytes, uint32 big-endian)
 	# [12...]: JPEG data chunk
+	#
+	# Header v2 (byte pertama = PROTOCOL_MAGIC, lihat pipelines/protocol.py):
+	# [0]: magic, [1]: version, [2]: header length, [3]: flags
+	# [4-7]: sequence, [8-9]: data packets, [10-11]: index (atau group untuk parity)
+	# [12-15]: frame length, [16]: FEC group size, [17]: codec, [18-19]: payload size
+	# [20-27]: capture timestamp (uint64 mikrodetik), [28-31]: CRC32 seluruh frame
+	# [32-39]: processed timestamp, [40-47]: encoded timestamp (jika header length >= 48)
+	# Field tambahan di masa depan ditambahkan setelah byte 31; payload mulai di header length
 	
-	if packet.size() < 12:
+	var sequence_num: int
+	var total_pkts: int
+	var packet_idx: int
+	var flags: int = 0
+	var pkt_frame_length: int = 0
+	var pkt_fec_group: int = 0
+	var pkt_payload_size: int = 0
+	var pkt_crc: int = -1
+	var pkt_capture_us: int = 0
+	var pkt_codec: int = CODEC_JPEG
+	var pkt_encoded_us: int = 0
+	var payload: PackedByteArray
+	
+	if packet.size() >= HEADER_V2_SIZE and packet[0] == PROTOCOL_MAGIC:
+		var header_len = packet[2]
+		flags = packet[3]
+		sequence_num = _bytes_to_uint32(packet.slice(4, 8))
+		total_pkts = _bytes_to_uint16(packet.slice(8, 10))
+		packet_idx = _bytes_to_uint16(packet.slice(10, 12))
+		pkt_frame_length = _bytes_to_uint32(packet.slice(12, 16))
+		pkt_fec_group = packet[16]
+		pkt_codec = packet[17]
+		pkt_payload_size = _bytes_to_uint16(packet.slice(18, 20))
+		pkt_capture_us = (_bytes_to_uint32(packet.slice(20, 24)) << 32) | _bytes_to_uint32(packet.slice(24, 28))
+		pkt_crc = _bytes_to_uint32(packet.slice(28, 32))
+		if header_len >= HEADER_V2_TIMING_SIZE and packet.size() >= HEADER_V2_TIMING_SIZE:
+			pkt_encoded_us = (_bytes_to_uint32(packet.slice(40, 44)) << 32) | _bytes_to_uint32(packet.slice(44, 48))
+		payload = packet.slice(header_len)
+	elif packet.size() >= 12:
+		# Parse header (big-endian format sesuai struct.pack("!III"))
+		sequence_num = _bytes_to_uint32(packet.slice(0, 4))
+		total_pkts = _bytes_to_uint32(packet.slice(4, 8))
+		packet_idx = _bytes_to_uint32(packet.slice(8, 12))
+		payload = packet.slice(12)
+	else:
 		print("❌ Invalid packet size: %d bytes" % packet.size())
 		return
 	
-	# Parse header (big-endian format sesuai struct.pack("!III"))
-	var sequence_num = _bytes_to_uint32(packet.slice(0, 4))
-	var total_pkts = _bytes_to_uint32(packet.slice(4, 8))
-	var packet_idx = _bytes_to_uint32(packet.slice(8, 12))
+	# Abaikan paket terlambat (mis. retransmisi) dari frame yang sudah lewat
+	if sequence_num != current_frame_id and _is_stale_sequence(sequence_num):
+		return
 	
-	# Data payload
-	var payload = packet.slice(12)
+	if flags & FLAG_REPEAT:
+		_handle_repeat_packet(sequence_num, pkt_frame_length, pkt_crc)
+		return
 	
 	# Debug info (setiap 30 paket)
 	if total_packets_received % 30 == 0:
@@ -119,20 +344,111 @@ func _process_packet(packet: PackedByteArray):
 		# Reset untuk frame baru
 		_reset_frame_buffer()
 		current_frame_id = sequence_num
+		last_frame_id = sequence_num
 		total_packets = total_pkts
+		frame_length = pkt_frame_length
+		fec_group = pkt_fec_group
+		fec_payload_size = pkt_payload_size
+		frame_crc = pkt_crc
+		frame_capture_us = pkt_capture_us
+		frame_codec = pkt_codec
+		frame_encoded_us = pkt_encoded_us
+		frame_first_packet_us = Time.get_ticks_usec()
 		frame_timeout_timer = 0.0
 		
 		print("🆕 New frame: Seq=%d, Total packets=%d" % [sequence_num, total_pkts])
 	
+	nack_timer = 0.0
+	
 	# Simpan paket berdasarkan index
-	if packet_idx not in received_packets:
+	if flags & FLAG_PARITY:
+		if use_fec_recovery and packet_idx not in parity_packets:
+			parity_packets[packet_idx] = payload
+	elif packet_idx not in received_packets:
 		received_packets[packet_idx] = payload
 	
+	# Coba rekonstruksi paket yang hilang dari parity
+	if use_fec_recovery and received_packets.size() < total_packets and fec_group > 0:
+		_try_fec_recovery()
+	
 	# Cek apakah frame lengkap
 	if received_packets.size() == total_packets:
 		print("✅ Frame %d complete: %d packets received" % [sequence_num, total_packets])
 		_assemble_and_process_frame()
 
+func _handle_repeat_packet(sequence_num: int, pkt_frame_length: int, pkt_crc: int):
+	"""Frame tidak berubah: tekstur terakhir tetap ditampilkan, atau minta keyframe jika frame itu tidak pernah diterima"""
+	last_frame_id = sequence_num
+	if pkt_frame_length == displayed_frame_length and pkt_crc == displayed_frame_crc:
+		frames_received += 1
+		_update_fps()
+	else:
+		udp_socket.put_packet("KEYFRAME".to_utf8_buffer())
+		keyframe_requests += 1
+		print("🔑 Repeat frame %d untuk frame yang tidak diterima - minta keyframe" % sequence_num)
+
+func _is_stale_sequence(sequence_num: int) -> bool:
+	"""True jika sequence lebih lama dari frame terakhir (sequence v1 wrap di 65536)"""
+	if last_frame_id < 0:
+		return false
+	var diff = last_frame_id - sequence_num
+	return diff >= 0 and diff < 32768
+
+func _send_nack():
+	"""Kirim NACK:<seq>:<i,j,...> untuk paket data yang belum diterima"""
+	nack_sent = true
+	var missing: Array = []
+	for i in range(total_packets):
+		if i not in received_packets:
+			missing.append(str(i))
+	
+	if missing.is_empty():
+		return
+	
+	var command = "NACK:%d:%s" % [current_frame_id, ",".join(missing)]
+	udp_socket.put_packet(command.to_utf8_buffer())
+	nacks_sent += 1
+	print("🔁 NACK frame %d: %d packets" % [current_frame_id, missing.size()])
+
+func _try_fec_recovery():
+	"""Rebuild satu paket yang hilang per FEC group dengan XOR parity"""
+	for group_idx in parity_packets.keys():
+		var start = group_idx * fec_group
+		var end = min(start + fec_group, total_packets)
+		var missing_idx = -1
+		var missing_count = 0
+		
+		for i in range(start, end):
+			if i not in received_packets:
+				missing_idx = i
+				missing_count += 1
+		
+		if missing_count != 1:
+			continue
+		
+		var rebuilt: PackedByteArray = parity_packets[group_idx].duplicate()
+		for i in range(start, end):
+			if i == missing_idx:
+				continue
+			_xor_into(rebuilt, received_packets[i])
+		
+		# Paket terakhir lebih pendek dari payload size
+		if missing_idx == total_packets - 1:
+			rebuilt = rebuilt.slice(0, frame_length - missing_idx * fec_payload_size)
+		
+		received_packets[missing_idx] = rebuilt
+		packets_recovered += 1
+		print("🛡️ Frame %d: recovered packet %d from parity" % [current_frame_id, missing_idx])
+
+func _xor_into(target: PackedByteArray, chunk: PackedByteArray):
+	"""XOR chunk ke target, 8 byte sekaligus (sisa per byte)"""
+	var size = min(target.size(), chunk.size())
+	var words_end = size - size % 8
+	for b in range(0, words_end, 8):
+		target.encode_s64(b, target.decode_s64(b) ^ chunk.decode_s64(b))
+	for b in range(words_end, size):
+		target[b] = target[b] ^ chunk[b]
+
 func _assemble_and_process_frame():
 	"""Gabungkan semua paket menjadi satu frame dan proses"""
 	# Gabungkan paket sesuai urutan
@@ -148,10 +464,26 @@ func _assemble_and_process_frame():
 	
 	print("🖼️ Assembled frame: %d bytes from %d packets" % [frame_data.size(), total_packets])
 	
-	# Decode JPEG
+	# Verifikasi CRC32 (header v2, hanya jika verify_crc aktif)
+	if verify_crc and frame_crc >= 0 and _crc32(frame_data) != frame_crc:
+		print("❌ Frame %d failed CRC check - discarding" % current_frame_id)
+		frames_corrupt += 1
+		_reset_frame_buffer()
+		return
+	
+	var reassembly_us = Time.get_ticks_usec() - frame_first_packet_us
+	
+	# Decode sesuai codec di header
 	if frame_data.size() > 0:
+		var decode_start_us = Time.get_ticks_usec()
 		var image = Image.new()
-		var load_error = image.load_jpg_from_buffer(frame_data)
+		var load_error = ERR_UNAVAILABLE
+		if frame_codec == CODEC_JPEG:
+			load_error = image.load_jpg_from_buffer(frame_data)
+		elif frame_codec == CODEC_WEBP:
+			load_error = image.load_webp_from_buffer(frame_data)
+		
+		var decode_us = Time.get_ticks_usec() - decode_start_us
 		
 		if load_error == OK:
 			var texture = ImageTexture.new()
@@ -162,24 +494,69 @@ func _assemble_and_process_frame():
 			# Update statistics
 			frames_received += 1
 			_update_fps()
+			displayed_frame_length = frame_data.size()
+			displayed_frame_crc = frame_crc
+			
+			if frame_capture_us > 0 and frames_received % LATENCY_REPORT_EVERY == 0:
+				_send_latency_report(current_frame_id, frame_capture_us, frame_encoded_us, reassembly_us, decode_us)
 		else:
-			print("❌ JPEG decode error: %d" % load_error)
+			print("❌ Decode error (codec %d): %d" % [frame_codec, load_error])
 			error_message.emit("Failed to decode frame")
 	
 	# Reset untuk frame berikutnya
 	_reset_frame_buffer()
 
+func _send_latency_report(sequence: int, capture_us: int, encoded_us: int, reassembly_us: int, decode_us: int):
+	"""Kirim LAT:{json} dengan timestamp server dari header dan durasi di client"""
+	var report = {
+		"seq": sequence,
+		"cap": capture_us,
+		"enc": encoded_us,
+		"reasm_us": reassembly_us,
+		"decode_us": decode_us
+	}
+	udp_socket.put_packet(("LAT:" + JSON.stringify(report)).to_utf8_buffer())
+
 func _reset_frame_buffer():
 	"""Reset buffer untuk frame baru"""
 	received_packets.clear()
+	parity_packets.clear()
+	nack_timer = 0.0
+	nack_sent = false
 	current_frame_id = -1
 	total_packets = 0
+	frame_crc = -1
 	frame_timeout_timer = 0.0
 
 func _bytes_to_uint32(bytes: PackedByteArray) -> int:
 	"""Convert 4 bytes to uint32 (big endian / network byte order)"""
 	return (bytes[0] << 24) | (bytes[1] << 16) | (bytes[2] << 8) | bytes[3]
 
+func _build_crc_table():
+	"""Tabel CRC32 (polinomial IEEE, sama dengan zlib.crc32)"""
+	crc_table.resize(256)
+	for n in range(256):
+		var c = n
+		for k in range(8):
+			if c & 1:
+				c = 0xEDB88320 ^ (c >> 1)
+			else:
+				c = c >> 1
+		crc_table[n] = c
+
+func _crc32(data: PackedByteArray) -> int:
+	"""Hitung CRC32 dari buffer"""
+	if crc_table.is_empty():
+		_build_crc_table()  # verify_crc diaktifkan setelah _ready
+	var crc = 0xFFFFFFFF
+	for b in data:
+		crc = crc_table[(crc ^ b) & 0xFF] ^ (crc >> 8)
+	return crc ^ 0xFFFFFFFF
+
+func _bytes_to_uint16(bytes: PackedByteArray) -> int:
+	"""Convert 2 bytes to uint16 (big endian / network byte order)"""
+	return (bytes[0] << 8) | bytes[1]
+
 func _update_fps():
 	"""Update FPS counter"""
 	var current_time = Time.get_ticks_msec() / 1000.0
@@ -209,6 +586,14 @@ func disconnect_from_server():
 		udp_socket.close()
 		udp_socket = null
 	
+	if multicast_socket:
+		multicast_socket.close()
+		multicast_socket = null
+	
+	if shm_file:
+		shm_file.close()
+		shm_file = null
+	
 	webcam_connected = false
 	connection_changed.emit(false)
 	set_process(false)
@@ -230,6 +615,10 @@ func get_packet_loss() -> int:
 	"""Get total packets lost"""
 	return packets_lost
 
+func get_packets_recovered() -> int:
+	"""Get total packets rebuilt from FEC parity"""
+	return packets_recovered
+
 func send_command(command: String):
 	"""Send command to server (e.g., package switch)"""
 	if not udp_socket or not webcam_connected:
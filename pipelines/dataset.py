@@ -3,9 +3,13 @@ Dataset management for face detection training.
 Handles loading, splitting, auto-ROI extraction, and IoU-based labeling.
 """
 
+import itertools
 import json
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -14,6 +18,144 @@ from sklearn.model_selection import train_test_split
 from .utils import logger, collect_image_paths, compute_iou, ensure_dir
 
 
+# Reduced-resolution decode flags, largest reduction first (libjpeg scales during decode)
+REDUCED_GRAYSCALE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+)
+
+# JPEG start-of-frame markers (carry the image size)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def read_image_size(path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a PNG or JPEG header without decoding.
+    
+    Returns:
+        None for other formats or unreadable headers
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(24)
+            if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            
+            if head[:2] != b'\xff\xd8':
+                return None
+            
+            f.seek(2)
+            while True:
+                byte = f.read(1)
+                while byte == b'\xff':  # Skip fill bytes
+                    byte = f.read(1)
+                if not byte:
+                    return None
+                marker = byte[0]
+                if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # Markers without a segment
+                    continue
+                
+                length = struct.unpack('>H', f.read(2))[0]
+                if marker in JPEG_SOF_MARKERS:
+                    height, width = struct.unpack('>xHH', f.read(5))
+                    return width, height
+                f.seek(length - 2, 1)
+    except (OSError, struct.error):
+        return None
+
+
+class ImageStream:
+    """
+    Re-iterable stream of a split's images, decoded ahead by a thread pool.
+    
+    Images are decoded straight to grayscale at `target_size` (what
+    FeaturePipeline.preprocess_image produces). JPEG sources at least twice
+    the target size use libjpeg's reduced-resolution decode. At most `prefetch`
+    images are decoded ahead, so memory does not depend on the split size.
+    Images come out in split order; unreadable ones are skipped, and `labels`
+    holds the labels of the images yielded by the latest pass.
+    """
+    
+    def __init__(
+        self,
+        split_data: List[Tuple[Path, int]],
+        target_size: Tuple[int, int] = (128, 128),
+        workers: int = 4,
+        prefetch: Optional[int] = None,
+        reduced_decode: bool = True
+    ):
+        """
+        Initialize image stream.
+        
+        Args:
+            split_data: (path, label) pairs
+            target_size: Output size (width, height)
+            workers: Decode threads (cv2.imread releases the GIL)
+            prefetch: Images decoded ahead (default: 4 per worker)
+            reduced_decode: Allow reduced-resolution decoding of large sources
+        """
+        self.split_data = split_data
+        self.target_size = tuple(target_size)
+        self.workers = max(1, workers)
+        self.prefetch = max(1, prefetch or 4 * self.workers)
+        self.reduced_decode = reduced_decode
+        self.labels: List[int] = []
+        self.skipped = 0
+    
+    def __len__(self) -> int:
+        return len(self.split_data)
+    
+    def decode(self, path: Path) -> Optional[np.ndarray]:
+        """Decode one image to grayscale at the target size (None if unreadable)."""
+        flag = cv2.IMREAD_GRAYSCALE
+        # Only libjpeg really decodes at reduced size; other formats would just be downscaled differently
+        if self.reduced_decode and Path(path).suffix.lower() in ('.jpg', '.jpeg'):
+            size = read_image_size(path)
+            if size is not None:
+                # EXIF rotation may swap the sides, so compare the shorter one
+                for factor, reduced_flag in REDUCED_GRAYSCALE_FLAGS:
+                    if min(size) // factor >= max(self.target_size):
+                        flag = reduced_flag
+                        break
+        
+        img = cv2.imread(str(path), flag)
+        if img is None:
+            return None
+        if img.shape[:2] != self.target_size[::-1]:  # (h, w) vs (w, h)
+            img = cv2.resize(img, self.target_size)
+        return img
+    
+    def __iter__(self) -> Iterator[np.ndarray]:
+        self.labels = []
+        self.skipped = 0
+        items = iter(self.split_data)
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        pending = deque(
+            (pool.submit(self.decode, img_path), label)
+            for img_path, label in itertools.islice(items, self.prefetch)
+        )
+        
+        try:
+            while pending:
+                future, label = pending.popleft()
+                # Keep the window full while this image is consumed
+                for img_path, next_label in itertools.islice(items, 1):
+                    pending.append((pool.submit(self.decode, img_path), next_label))
+                
+                img = future.result()
+                if img is None:
+                    self.skipped += 1
+                    continue
+                self.labels.append(label)
+                yield img
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        
+        if self.skipped:
+            logger.warning(f"Skipped {self.skipped} unreadable images")
+
+
 class DatasetManager:
     """Manages dataset loading, splitting, and ROI extraction."""
     
@@ -0,0 +1,210 @@
+"""
+Persistent ORB descriptor cache for training and evaluation runs.
+Handles content-addressed storage of per-image descriptors in memory-mapped
+ragged arrays (descriptor rows + offsets index), so codebook sweeps and SVM
+retraining skip image decoding and ORB extraction for images already seen.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .features import FeaturePipeline
+from .utils import logger
+
+
+CACHE_VERSION = 1
+
+
+def extractor_fingerprint(feature_pipeline: FeaturePipeline) -> str:
+    """Hash of everything that changes the descriptors of an image (ORB parameters, target size)."""
+    settings = {
+        'version': CACHE_VERSION,
+        'orb': feature_pipeline.orb_extractor.params,
+        'target_size': list(feature_pipeline.target_size)
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def image_key(path: Path, content_hash: bool = False) -> str:
+    """
+    Cache key of an image file.
+
+    Args:
+        path: Image path
+        content_hash: Hash the file bytes instead of path + mtime + size
+                      (survives copies and `touch`, costs a full read)
+    """
+    path = Path(path)
+    if content_hash:
+        return hashlib.sha1(path.read_bytes()).hexdigest()
+
+    stat = path.stat()
+    return hashlib.sha1(f"{path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}".encode()).hexdigest()
+
+
+class DescriptorCache:
+    """
+    Descriptor store for one extractor configuration.
+
+    Each `add()` writes a segment: `<id>_descriptors.npy` (all rows, uint8),
+    `<id>_offsets.npy` (n_images + 1 row offsets) and `<id>_keys.json`
+    (image keys, written last so a half-written segment is ignored). Segments
+    are memory-mapped on open and lookups return views into them, so a cached
+    run reads only the rows it touches.
+    """
+
+    def __init__(self, cache_dir: Path, feature_pipeline: FeaturePipeline, content_hash: bool = False):
+        """
+        Initialize descriptor cache.
+
+        Args:
+            cache_dir: Root cache directory (one subdirectory per extractor fingerprint)
+            feature_pipeline: Pipeline whose ORB settings the descriptors belong to
+            content_hash: Key images by file content instead of path + mtime + size
+        """
+        self.feature_pipeline = feature_pipeline
+        self.content_hash = content_hash
+        self.directory = Path(cache_dir) / extractor_fingerprint(feature_pipeline)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._segments: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._index: Dict[str, Tuple[int, int]] = {}  # key -> (segment, image row)
+        self._load_segments()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def _load_segments(self) -> None:
+        for keys_path in sorted(self.directory.glob('*_keys.json')):
+            segment_id = keys_path.name[:-len('_keys.json')]
+            try:
+                with open(keys_path, 'r') as f:
+                    keys = json.load(f)
+                offsets = np.load(self.directory / f"{segment_id}_offsets.npy")
+                descriptors = self._load_rows(self.directory / f"{segment_id}_descriptors.npy")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable descriptor cache segment {segment_id}: {e}")
+                continue
+
+            segment = len(self._segments)
+            self._segments.append((descriptors, offsets))
+            for row, key in enumerate(keys):
+                self._index[key] = (segment, row)
+
+        if self._index:
+            logger.info(f"Descriptor cache {self.directory}: {len(self._index)} images in {len(self._segments)} segments")
+
+    @staticmethod
+    def _load_rows(path: Path) -> np.ndarray:
+        # np.memmap cannot map a zero-length array
+        rows = np.load(path, mmap_mode='r')
+        return rows if rows.size else np.load(path)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Look up an image key.
+
+        Returns:
+            (found, descriptors); descriptors is None for an image without keypoints
+        """
+        entry = self._index.get(key)
+        if entry is None:
+            return False, None
+
+        descriptors, offsets = self._segments[entry[0]]
+        start, end = offsets[entry[1]], offsets[entry[1] + 1]
+        return True, (descriptors[start:end] if end > start else None)
+
+    def add(self, keys: List[str], descriptors_list: List[Optional[np.ndarray]]) -> None:
+        """Store descriptors for new image keys as one segment."""
+        if not keys:
+            return
+
+        width = next((d.shape[1] for d in descriptors_list if d is not None), 32)
+        counts = [0 if d is None else d.shape[0] for d in descriptors_list]
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+        present = [d for d in descriptors_list if d is not None and d.shape[0]]
+        rows = np.vstack(present) if present else np.zeros((0, width), dtype=np.uint8)
+
+        segment_id = uuid.uuid4().hex[:12]
+        descriptors_path = self.directory / f"{segment_id}_descriptors.npy"
+        offsets_path = self.directory / f"{segment_id}_offsets.npy"
+        keys_path = self.directory / f"{segment_id}_keys.json"
+
+        np.save(descriptors_path, rows)
+        np.save(offsets_path, offsets)
+        tmp_path = keys_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(keys, f)
+        os.replace(tmp_path, keys_path)
+
+        segment = len(self._segments)
+        self._segments.append((self._load_rows(descriptors_path), offsets))
+        for row, key in enumerate(keys):
+            self._index[key] = (segment, row)
+        logger.info(f"Cached descriptors of {len(keys)} images ({rows.shape[0]} rows)")
+
+    def load_or_extract(
+        self,
+        paths: List[Path],
+        verbose: bool = True
+    ) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        """
+        Descriptors for image files, extracting and caching only the misses.
+
+        Args:
+            paths: Image paths
+            verbose: Show progress while extracting misses
+
+        Returns:
+            (descriptors_list, kept) where `kept` are the indices of `paths`
+            that could be read; descriptors_list is aligned with `kept`
+        """
+        keys: List[Optional[str]] = []
+        for path in paths:
+            try:
+                keys.append(image_key(path, self.content_hash))
+            except OSError:
+                keys.append(None)  # Missing file, skipped like an unreadable image
+
+        found: Dict[int, Optional[np.ndarray]] = {}
+        missing = []
+        for i, key in enumerate(keys):
+            if key is None:
+                continue
+            hit, descriptors = self.get(key)
+            if hit:
+                found[i] = descriptors
+            else:
+                missing.append(i)
+        self.hits += len(found)
+        self.misses += len(missing)
+        logger.info(f"Descriptor cache: {len(found)} hits, {len(missing)} misses")
+
+        if missing:
+            images = []
+            readable = []
+            for i in missing:
+                img = cv2.imread(str(paths[i]))
+                if img is not None:
+                    images.append(img)
+                    readable.append(i)
+
+            extracted = self.feature_pipeline.extract_descriptors_batch(images, verbose=verbose)
+            self.add([keys[i] for i in readable], extracted)
+            found.update(zip(readable, extracted))
+
+        kept = sorted(found)
+        return [found[i] for i in kept], kept
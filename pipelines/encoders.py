@@ -0,0 +1,200 @@
+"""
+Image encoder backends for the UDP stream.
+Handles JPEG (with tunable libjpeg options), WebP and raw YUV420 encoding,
+decoding on the client side, and encoder benchmarking.
+"""
+
+import struct
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+
+# Codec ids carried in the v2 frame header
+CODEC_JPEG = 0
+CODEC_WEBP = 1
+CODEC_YUV420 = 2
+
+CODEC_IDS = {'jpeg': CODEC_JPEG, 'webp': CODEC_WEBP, 'yuv420': CODEC_YUV420}
+
+# Raw YUV420 frames are prefixed with (width, height)
+YUV420_HEADER = struct.Struct("!HH")
+
+JPEG_SUBSAMPLING = ('420', '422', '444')
+
+
+class FrameEncoder:
+    """Base class for stream encoders."""
+
+    name = ''
+    codec_id = -1
+
+    def encode(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
+        """
+        Encode a BGR frame.
+
+        Args:
+            frame: BGR image
+            quality: Quality 1-100 (ignored by lossless backends)
+
+        Returns:
+            Encoded bytes, or None on failure
+        """
+        raise NotImplementedError
+
+
+class JpegEncoder(FrameEncoder):
+    """OpenCV/libjpeg JPEG encoder."""
+
+    name = 'jpeg'
+    codec_id = CODEC_JPEG
+
+    def __init__(self, optimize: bool = False, progressive: bool = False, subsampling: str = '420'):
+        """
+        Initialize JPEG encoder.
+
+        Args:
+            optimize: Optimize Huffman tables (smaller output, slower encode)
+            progressive: Progressive scan (slower to encode and decode; off for streaming)
+            subsampling: Chroma subsampling, one of '420', '422', '444'
+        """
+        if subsampling not in JPEG_SUBSAMPLING:
+            raise ValueError(f"Unknown chroma subsampling: {subsampling} (expected one of {JPEG_SUBSAMPLING})")
+
+        self.optimize = optimize
+        self.progressive = progressive
+        self.subsampling = subsampling
+
+        self._params = [
+            cv2.IMWRITE_JPEG_OPTIMIZE, int(optimize),
+            cv2.IMWRITE_JPEG_PROGRESSIVE, int(progressive)
+        ]
+        # Sampling factor needs OpenCV >= 4.5.5; older builds always use 4:2:0
+        if hasattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR'):
+            factor = getattr(cv2, f'IMWRITE_JPEG_SAMPLING_FACTOR_{subsampling}')
+            self._params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, factor]
+
+    def encode(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
+        result, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality] + self._params)
+        return encoded.tobytes() if result else None
+
+
+class WebpEncoder(FrameEncoder):
+    """OpenCV/libwebp lossy WebP encoder."""
+
+    name = 'webp'
+    codec_id = CODEC_WEBP
+
+    def encode(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
+        result, encoded = cv2.imencode('.webp', frame, [cv2.IMWRITE_WEBP_QUALITY, quality])
+        return encoded.tobytes() if result else None
+
+
+class Yuv420Encoder(FrameEncoder):
+    """
+    Uncompressed planar YUV 4:2:0 (I420), for loopback where bandwidth is free.
+
+    Odd frame dimensions are cropped to even ones.
+    """
+
+    name = 'yuv420'
+    codec_id = CODEC_YUV420
+
+    def encode(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
+        height, width = frame.shape[:2]
+        frame = frame[:height - height % 2, :width - width % 2]
+        height, width = frame.shape[:2]
+        yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420)
+        return YUV420_HEADER.pack(width, height) + yuv.tobytes()
+
+
+def get_encoder(name: str, **options) -> FrameEncoder:
+    """
+    Create an encoder by name.
+
+    Args:
+        name: 'jpeg', 'webp' or 'yuv420'
+        **options: Backend options (JPEG only: optimize, progressive, subsampling)
+
+    Raises:
+        ValueError: If the codec name is unknown
+    """
+    if name == 'jpeg':
+        return JpegEncoder(**options)
+    if name == 'webp':
+        return WebpEncoder()
+    if name == 'yuv420':
+        return Yuv420Encoder()
+    raise ValueError(f"Unknown codec: {name} (expected one of {list(CODEC_IDS)})")
+
+
+def decode_frame(codec_id: int, data: bytes) -> Optional[np.ndarray]:
+    """
+    Decode a received frame to a BGR image.
+
+    Returns:
+        BGR image, or None if the data cannot be decoded
+    """
+    if codec_id == CODEC_YUV420:
+        if len(data) < YUV420_HEADER.size:
+            return None
+        width, height = YUV420_HEADER.unpack_from(data)
+        planes = np.frombuffer(data, dtype=np.uint8, offset=YUV420_HEADER.size)
+        if planes.size != width * height * 3 // 2:
+            return None
+        return cv2.cvtColor(planes.reshape(height * 3 // 2, width), cv2.COLOR_YUV2BGR_I420)
+
+    if codec_id in (CODEC_JPEG, CODEC_WEBP):
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    return None
+
+
+def benchmark_encoders(
+    frames: List[np.ndarray],
+    encoders: List[FrameEncoder],
+    quality: int = 40,
+    decode: bool = True
+) -> List[Dict]:
+    """
+    Measure encode (and decode) time and bytes per frame for each encoder.
+
+    Args:
+        frames: BGR test frames
+        encoders: Encoders to compare
+        quality: Quality passed to every encoder
+        decode: Also time client-side decoding
+
+    Returns:
+        One result dict per encoder
+    """
+    results = []
+    for encoder in encoders:
+        encode_ms = []
+        decode_ms = []
+        sizes = []
+
+        for frame in frames:
+            start = time.perf_counter()
+            data = encoder.encode(frame, quality)
+            encode_ms.append((time.perf_counter() - start) * 1000.0)
+            sizes.append(len(data) if data else 0)
+
+            if decode and data:
+                start = time.perf_counter()
+                decode_frame(encoder.codec_id, data)
+                decode_ms.append((time.perf_counter() - start) * 1000.0)
+
+        results.append({
+            'codec': encoder.name,
+            'options': {k: v for k, v in vars(encoder).items() if not k.startswith('_')},
+            'encode_ms_mean': float(np.mean(encode_ms)),
+            'encode_ms_p95': float(np.percentile(encode_ms, 95)),
+            'decode_ms_mean': float(np.mean(decode_ms)) if decode_ms else 0.0,
+            'bytes_mean': float(np.mean(sizes)),
+            'bytes_max': int(np.max(sizes))
+        })
+
+    return results
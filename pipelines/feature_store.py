@@ -0,0 +1,176 @@
+"""
+Persistent store of per-split feature matrices (BoVW or HOG).
+Handles float32 `.npy` matrices keyed by codebook fingerprint and split
+manifest, so evaluation runs and SVM experiments against an unchanged codebook
+memory-map the features instead of redoing ORB + BoVW extraction. Codebooks are
+stored too, keyed by their build settings and training split, so a repeated
+experiment also skips ORB extraction and k-means.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from .descriptor_cache import extractor_fingerprint
+from .features import FeaturePipeline, HOGFeaturePipeline
+from .utils import logger
+
+
+def codebook_fingerprint(
+    feature_pipeline: Union[FeaturePipeline, HOGFeaturePipeline],
+    decode: str = 'bgr'
+) -> str:
+    """
+    Hash of everything that changes an image's feature vector.
+
+    Args:
+        feature_pipeline: Pipeline with a fitted codebook, or a HOG pipeline
+                          (hashed by its HOG parameters)
+        decode: How images were read ('bgr' = cv2.imread + cvtColor,
+                'gray' = dataset.ImageStream grayscale decode)
+    """
+    if isinstance(feature_pipeline, HOGFeaturePipeline):
+        settings = json.dumps(dict(feature_pipeline.params, pipeline='hog', decode=decode), sort_keys=True)
+        return hashlib.sha1(settings.encode()).hexdigest()[:16]
+
+    if not feature_pipeline.bovw_encoder.is_fitted:
+        raise ValueError("Encoder not fitted. Call fit() first.")
+
+    digest = hashlib.sha1()
+    digest.update(extractor_fingerprint(feature_pipeline).encode())
+    digest.update(decode.encode())
+    centers = np.ascontiguousarray(feature_pipeline.bovw_encoder.kmeans.cluster_centers_)
+    digest.update(str(centers.shape).encode())
+    digest.update(centers.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def codebook_settings(
+    feature_pipeline: FeaturePipeline,
+    split_data: List[Tuple[Path, int]],
+    decode: str = 'bgr'
+) -> str:
+    """Hash of everything that goes into building a codebook from a training split."""
+    kmeans_params = feature_pipeline.bovw_encoder.kmeans.get_params()
+    settings = json.dumps({
+        'extractor': extractor_fingerprint(feature_pipeline),
+        'decode': decode,
+        'streaming_codebook': feature_pipeline.streaming_codebook,
+        'kmeans': {name: kmeans_params[name] for name in ('n_clusters', 'random_state', 'batch_size', 'max_iter')},
+        'split': split_manifest(split_data)
+    }, sort_keys=True)
+    return hashlib.sha1(settings.encode()).hexdigest()[:16]
+
+
+def split_manifest(split_data: List[Tuple[Path, int]]) -> str:
+    """Hash of a split's images (path, mtime, size) and labels, in order."""
+    digest = hashlib.sha1()
+    for img_path, label in split_data:
+        try:
+            stat = Path(img_path).stat()
+            entry = f"{img_path}|{stat.st_mtime_ns}|{stat.st_size}|{label}\n"
+        except OSError:
+            entry = f"{img_path}|missing|{label}\n"
+        digest.update(entry.encode())
+    return digest.hexdigest()[:16]
+
+
+class FeatureStore:
+    """
+    Directory of feature matrices: `<split>_<key>_X.npy` (float32, pre-scaler),
+    `<split>_<key>_y.npy` (labels) and `<split>_<key>.json` (metadata, written
+    last so an interrupted save is never loaded).
+    """
+
+    def __init__(self, store_dir: Path):
+        """
+        Initialize feature store.
+
+        Args:
+            store_dir: Directory for the matrices
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(
+        feature_pipeline: Union[FeaturePipeline, HOGFeaturePipeline],
+        split_data: List[Tuple[Path, int]],
+        decode: str = 'bgr'
+    ) -> str:
+        """Store key of a split under the pipeline's current codebook."""
+        return f"{codebook_fingerprint(feature_pipeline, decode)}_{split_manifest(split_data)}"
+
+    def paths(self, split_name: str, key: str) -> Tuple[Path, Path, Path]:
+        """(features, labels, metadata) file paths, e.g. for `np.load(..., mmap_mode='r')`."""
+        stem = self.store_dir / f"{split_name}_{key}"
+        return Path(f"{stem}_X.npy"), Path(f"{stem}_y.npy"), Path(f"{stem}.json")
+
+    def codebook_path(self, settings_key: str) -> Path:
+        """Codebook file for `codebook_settings` key."""
+        return self.store_dir / f"codebook_{settings_key}.pkl"
+
+    def load_codebook(self, feature_pipeline: FeaturePipeline, settings_key: str) -> bool:
+        """
+        Load a stored codebook into the pipeline's encoder.
+
+        Returns:
+            True if a codebook was loaded, False if none is stored
+        """
+        path = self.codebook_path(settings_key)
+        if not path.exists():
+            return False
+
+        try:
+            feature_pipeline.bovw_encoder.load(path)
+        except (OSError, ValueError, EOFError) as e:
+            logger.warning(f"Ignoring unreadable stored codebook {path}: {e}")
+            return False
+        return True
+
+    def save_codebook(self, feature_pipeline: FeaturePipeline, settings_key: str) -> None:
+        """Store the pipeline's fitted codebook (written to a temp file, then renamed)."""
+        path = self.codebook_path(settings_key)
+        tmp_path = path.with_suffix('.tmp')
+        feature_pipeline.bovw_encoder.save(tmp_path)
+        os.replace(tmp_path, path)
+
+    def load(self, split_name: str, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Memory-map a stored split.
+
+        Returns:
+            (X, y) with X memory-mapped read-only, or None if not stored
+        """
+        features_path, labels_path, meta_path = self.paths(split_name, key)
+        if not meta_path.exists():
+            return None
+
+        try:
+            X = np.load(features_path, mmap_mode='r')
+            y = np.load(labels_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable stored features {features_path}: {e}")
+            return None
+
+        logger.info(f"Loaded stored {split_name} features {X.shape} from {features_path}")
+        return X, y
+
+    def save(self, split_name: str, key: str, X: np.ndarray, y: np.ndarray) -> None:
+        """Store a split's feature matrix (as float32) and labels."""
+        features_path, labels_path, meta_path = self.paths(split_name, key)
+        X = np.asarray(X, dtype=np.float32)
+
+        np.save(features_path, X)
+        np.save(labels_path, np.asarray(y))
+
+        meta = {'split': split_name, 'key': key, 'shape': list(X.shape)}
+        tmp_path = meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, meta_path)
+        logger.info(f"Stored {split_name} features {X.shape} in {features_path}")
@@ -1,14 +1,19 @@
 """
 Feature extraction using ORB and Bag-of-Visual-Words (BoVW).
-Implements ORB keypoint detection, descriptor extraction, k-means codebook, and BoVW encoding.
+Implements ORB keypoint detection, descriptor extraction, k-means codebook, and BoVW encoding,
+plus a codebook-free HOG pipeline for cheaper SVM validation.
 """
 
+import itertools
+import json
+import time
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import cv2
 import joblib
 import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
 from sklearn.cluster import MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 from tqdm import tqdm
@@ -51,6 +56,16 @@ class ORBFeatureExtractor:
             patchSize=patch_size
         )
         self.n_features = n_features
+        # Constructor arguments, so worker processes can rebuild the same detector
+        self.params = {
+            'n_features': n_features,
+            'scale_factor': scale_factor,
+            'n_levels': n_levels,
+            'edge_threshold': edge_threshold,
+            'first_level': first_level,
+            'wta_k': wta_k,
+            'patch_size': patch_size
+        }
     
     def extract_keypoints_descriptors(
         self,
@@ -80,6 +95,128 @@ class ORBFeatureExtractor:
         return descriptors
 
 
+class DenseDescriptorExtractor:
+    """
+    Binary descriptors (ORB or BRIEF) computed at a fixed grid of keypoints and scales.
+    
+    Skips keypoint detection: every image yields exactly `n_points` descriptors
+    in the same order, so a batch of ROIs stacks to (n_images, n_points, 32)
+    and BoVW-encodes with one k-means predict, and no ROI falls back to the
+    uniform "no keypoints" histogram.
+    """
+    
+    def __init__(
+        self,
+        image_size: Tuple[int, int] = (128, 128),
+        grid_step: int = 8,
+        scales: Tuple[float, ...] = (1.0, 0.75, 0.5),
+        descriptor: str = 'orb',
+        patch_size: int = 31,
+        edge_threshold: int = 16
+    ):
+        """
+        Initialize dense descriptor extractor.
+        
+        Args:
+            image_size: Size (width, height) of the images passed in
+            grid_step: Keypoint spacing in pixels at every scale
+            scales: Image scales the grid is laid over (1.0 = full size)
+            descriptor: 'orb' (ORB's learned test pattern) or 'brief' (opencv-contrib);
+                        both are unoriented, since ORB.compute keeps the grid
+                        keypoints' angle of -1 instead of estimating one
+            patch_size: ORB descriptor patch size
+            edge_threshold: ORB border size; grid points closer to the edge are dropped
+        """
+        if descriptor == 'orb':
+            # One level: the scales are explicit resizes, not an ORB pyramid
+            self.extractor = cv2.ORB_create(nlevels=1, edgeThreshold=edge_threshold, patchSize=patch_size)
+        elif descriptor == 'brief':
+            self.extractor = cv2.xfeatures2d.BriefDescriptorExtractor_create(32)
+        else:
+            raise ValueError(f"Unknown dense descriptor: {descriptor} (expected 'orb' or 'brief')")
+        
+        self.image_size = tuple(image_size)
+        self.descriptor = descriptor
+        # Constructor arguments, so worker processes can rebuild the same extractor
+        self.params = {
+            'extractor': 'dense',
+            'image_size': list(self.image_size),
+            'grid_step': grid_step,
+            'scales': list(scales),
+            'descriptor': descriptor,
+            'patch_size': patch_size,
+            'edge_threshold': edge_threshold
+        }
+        
+        # (size, keypoints) per scale; keypoint class_id = row in the output
+        self.grids: List[Tuple[Tuple[int, int], List]] = []
+        self.keypoints = []  # All grid keypoints in image_size coordinates
+        for scale in scales:
+            size = (max(1, round(self.image_size[0] * scale)), max(1, round(self.image_size[1] * scale)))
+            candidates = [
+                cv2.KeyPoint(float(x), float(y), patch_size, -1, 0, 0, len(self.keypoints) + i)
+                for i, (y, x) in enumerate(itertools.product(
+                    range(grid_step // 2, size[1], grid_step), range(grid_step // 2, size[0], grid_step)
+                ))
+            ]
+            # Which points the descriptor keeps depends only on geometry, so find them once
+            kept, _ = self.extractor.compute(np.zeros(size[::-1], dtype=np.uint8), candidates)
+            if not kept:
+                raise ValueError(f"No {descriptor} grid points fit a {size[0]}x{size[1]} image at scale {scale}")
+            
+            keypoints = []
+            for kp in kept:
+                keypoints.append(cv2.KeyPoint(kp.pt[0], kp.pt[1], kp.size, -1, 0, 0, len(self.keypoints)))
+                self.keypoints.append(cv2.KeyPoint(kp.pt[0] / scale, kp.pt[1] / scale, kp.size / scale))
+            self.grids.append((size, keypoints))
+        
+        self.n_points = len(self.keypoints)
+        self.n_features = self.n_points
+    
+    def extract_keypoints_descriptors(self, image: np.ndarray) -> Tuple[List, np.ndarray]:
+        """
+        Compute descriptors at the grid keypoints.
+        
+        Args:
+            image: Grayscale image
+        
+        Returns:
+            (keypoints, descriptors) tuple; keypoints are in image_size coordinates
+        """
+        return self.keypoints, self.extract_descriptors_only(image)
+    
+    def extract_descriptors_only(self, image: np.ndarray) -> np.ndarray:
+        """Descriptors of shape (n_points, 32), rows in grid order."""
+        if image.shape[:2] != self.image_size[::-1]:
+            image = cv2.resize(image, self.image_size)
+        
+        descriptors = np.zeros((self.n_points, 32), dtype=np.uint8)
+        for size, keypoints in self.grids:
+            scaled = image if size == self.image_size else cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            kept, computed = self.extractor.compute(scaled, keypoints)
+            if computed is not None:
+                descriptors[[kp.class_id for kp in kept]] = computed
+        return descriptors
+    
+    def extract_batch(self, images: List[np.ndarray]) -> np.ndarray:
+        """Descriptors of a batch of grayscale images, shape (n_images, n_points, 32)."""
+        descriptors = np.empty((len(images), self.n_points, 32), dtype=np.uint8)
+        for i, image in enumerate(images):
+            descriptors[i] = self.extract_descriptors_only(image)
+        return descriptors
+
+
+def build_extractor(params: Dict[str, Any]):
+    """Rebuild an ORBFeatureExtractor or DenseDescriptorExtractor from its `params`."""
+    params = dict(params)
+    kind = params.pop('extractor', 'orb')
+    if kind == 'dense':
+        return DenseDescriptorExtractor(**params)
+    if kind == 'orb':
+        return ORBFeatureExtractor(**params)
+    raise ValueError(f"Unknown feature extractor: {kind} (expected 'orb' or 'dense')")
+
+
 class BoVWEncoder:
     """Bag-of-Visual-Words encoder using k-means clustering."""
     
@@ -100,6 +237,7 @@ class BoVWEncoder:
             max_iter: Maximum iterations for k-means
         """
         self.n_clusters = n_clusters
+        self.random_state = random_state
         self.kmeans = MiniBatchKMeans(
             n_clusters=n_clusters,
             random_state=random_state,
@@ -156,6 +294,34 @@ class BoVWEncoder:
         
         return histogram
     
+    def transform_batch(self, descriptors: np.ndarray) -> np.ndarray:
+        """
+        Transform a stack of equal-size descriptor sets (DenseDescriptorExtractor)
+        to BoVW histograms with one k-means predict.
+        
+        Args:
+            descriptors: Array of shape (n_images, n_descriptors, descriptor_dim)
+        
+        Returns:
+            BoVW histograms of shape (n_images, n_clusters), equal to `transform` per image
+        """
+        if not self.is_fitted:
+            raise ValueError("Encoder not fitted. Call fit() first.")
+        
+        n_images, n_descriptors = descriptors.shape[:2]
+        if n_images == 0 or n_descriptors == 0:
+            return np.ones((n_images, self.n_clusters), dtype=np.float32) / self.n_clusters
+        
+        labels = self.kmeans.predict(descriptors.reshape(n_images * n_descriptors, -1))
+        labels = labels.reshape(n_images, n_descriptors) + (np.arange(n_images) * self.n_clusters)[:, None]
+        histograms = np.bincount(labels.ravel(), minlength=n_images * self.n_clusters).astype(np.float32)
+        histograms = histograms.reshape(n_images, self.n_clusters)
+        
+        # L1 normalization (every row has n_descriptors entries)
+        histograms /= n_descriptors
+        
+        return histograms
+    
     def fit_transform(self, descriptors: np.ndarray) -> np.ndarray:
         """Fit codebook and transform descriptors."""
         self.fit(descriptors)
@@ -178,28 +344,77 @@ class BoVWEncoder:
         logger.info(f"Loaded codebook from {path}")
 
 
-class FeaturePipeline:
-    """Complete feature extraction pipeline: ORB + BoVW."""
+class DescriptorReservoir:
+    """
+    Fixed-size uniform sample of a descriptor stream (reservoir sampling, Algorithm R).
     
-    def __init__(
-        self,
-        orb_n_features: int = 500,
-        bovw_n_clusters: int = 256,
-        target_size: Tuple[int, int] = (128, 128),
-        use_scaler: bool = True
-    ):
+    Memory is `capacity` rows no matter how many descriptors are added, and the
+    sample depends only on the seed and the order descriptors arrive in.
+    """
+    
+    def __init__(self, capacity: int, random_state: int = 42):
         """
-        Initialize feature pipeline.
+        Initialize reservoir.
+        
+        Args:
+            capacity: Maximum descriptors kept
+            random_state: Random seed
+        """
+        self.capacity = capacity
+        self.seen = 0
+        self.filled = 0
+        self._rng = np.random.default_rng(random_state)
+        self._rows: Optional[np.ndarray] = None
+    
+    def add(self, descriptors: np.ndarray) -> None:
+        """Offer one image's descriptors to the sample."""
+        n = descriptors.shape[0]
+        if n == 0:
+            return
+        if self._rows is None:
+            self._rows = np.empty((self.capacity, descriptors.shape[1]), dtype=descriptors.dtype)
+        
+        fill = min(n, self.capacity - self.filled)
+        self._rows[self.filled:self.filled + fill] = descriptors[:fill]
+        self.filled += fill
+        
+        rest = descriptors[fill:]
+        if rest.shape[0]:
+            # The i-th descriptor seen (0-based) replaces a random slot with probability capacity / (i + 1)
+            positions = self.seen + fill + np.arange(rest.shape[0])
+            slots = (self._rng.random(rest.shape[0]) * (positions + 1)).astype(np.int64)
+            keep = slots < self.capacity
+            slots, rows = slots[keep], rest[keep]
+            
+            # Later descriptors win when several land on one slot, as in the one-at-a-time algorithm
+            _, last = np.unique(slots[::-1], return_index=True)
+            last = len(slots) - 1 - last
+            self._rows[slots[last]] = rows[last]
+        
+        self.seen += n
+    
+    def sample(self) -> np.ndarray:
+        """Descriptors currently in the reservoir."""
+        if self._rows is None:
+            return np.empty((0, 0), dtype=np.uint8)
+        return self._rows[:self.filled]
+
+
+class BaseFeaturePipeline:
+    """
+    Parts shared by FeaturePipeline and HOGFeaturePipeline: grayscale/resize
+    preprocessing and the optional StandardScaler.
+    """
+    
+    def __init__(self, target_size: Tuple[int, int], use_scaler: bool = True):
+        """
+        Initialize shared pipeline state.
         
         Args:
-            orb_n_features: Number of ORB keypoints
-            bovw_n_clusters: Number of visual words
             target_size: Target image size (width, height)
             use_scaler: Whether to use StandardScaler
         """
-        self.orb_extractor = ORBFeatureExtractor(n_features=orb_n_features)
-        self.bovw_encoder = BoVWEncoder(n_clusters=bovw_n_clusters)
-        self.target_size = target_size
+        self.target_size = tuple(target_size)
         self.use_scaler = use_scaler
         self.scaler = StandardScaler() if use_scaler else None
         self.scaler_fitted = False
@@ -217,6 +432,91 @@ class FeaturePipeline:
         
         return gray
     
+    def fit_scaler(self, features: np.ndarray) -> None:
+        """Fit StandardScaler on features."""
+        if self.scaler is None:
+            return
+        
+        self.scaler.fit(features)
+        self.scaler_fitted = True
+        logger.info("Fitted StandardScaler")
+    
+    def transform_scaler(self, features: np.ndarray) -> np.ndarray:
+        """Transform features using fitted scaler."""
+        if self.scaler is None:
+            return features
+        
+        if not self.scaler_fitted:
+            raise ValueError("Scaler not fitted")
+        
+        return self.scaler.transform(features)
+    
+    def _save_scaler(self, output_dir: Path) -> None:
+        if self.scaler is not None and self.scaler_fitted:
+            joblib.dump(self.scaler, output_dir / 'scaler.pkl')
+            logger.info(f"Saved scaler to {output_dir / 'scaler.pkl'}")
+    
+    def _load_scaler(self, input_dir: Path) -> None:
+        scaler_path = input_dir / 'scaler.pkl'
+        if scaler_path.exists():
+            self.scaler = joblib.load(scaler_path)
+            self.scaler_fitted = True
+            logger.info(f"Loaded scaler from {scaler_path}")
+
+
+class FeaturePipeline(BaseFeaturePipeline):
+    """Complete feature extraction pipeline: ORB (or dense grid descriptors) + BoVW."""
+    
+    def __init__(
+        self,
+        orb_n_features: int = 500,
+        bovw_n_clusters: int = 256,
+        target_size: Tuple[int, int] = (128, 128),
+        use_scaler: bool = True,
+        n_jobs: int = 1,
+        chunk_size: int = 64,
+        streaming_codebook: bool = False,
+        extractor: str = 'orb',
+        dense_grid_step: int = 8,
+        dense_scales: Tuple[float, ...] = (1.0, 0.75, 0.5),
+        dense_descriptor: str = 'orb'
+    ):
+        """
+        Initialize feature pipeline.
+        
+        Args:
+            orb_n_features: Number of ORB keypoints
+            bovw_n_clusters: Number of visual words
+            target_size: Target image size (width, height)
+            use_scaler: Whether to use StandardScaler
+            n_jobs: Worker processes for batch extraction (1 = serial, -1 = all cores)
+            chunk_size: Images per work unit sent to a worker
+            streaming_codebook: Reservoir-sample codebook descriptors while images
+                                stream in, so memory is bounded by `max_descriptors`
+                                instead of growing with the dataset
+            extractor: 'orb' (keypoint detection) or 'dense' (DenseDescriptorExtractor
+                       on a fixed grid; constant descriptors per image, batch-encoded)
+            dense_grid_step: Grid spacing in pixels for the dense extractor
+            dense_scales: Image scales for the dense extractor
+            dense_descriptor: 'orb' or 'brief' for the dense extractor
+        """
+        if extractor == 'dense':
+            self.orb_extractor = DenseDescriptorExtractor(
+                image_size=target_size,
+                grid_step=dense_grid_step,
+                scales=dense_scales,
+                descriptor=dense_descriptor
+            )
+        elif extractor == 'orb':
+            self.orb_extractor = ORBFeatureExtractor(n_features=orb_n_features)
+        else:
+            raise ValueError(f"Unknown feature extractor: {extractor} (expected 'orb' or 'dense')")
+        super().__init__(target_size, use_scaler)
+        self.bovw_encoder = BoVWEncoder(n_clusters=bovw_n_clusters)
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.streaming_codebook = streaming_codebook
+    
     def extract_features_single(self, image: np.ndarray) -> np.ndarray:
         """
         Extract BoVW features from single image.
@@ -253,6 +553,19 @@ class FeaturePipeline:
         Returns:
             Feature matrix of shape (n_images, n_clusters)
         """
+        if self._parallel(images):
+            if not self.bovw_encoder.is_fitted:
+                raise ValueError("Encoder not fitted. Call fit() first.")
+            features_list = self._map_chunks(
+                _chunk_features, images, "Extracting features", verbose, self.bovw_encoder.kmeans
+            )
+            return np.array(features_list)
+        
+        if isinstance(self.orb_extractor, DenseDescriptorExtractor):
+            iterator = tqdm(images, desc="Extracting features") if verbose else images
+            descriptors = self.orb_extractor.extract_batch([self.preprocess_image(img) for img in iterator])
+            return self.bovw_encoder.transform_batch(descriptors)
+        
         features_list = []
         
         iterator = tqdm(images, desc="Extracting features") if verbose else images
@@ -263,9 +576,101 @@ class FeaturePipeline:
         
         return np.array(features_list)
     
-    def build_codebook(
+    def extract_descriptors_batch(
         self,
         images: List[np.ndarray],
+        verbose: bool = True
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Extract ORB descriptors from batch of images.
+        
+        Args:
+            images: List of images (BGR or grayscale)
+            verbose: Show progress bar
+        
+        Returns:
+            Per-image descriptor arrays (None where no keypoints were found;
+            always (n_points, 32) with the dense extractor)
+        """
+        if self._parallel(images):
+            return self._map_chunks(_chunk_descriptors, images, "Collecting descriptors", verbose)
+        
+        descriptors_list = []
+        
+        iterator = tqdm(images, desc="Collecting descriptors") if verbose else images
+        
+        for img in iterator:
+            gray = self.preprocess_image(img)
+            descriptors_list.append(self.orb_extractor.extract_descriptors_only(gray))
+        
+        return descriptors_list
+    
+    def extract_features_stream(
+        self,
+        images: Iterable[np.ndarray],
+        verbose: bool = True
+    ) -> np.ndarray:
+        """
+        Extract BoVW features from an image stream (e.g. dataset.ImageStream),
+        holding one batch of images (`chunk_size` per worker) at a time.
+        
+        Returns:
+            Feature matrix of shape (n_images, n_clusters)
+        """
+        features_list = []
+        progress = tqdm(desc="Extracting features", unit='img') if verbose else None
+        
+        for batch in self._iter_batches(images):
+            features_list.extend(self.extract_features_batch(batch, verbose=False))
+            if progress is not None:
+                progress.update(len(batch))
+        
+        if progress is not None:
+            progress.close()
+        
+        return np.array(features_list)
+    
+    def iter_descriptors(
+        self,
+        images: Iterable[np.ndarray],
+        verbose: bool = True
+    ) -> Iterator[Optional[np.ndarray]]:
+        """
+        Yield per-image ORB descriptors of an image stream, holding one batch
+        of images (`chunk_size` per worker) at a time.
+        """
+        progress = tqdm(desc="Collecting descriptors", unit='img') if verbose else None
+        
+        for batch in self._iter_batches(images):
+            yield from self.extract_descriptors_batch(batch, verbose=False)
+            if progress is not None:
+                progress.update(len(batch))
+        
+        if progress is not None:
+            progress.close()
+    
+    def _iter_batches(self, images: Iterable[np.ndarray]) -> Iterator[List[np.ndarray]]:
+        """Split an image iterable into lists of `chunk_size` images per worker."""
+        batch_size = self.chunk_size * max(1, effective_n_jobs(self.n_jobs))
+        iterator = iter(images)
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+    
+    def encode_descriptors(self, descriptors_list: List[Optional[np.ndarray]]) -> np.ndarray:
+        """
+        Encode per-image descriptors (e.g. from a DescriptorCache) to BoVW features.
+        
+        Returns:
+            Feature matrix of shape (n_images, n_clusters)
+        """
+        return np.array([self.bovw_encoder.transform(d) for d in descriptors_list])
+    
+    def build_codebook(
+        self,
+        images: Iterable[np.ndarray],
         max_descriptors: int = 200000,
         verbose: bool = True
     ) -> None:
@@ -273,23 +678,48 @@ class FeaturePipeline:
         Build BoVW codebook from training images.
         
         Args:
-            images: List of training images
+            images: Training images (any iterable with `streaming_codebook`)
             max_descriptors: Maximum descriptors to use for k-means
             verbose: Show progress
         """
-        logger.info(f"Building codebook from {len(images)} images...")
-        
-        # Collect descriptors from all images
-        all_descriptors = []
+        if self.streaming_codebook:
+            logger.info("Building codebook from image stream...")
+            self.fit_codebook(self.iter_descriptors(images, verbose=verbose), max_descriptors)
+            return
         
-        iterator = tqdm(images, desc="Collecting descriptors") if verbose else images
+        if not isinstance(images, list):
+            images = list(images)
+        logger.info(f"Building codebook from {len(images)} images...")
+        self.fit_codebook(self.extract_descriptors_batch(images, verbose=verbose), max_descriptors)
+    
+    def fit_codebook(
+        self,
+        descriptors_list: Iterable[Optional[np.ndarray]],
+        max_descriptors: int = 200000
+    ) -> None:
+        """
+        Build BoVW codebook from per-image descriptors.
         
-        for img in iterator:
-            gray = self.preprocess_image(img)
-            descriptors = self.orb_extractor.extract_descriptors_only(gray)
+        Args:
+            descriptors_list: Descriptor arrays (None entries are skipped); consumed
+                              one at a time with `streaming_codebook`
+            max_descriptors: Maximum descriptors to use for k-means
+        """
+        if self.streaming_codebook:
+            reservoir = DescriptorReservoir(max_descriptors, random_state=self.bovw_encoder.random_state)
+            for descriptors in descriptors_list:
+                if descriptors is not None:
+                    reservoir.add(descriptors)
+            
+            if reservoir.seen == 0:
+                raise ValueError("No descriptors extracted from any image")
             
-            if descriptors is not None:
-                all_descriptors.append(descriptors)
+            logger.info(f"Sampled {reservoir.filled} of {reservoir.seen} descriptors")
+            self.bovw_encoder.fit(reservoir.sample())
+            return
+        
+        # Collect descriptors from all images
+        all_descriptors = [d for d in descriptors_list if d is not None]
         
         # Concatenate all descriptors
         if not all_descriptors:
@@ -301,7 +731,8 @@ class FeaturePipeline:
         # Subsample if too many
         if all_descriptors.shape[0] > max_descriptors:
             logger.info(f"Subsampling to {max_descriptors} descriptors")
-            indices = np.random.choice(
+            rng = np.random.default_rng(self.bovw_encoder.random_state)
+            indices = rng.choice(
                 all_descriptors.shape[0],
                 max_descriptors,
                 replace=False
@@ -311,24 +742,33 @@ class FeaturePipeline:
         # Fit BoVW encoder
         self.bovw_encoder.fit(all_descriptors)
     
-    def fit_scaler(self, features: np.ndarray) -> None:
-        """Fit StandardScaler on features."""
-        if self.scaler is None:
-            return
-        
-        self.scaler.fit(features)
-        self.scaler_fitted = True
-        logger.info("Fitted StandardScaler")
+    def _parallel(self, images: List[np.ndarray]) -> bool:
+        """Whether a batch is worth sending to worker processes."""
+        return effective_n_jobs(self.n_jobs) > 1 and len(images) > self.chunk_size
     
-    def transform_scaler(self, features: np.ndarray) -> np.ndarray:
-        """Transform features using fitted scaler."""
-        if self.scaler is None:
-            return features
-        
-        if not self.scaler_fitted:
-            raise ValueError("Scaler not fitted")
+    def _map_chunks(
+        self,
+        func: Callable,
+        images: List[np.ndarray],
+        desc: str,
+        verbose: bool,
+        *args
+    ) -> List[Any]:
+        """
+        Run `func(extractor_params, target_size, chunk, *args)` over chunks of images in
+        worker processes and return the per-image results in input order.
+        """
+        chunks = [images[i:i + self.chunk_size] for i in range(0, len(images), self.chunk_size)]
+        tasks = (
+            delayed(func)(self.orb_extractor.params, self.target_size, chunk, *args)
+            for chunk in chunks
+        )
+        # Results come back in submission order, so output matches the serial loop
+        results = Parallel(n_jobs=self.n_jobs, return_as='generator')(tasks)
+        if verbose:
+            results = tqdm(results, total=len(chunks), desc=f"{desc} ({len(images)} images)", unit='chunk')
         
-        return self.scaler.transform(features)
+        return [item for chunk_results in results for item in chunk_results]
     
     def save(self, output_dir: Path) -> None:
         """Save pipeline components."""
@@ -338,19 +778,17 @@ class FeaturePipeline:
         self.bovw_encoder.save(output_dir / 'codebook.pkl')
         
         # Save scaler if used
-        if self.scaler is not None and self.scaler_fitted:
-            joblib.dump(self.scaler, output_dir / 'scaler.pkl')
-            logger.info(f"Saved scaler to {output_dir / 'scaler.pkl'}")
+        self._save_scaler(output_dir)
         
         # Save config
         config = {
             'orb_n_features': self.orb_extractor.n_features,
             'bovw_n_clusters': self.bovw_encoder.n_clusters,
             'target_size': self.target_size,
-            'use_scaler': self.use_scaler
+            'use_scaler': self.use_scaler,
+            'extractor': self.orb_extractor.params
         }
         
-        import json
         with open(output_dir / 'feature_config.json', 'w') as f:
             json.dump(config, f, indent=2)
         
@@ -362,22 +800,278 @@ class FeaturePipeline:
         self.bovw_encoder.load(input_dir / 'codebook.pkl')
         
         # Load scaler if exists
-        scaler_path = input_dir / 'scaler.pkl'
-        if scaler_path.exists():
-            self.scaler = joblib.load(scaler_path)
-            self.scaler_fitted = True
-            logger.info(f"Loaded scaler from {scaler_path}")
+        self._load_scaler(input_dir)
         
         # Load config
         config_path = input_dir / 'feature_config.json'
         if config_path.exists():
-            import json
             with open(config_path, 'r') as f:
                 config = json.load(f)
             
             # Update parameters
-            self.orb_extractor.n_features = config['orb_n_features']
+            if 'extractor' in config:
+                self.orb_extractor = build_extractor(config['extractor'])
+            else:
+                self.orb_extractor.n_features = config['orb_n_features']
             self.target_size = tuple(config['target_size'])
             self.use_scaler = config['use_scaler']
         
         logger.info(f"Loaded feature pipeline from {input_dir}")
+
+
+class HOGFeaturePipeline(BaseFeaturePipeline):
+    """
+    Feature pipeline with a fixed-length HOG vector per image (no codebook).
+    
+    Same interface as FeaturePipeline (batch extraction, scaler, save/load),
+    so it trains through `train_pipeline` and drops into FaceDetector. A
+    64x64 HOG is much cheaper than ORB + BoVW and every candidate yields a
+    vector of the same length, so a frame's candidates validate in one SVM call.
+    """
+    
+    def __init__(
+        self,
+        target_size: Tuple[int, int] = (64, 64),
+        block_size: Tuple[int, int] = (16, 16),
+        block_stride: Tuple[int, int] = (8, 8),
+        cell_size: Tuple[int, int] = (8, 8),
+        n_bins: int = 9,
+        use_scaler: bool = True,
+        chunk_size: int = 64
+    ):
+        """
+        Initialize HOG feature pipeline.
+        
+        Args:
+            target_size: Detection window size (width, height)
+            block_size: HOG block size in pixels
+            block_stride: HOG block stride in pixels
+            cell_size: HOG cell size in pixels
+            n_bins: Orientation bins per cell
+            use_scaler: Whether to use StandardScaler
+            chunk_size: Images held at a time when extracting from a stream
+        """
+        super().__init__(target_size, use_scaler)
+        self._set_params({
+            'target_size': list(target_size),
+            'block_size': list(block_size),
+            'block_stride': list(block_stride),
+            'cell_size': list(cell_size),
+            'n_bins': n_bins
+        })
+        self.chunk_size = chunk_size
+    
+    def _set_params(self, params: Dict[str, Any]) -> None:
+        """Create the HOGDescriptor for a set of window/block/cell parameters."""
+        self.params = params
+        self.target_size = tuple(params['target_size'])
+        self.hog = cv2.HOGDescriptor(
+            self.target_size,
+            tuple(params['block_size']),
+            tuple(params['block_stride']),
+            tuple(params['cell_size']),
+            params['n_bins']
+        )
+        self.n_features = self.hog.getDescriptorSize()
+    
+    def extract_features_single(self, image: np.ndarray) -> np.ndarray:
+        """
+        Extract HOG features from single image.
+        
+        Args:
+            image: Input image (BGR or grayscale)
+        
+        Returns:
+            HOG feature vector of length `n_features`
+        """
+        return self.hog.compute(self.preprocess_image(image)).ravel()
+    
+    def extract_features_batch(
+        self,
+        images: List[np.ndarray],
+        verbose: bool = True
+    ) -> np.ndarray:
+        """
+        Extract HOG features from batch of images.
+        
+        Args:
+            images: List of images
+            verbose: Show progress bar
+        
+        Returns:
+            Feature matrix of shape (n_images, n_features)
+        """
+        features = np.empty((len(images), self.n_features), dtype=np.float32)
+        
+        iterator = tqdm(images, desc="Extracting features") if verbose else images
+        
+        for i, img in enumerate(iterator):
+            features[i] = self.hog.compute(self.preprocess_image(img)).ravel()
+        
+        return features
+    
+    def extract_features_stream(
+        self,
+        images: Iterable[np.ndarray],
+        verbose: bool = True
+    ) -> np.ndarray:
+        """
+        Extract HOG features from an image stream (e.g. dataset.ImageStream).
+        
+        Returns:
+            Feature matrix of shape (n_images, n_features)
+        """
+        batches = []
+        iterator = tqdm(images, desc="Extracting features", unit='img') if verbose else images
+        
+        batch = []
+        for img in iterator:
+            batch.append(img)
+            if len(batch) == self.chunk_size:
+                batches.append(self.extract_features_batch(batch, verbose=False))
+                batch = []
+        if batch or not batches:
+            batches.append(self.extract_features_batch(batch, verbose=False))
+        
+        return np.vstack(batches)
+    
+    def build_codebook(self, images: Iterable[np.ndarray], max_descriptors: int = 200000, verbose: bool = True) -> None:
+        """HOG needs no codebook; kept so training code can treat both pipelines alike."""
+        logger.info("HOG features need no codebook")
+    
+    def save(self, output_dir: Path) -> None:
+        """Save pipeline components."""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Save scaler if used
+        self._save_scaler(output_dir)
+        
+        # Save config
+        config = dict(self.params, pipeline='hog', use_scaler=self.use_scaler)
+        with open(output_dir / 'feature_config.json', 'w') as f:
+            json.dump(config, f, indent=2)
+        
+        logger.info(f"Saved HOG feature pipeline to {output_dir}")
+    
+    def load(self, input_dir: Path) -> None:
+        """Load pipeline components."""
+        config_path = input_dir / 'feature_config.json'
+        if config_path.exists():
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+            
+            if config.get('pipeline') != 'hog':
+                raise ValueError(f"{config_path} is not a HOG feature pipeline")
+            
+            # Update parameters
+            self._set_params({key: config[key] for key in self.params})
+            self.use_scaler = config['use_scaler']
+        
+        # Load scaler if exists
+        self._load_scaler(input_dir)
+        
+        logger.info(f"Loaded HOG feature pipeline from {input_dir}")
+
+
+def load_feature_pipeline(input_dir: Path):
+    """
+    Load the feature pipeline saved in a models directory, ORB/BoVW or HOG
+    (per the 'pipeline' field of feature_config.json).
+    
+    Returns:
+        Loaded FeaturePipeline or HOGFeaturePipeline
+    """
+    input_dir = Path(input_dir)
+    config_path = input_dir / 'feature_config.json'
+    
+    kind = 'bovw'
+    if config_path.exists():
+        with open(config_path, 'r') as f:
+            kind = json.load(f).get('pipeline', 'bovw')
+    
+    feature_pipeline = HOGFeaturePipeline() if kind == 'hog' else FeaturePipeline()
+    feature_pipeline.load(input_dir)
+    return feature_pipeline
+
+
+def compare_extractors(
+    images: List[np.ndarray],
+    extractors: Optional[Dict[str, Any]] = None,
+    repeats: int = 3
+) -> Dict[str, Dict[str, float]]:
+    """
+    Time descriptor extractors on the same preprocessed (grayscale, target size) images.
+    
+    Args:
+        images: Grayscale images, e.g. `FeaturePipeline.preprocess_image` outputs
+        extractors: Name -> extractor (default: ORB detection vs the dense ORB grid)
+        repeats: Timed passes; the fastest is reported
+    
+    Returns:
+        Name -> {'us_per_image', 'mean_descriptors', 'empty_images'}
+    """
+    if extractors is None:
+        image_size = images[0].shape[1::-1] if images else (128, 128)
+        extractors = {
+            'orb': ORBFeatureExtractor(),
+            'dense': DenseDescriptorExtractor(image_size=image_size)
+        }
+    
+    results = {}
+    for name, extractor in extractors.items():
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            descriptors_list = [extractor.extract_descriptors_only(img) for img in images]
+            times.append(time.perf_counter() - start)
+        
+        counts = [0 if d is None else d.shape[0] for d in descriptors_list]
+        results[name] = {
+            'us_per_image': min(times) / max(1, len(images)) * 1e6,
+            'mean_descriptors': float(np.mean(counts)) if counts else 0.0,
+            'empty_images': int(sum(c == 0 for c in counts))
+        }
+    
+    logger.info(f"{'Extractor':<10} {'us/image':>9} {'Desc/image':>11} {'Empty':>6}")
+    for name, result in results.items():
+        logger.info(f"{name:<10} {result['us_per_image']:>9.1f} {result['mean_descriptors']:>11.1f} "
+                    f"{result['empty_images']:>6}")
+    
+    return results
+
+
+def _worker_pipeline(orb_params: Dict[str, Any], target_size: Tuple[int, int], kmeans=None) -> FeaturePipeline:
+    """Rebuild the extraction part of a FeaturePipeline inside a worker process."""
+    # Workers already run in parallel; OpenCV's own threads would oversubscribe the cores
+    cv2.setNumThreads(1)
+    pipeline = FeaturePipeline(target_size=tuple(target_size), use_scaler=False)
+    pipeline.orb_extractor = build_extractor(orb_params)
+    if kmeans is not None:
+        pipeline.bovw_encoder.kmeans = kmeans
+        pipeline.bovw_encoder.n_clusters = kmeans.n_clusters
+        pipeline.bovw_encoder.is_fitted = True
+    return pipeline
+
+
+def _chunk_descriptors(
+    orb_params: Dict[str, Any],
+    target_size: Tuple[int, int],
+    images: List[np.ndarray]
+) -> List[Optional[np.ndarray]]:
+    """ORB descriptors (or None) for each image of a chunk."""
+    pipeline = _worker_pipeline(orb_params, target_size)
+    return [
+        pipeline.orb_extractor.extract_descriptors_only(pipeline.preprocess_image(img))
+        for img in images
+    ]
+
+
+def _chunk_features(
+    orb_params: Dict[str, Any],
+    target_size: Tuple[int, int],
+    images: List[np.ndarray],
+    kmeans
+) -> List[np.ndarray]:
+    """BoVW feature vector for each image of a chunk."""
+    pipeline = _worker_pipeline(orb_params, target_size, kmeans)
+    return list(pipeline.extract_features_batch(images, verbose=False))
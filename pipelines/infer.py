@@ -1,17 +1,19 @@
 """
 Inference pipeline for face detection and accessory overlay.
-Combines Haar cascades, ORB+BoVW+SVM validation, NMS, and overlay placement.
+Combines Haar cascades, ORB+BoVW (or HOG) + SVM validation, NMS, and overlay placement.
 """
 
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
-from .features import FeaturePipeline
+from .features import FeaturePipeline, HOGFeaturePipeline
 from .geometry import compute_eye_angle, sort_eyes_left_right
 from .overlay import AccessoryOverlay
+from .sources import FrameSource
 from .train import SVMTrainer
 from .utils import logger, nms
 
@@ -22,7 +24,7 @@ class FaceDetector:
     def __init__(
         self,
         cascade_dir: Path,
-        feature_pipeline: FeaturePipeline,
+        feature_pipeline: Union[FeaturePipeline, HOGFeaturePipeline],
         svm_trainer: SVMTrainer,
         config: Optional[Dict] = None
     ):
@@ -31,7 +33,7 @@ class FaceDetector:
         
         Args:
             cascade_dir: Directory containing Haar cascade XML files
-            feature_pipeline: Trained feature extraction pipeline
+            feature_pipeline: Trained feature extraction pipeline (ORB + BoVW or HOG)
             svm_trainer: Trained SVM classifier
             config: Configuration dict for Haar parameters
         """
@@ -205,6 +207,36 @@ class FaceDetector:
         
         return bool(prediction == 1), float(score)
     
+    def validate_faces_svm(
+        self,
+        image: np.ndarray,
+        face_boxes: List[Tuple[int, int, int, int]]
+    ) -> List[Tuple[bool, float]]:
+        """
+        Validate all face candidates of an image with one feature batch and one SVM call.
+        
+        Args:
+            image: Input image (BGR or grayscale)
+            face_boxes: Face bounding boxes (x, y, w, h)
+        
+        Returns:
+            (is_valid, confidence_score) per box, as `validate_face_svm`
+        """
+        if not face_boxes:
+            return []
+        
+        rois = [image[y:y+h, x:x+w] for x, y, w, h in face_boxes]
+        
+        # Extract features
+        features = self.feature_pipeline.extract_features_batch(rois, verbose=False)
+        features = self.feature_pipeline.transform_scaler(features)
+        
+        # Predict
+        predictions = self.svm_trainer.predict(features)
+        scores = self.svm_trainer.decision_function(features)
+        
+        return [(bool(prediction == 1), float(score)) for prediction, score in zip(predictions, scores)]
+    
     def detect(
         self,
         image: np.ndarray,
@@ -251,8 +283,7 @@ class FaceDetector:
             validated_faces = []
             validated_scores = []
             
-            for face in all_faces:
-                is_valid, score = self.validate_face_svm(image, face)
+            for face, (is_valid, score) in zip(all_faces, self.validate_faces_svm(image, all_faces)):
                 if is_valid and score >= svm_threshold:
                     validated_faces.append(face)
                     validated_scores.append(score)
@@ -301,6 +332,9 @@ class InferencePipeline:
         self.detector = detector
         self.overlay_system = overlay_system
         self.accessories = accessories
+        
+        # Stage durations of the last process_image() call (for latency tracing)
+        self.last_timings: Dict[str, float] = {'detect_ms': 0.0, 'overlay_ms': 0.0}
     
     def process_image(
         self,
@@ -324,10 +358,12 @@ class InferencePipeline:
         result = image.copy()
         
         # Detect faces
+        start = time.perf_counter()
         faces, scores, features_list = self.detector.detect(
             image,
             use_svm=use_svm
         )
+        detected = time.perf_counter()
         
         logger.debug(f"Detected {len(faces)} faces")
         
@@ -363,6 +399,10 @@ class InferencePipeline:
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2
                 )
         
+        self.last_timings = {
+            'detect_ms': (detected - start) * 1000.0,
+            'overlay_ms': (time.perf_counter() - detected) * 1000.0
+        }
         return result
     
     def process_video(
@@ -437,10 +477,11 @@ class InferencePipeline:
         width: int = 640,
         height: int = 480,
         fps: int = 30,
-        mirror: bool = True
+        mirror: bool = True,
+        source: Optional[FrameSource] = None
     ) -> None:
         """
-        Process webcam feed in real-time.
+        Process webcam feed (or another frame source) in real-time.
         
         Args:
             camera_id: Camera device ID
@@ -451,31 +492,38 @@ class InferencePipeline:
             height: Camera frame height (lower = faster, e.g., 240, 480, 720)
             fps: Target FPS (camera-dependent)
             mirror: Flip frame horizontally (mirror mode, default True)
+            source: Frame source to read instead of the camera (video file, image
+                folder, synthetic); opened here if not yet open
         """
-        logger.info(f"Opening webcam (camera {camera_id})...")
-        
-        # Open webcam
-        cap = cv2.VideoCapture(camera_id)
-        if not cap.isOpened():
-            raise ValueError(f"Failed to open camera {camera_id}")
-        
-        # Set resolution and FPS
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        cap.set(cv2.CAP_PROP_FPS, fps)
-        
-        # Get actual settings (camera may not support requested values)
-        actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        actual_fps = int(cap.get(cv2.CAP_PROP_FPS))
-        
-        logger.info(f"Camera resolution: {actual_width}x{actual_height} @ {actual_fps} FPS")
+        if source is not None:
+            logger.info(f"Opening frame source {source}...")
+            if not source.isOpened() and not source.open():
+                raise ValueError(f"Failed to open frame source {source}")
+            cap = source
+        else:
+            logger.info(f"Opening webcam (camera {camera_id})...")
+            
+            # Open webcam
+            cap = cv2.VideoCapture(camera_id)
+            if not cap.isOpened():
+                raise ValueError(f"Failed to open camera {camera_id}")
+            
+            # Set resolution and FPS
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            cap.set(cv2.CAP_PROP_FPS, fps)
+            
+            # Get actual settings (camera may not support requested values)
+            actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            actual_fps = int(cap.get(cv2.CAP_PROP_FPS))
+            
+            logger.info(f"Camera resolution: {actual_width}x{actual_height} @ {actual_fps} FPS")
         logger.info(f"Using SVM: {use_svm}")
         if not use_svm:
             logger.info("TIP: Haar-only mode for maximum FPS!")
         
         # FPS tracking
-        import time
         prev_time = time.time()
         
         # Current enabled accessories (can be toggled)
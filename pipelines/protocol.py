@@ -0,0 +1,451 @@
+"""
+UDP frame protocol for the webcam overlay stream.
+Handles packet headers, frame fragmentation, XOR parity (FEC), repeat-frame
+packets and client-side reassembly.
+"""
+
+import math
+import struct
+import time
+import zlib
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .utils import logger
+
+
+# Legacy header: sequence, total_packets, packet_index (12 bytes)
+HEADER_V1 = struct.Struct("!III")
+
+# Versioned header (48 bytes):
+#   magic, version, header_len, flags,
+#   sequence, data_packets, index, frame_len,
+#   fec_group, codec (see pipelines.encoders), payload_size,
+#   capture_ts (microseconds since epoch), crc32 (of the whole frame),
+#   processed_ts, encoded_ts (microseconds since epoch, for latency tracing)
+# Readers skip to header_len, so fields are only ever appended.
+HEADER_V2 = struct.Struct("!BBBBIHHIBBHQIQQ")
+
+# First 32 bytes of the v2 header, as sent before the latency timestamps were added
+HEADER_V2_BASE = struct.Struct("!BBBBIHHIBBHQI")
+
+MAGIC = 0xAC
+PROTOCOL_VERSION = 2
+
+# Default v2 packet size: payload + header fits a 1500-byte Ethernet MTU with
+# room for IP/UDP headers and VPN/PPPoE encapsulation
+DEFAULT_PACKET_SIZE = 1200
+
+# Header flags
+FLAG_PARITY = 0x01
+# Header-only packet: show the previous frame again (frame_len/crc32 identify it)
+FLAG_REPEAT = 0x02
+
+
+class PacketHeader(NamedTuple):
+    """Decoded packet header (v1 packets leave the v2-only fields at defaults)."""
+    version: int
+    sequence: int
+    data_packets: int
+    index: int
+    flags: int = 0
+    frame_len: int = 0
+    fec_group: int = 0
+    payload_size: int = 0
+    capture_ts: int = 0
+    crc32: int = 0
+    codec: int = 0
+    processed_ts: int = 0
+    encoded_ts: int = 0
+
+    @property
+    def is_parity(self) -> bool:
+        return bool(self.flags & FLAG_PARITY)
+
+    @property
+    def is_repeat(self) -> bool:
+        return bool(self.flags & FLAG_REPEAT)
+
+
+def xor_parity(chunks: List[bytes], size: int) -> bytes:
+    """
+    XOR a group of chunks together, zero-padding each to `size` bytes.
+
+    Args:
+        chunks: Payload chunks of one FEC group
+        size: Parity length (the fragment payload size)
+
+    Returns:
+        Parity bytes of length `size`
+    """
+    parity = np.zeros(size, dtype=np.uint8)
+    for chunk in chunks:
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        parity[:len(data)] ^= data
+    return parity.tobytes()
+
+
+def packetize_frame_v1(frame_data: bytes, sequence: int, payload_size: int) -> List[bytes]:
+    """
+    Split a frame into legacy `(sequence, total, index)` packets.
+
+    Args:
+        frame_data: Encoded frame bytes
+        sequence: Frame sequence number
+        payload_size: Maximum payload bytes per packet (excluding header)
+
+    Returns:
+        List of UDP datagrams
+    """
+    total_packets = math.ceil(len(frame_data) / payload_size)
+    packets = []
+
+    for packet_index in range(total_packets):
+        start_pos = packet_index * payload_size
+        header = HEADER_V1.pack(sequence, total_packets, packet_index)
+        packets.append(header + frame_data[start_pos:start_pos + payload_size])
+
+    return packets
+
+
+def packetize_frame(
+    frame_data: bytes,
+    sequence: int,
+    payload_size: int,
+    fec_group: int = 0,
+    capture_ts: Optional[float] = None,
+    codec: int = 0,
+    processed_ts: Optional[float] = None,
+    encoded_ts: Optional[float] = None
+) -> List[bytes]:
+    """
+    Split a frame into v2 packets, optionally adding XOR parity.
+
+    Every packet carries the frame length, CRC32 of the whole frame (so the
+    client can verify the reassembled bytes) and the capture, processing-done
+    and encode-done timestamps used for latency tracing.
+
+    With `fec_group = k`, every k consecutive data packets are followed by one
+    parity packet, so the client can rebuild one lost fragment per group
+    (bandwidth overhead 1/k).
+
+    Args:
+        frame_data: Encoded frame bytes
+        sequence: Frame sequence number
+        payload_size: Maximum payload bytes per packet (excluding header)
+        fec_group: Data packets per parity packet (0 = no FEC)
+        capture_ts: Capture time in seconds since epoch (default: now)
+        codec: Codec id of the frame payload (default: JPEG)
+        processed_ts: Detection/overlay completion time in seconds since epoch (default: unknown)
+        encoded_ts: Encode completion time in seconds since epoch (default: unknown)
+
+    Returns:
+        List of UDP datagrams in send order
+    """
+    frame_len = len(frame_data)
+    capture_us = int((capture_ts if capture_ts is not None else time.time()) * 1e6)
+    processed_us = int(processed_ts * 1e6) if processed_ts is not None else 0
+    encoded_us = int(encoded_ts * 1e6) if encoded_ts is not None else 0
+    crc = zlib.crc32(frame_data) & 0xFFFFFFFF
+    data_packets = math.ceil(frame_len / payload_size)
+    chunks = [
+        frame_data[i * payload_size:(i + 1) * payload_size]
+        for i in range(data_packets)
+    ]
+
+    def header(flags: int, index: int) -> bytes:
+        return HEADER_V2.pack(
+            MAGIC, PROTOCOL_VERSION, HEADER_V2.size, flags,
+            sequence & 0xFFFFFFFF, data_packets, index, frame_len,
+            fec_group, codec, payload_size,
+            capture_us, crc,
+            processed_us, encoded_us
+        )
+
+    packets = []
+    group_size = fec_group if fec_group > 0 else max(data_packets, 1)
+
+    for group_index, start in enumerate(range(0, data_packets, group_size)):
+        group = chunks[start:start + group_size]
+        for offset, chunk in enumerate(group):
+            packets.append(header(0, start + offset) + chunk)
+
+        if fec_group > 0:
+            parity = xor_parity(group, payload_size)
+            packets.append(header(FLAG_PARITY, group_index) + parity)
+
+    return packets
+
+
+def build_repeat_packet(
+    sequence: int,
+    frame_len: int,
+    crc: int,
+    codec: int = 0,
+    capture_ts: Optional[float] = None,
+    processed_ts: Optional[float] = None
+) -> bytes:
+    """
+    Build a header-only packet telling clients to show the previous frame again.
+
+    Sent instead of a full frame when the scene has not changed. It takes its own
+    sequence number, and carries the length and CRC32 of the frame being repeated
+    so a client that missed that frame can tell and ask for a keyframe.
+
+    Args:
+        sequence: Sequence number of this (repeat) frame
+        frame_len: Length of the repeated frame
+        crc: CRC32 of the repeated frame
+        codec: Codec id of the repeated frame
+        capture_ts: Capture time in seconds since epoch (default: now)
+        processed_ts: Detection/overlay completion time in seconds since epoch (default: unknown)
+
+    Returns:
+        One UDP datagram
+    """
+    capture_us = int((capture_ts if capture_ts is not None else time.time()) * 1e6)
+    processed_us = int(processed_ts * 1e6) if processed_ts is not None else 0
+    return HEADER_V2.pack(
+        MAGIC, PROTOCOL_VERSION, HEADER_V2.size, FLAG_REPEAT,
+        sequence & 0xFFFFFFFF, 0, 0, frame_len,
+        0, codec, 0,
+        capture_us, crc & 0xFFFFFFFF,
+        processed_us, 0
+    )
+
+
+def parse_header(packet: bytes) -> Tuple[PacketHeader, int]:
+    """
+    Decode the header of a datagram, detecting v1 or v2 layout.
+
+    v1 sequence numbers wrap at 65536, so the first byte of a v1 packet is
+    always zero and never collides with MAGIC.
+
+    Returns:
+        (header, header_len) tuple
+
+    Raises:
+        ValueError: If the packet is too short for its header
+    """
+    if len(packet) >= HEADER_V2_BASE.size and packet[0] == MAGIC:
+        (_, version, header_len, flags, sequence, data_packets, index,
+         frame_len, fec_group, codec, payload_size,
+         capture_ts, crc) = HEADER_V2_BASE.unpack_from(packet)
+
+        processed_ts = encoded_ts = 0
+        if header_len >= HEADER_V2.size and len(packet) >= HEADER_V2.size:
+            processed_ts, encoded_ts = HEADER_V2.unpack_from(packet)[-2:]
+
+        header = PacketHeader(
+            version=version,
+            sequence=sequence,
+            data_packets=data_packets,
+            index=index,
+            flags=flags,
+            frame_len=frame_len,
+            fec_group=fec_group,
+            payload_size=payload_size,
+            capture_ts=capture_ts,
+            crc32=crc,
+            codec=codec,
+            processed_ts=processed_ts,
+            encoded_ts=encoded_ts
+        )
+        return header, header_len
+
+    if len(packet) < HEADER_V1.size:
+        raise ValueError(f"Packet too short: {len(packet)} bytes")
+
+    sequence, total_packets, packet_index = HEADER_V1.unpack_from(packet)
+    return PacketHeader(1, sequence, total_packets, packet_index), HEADER_V1.size
+
+
+def parse_packet(packet: bytes) -> Tuple[PacketHeader, bytes]:
+    """Parse a datagram into (header, payload)."""
+    header, header_len = parse_header(packet)
+    return header, packet[header_len:]
+
+
+def build_nack(sequence: int, indices: List[int]) -> bytes:
+    """Build a `NACK:<sequence>:<i,j,...>` control message for missing data packets."""
+    return f"NACK:{sequence}:{','.join(str(i) for i in indices)}".encode('utf-8')
+
+
+def parse_nack(message: str) -> Tuple[int, List[int]]:
+    """
+    Parse a NACK control message.
+
+    Returns:
+        (sequence, missing_indices) tuple
+
+    Raises:
+        ValueError: If the message is malformed
+    """
+    _, sequence, indices = message.split(":", 2)
+    return int(sequence), [int(i) for i in indices.split(",") if i]
+
+
+class _PendingFrame:
+    """Fragments received so far for one frame."""
+
+    def __init__(self, header: PacketHeader):
+        self.header = header
+        self.data: Dict[int, bytes] = {}
+        self.parity: Dict[int, bytes] = {}
+        self.recovered = 0
+
+    def is_complete(self) -> bool:
+        return len(self.data) == self.header.data_packets
+
+    def try_recover(self) -> None:
+        """Rebuild missing data packets from groups missing exactly one fragment."""
+        h = self.header
+        if h.fec_group <= 0:
+            return
+
+        for group_index, parity in self.parity.items():
+            start = group_index * h.fec_group
+            indices = range(start, min(start + h.fec_group, h.data_packets))
+            missing = [i for i in indices if i not in self.data]
+
+            if len(missing) != 1:
+                continue
+
+            lost = missing[0]
+            rebuilt = xor_parity(
+                [parity] + [self.data[i] for i in indices if i != lost],
+                h.payload_size
+            )
+            if lost == h.data_packets - 1:
+                rebuilt = rebuilt[:h.frame_len - lost * h.payload_size]
+
+            self.data[lost] = rebuilt
+            self.recovered += 1
+
+    def assemble(self) -> bytes:
+        return b''.join(self.data[i] for i in range(self.header.data_packets))
+
+
+class FrameReassembler:
+    """
+    Client-side frame reassembly with FEC recovery.
+
+    Repeat packets deliver the previous frame's bytes again under the new
+    sequence. If the client does not hold the frame being repeated,
+    `needs_keyframe` is set so the caller can send `KEYFRAME`.
+    """
+
+    def __init__(self, max_pending: int = 4):
+        """
+        Initialize reassembler.
+
+        Args:
+            max_pending: Incomplete frames kept before the oldest is dropped
+        """
+        self.max_pending = max_pending
+        self.pending: Dict[int, _PendingFrame] = {}
+        self.completed = deque(maxlen=64)  # Recently delivered sequences
+        self.last_header: Optional[PacketHeader] = None  # Header of the last delivered frame (codec, timestamps)
+        self.last_frame: Optional[bytes] = None  # Last delivered frame, shown again by repeat packets
+        self.needs_keyframe = False
+
+        # Statistics
+        self.frames_completed = 0
+        self.frames_recovered = 0
+        self.frames_dropped = 0
+        self.frames_corrupt = 0
+        self.frames_repeated = 0
+        self.packets_recovered = 0
+
+    def add_packet(self, packet: bytes) -> Optional[Tuple[int, bytes]]:
+        """
+        Feed one datagram.
+
+        Returns:
+            (sequence, frame_data) when this packet completes a frame, else None
+        """
+        try:
+            header, payload = parse_packet(packet)
+        except ValueError as e:
+            logger.debug(f"Dropping packet: {e}")
+            return None
+
+        if header.is_repeat:
+            return self._repeat(header)
+
+        frame = self.pending.get(header.sequence)
+        if frame is None:
+            if header.sequence in self.completed:
+                return None  # Late fragment of a frame already delivered
+            frame = _PendingFrame(header)
+            self.pending[header.sequence] = frame
+            self._evict_stale()
+
+        if header.is_parity:
+            frame.parity.setdefault(header.index, payload)
+        else:
+            frame.data.setdefault(header.index, payload)
+
+        if not frame.is_complete():
+            frame.try_recover()
+
+        if not frame.is_complete():
+            return None
+
+        del self.pending[header.sequence]
+        self.completed.append(header.sequence)
+
+        frame_data = frame.assemble()
+        if header.version >= 2 and zlib.crc32(frame_data) & 0xFFFFFFFF != header.crc32:
+            logger.debug(f"Frame {header.sequence} failed CRC check")
+            self.frames_corrupt += 1
+            return None
+
+        self.frames_completed += 1
+        self.last_header = frame.header
+        self.last_frame = frame_data
+        if frame.recovered:
+            self.frames_recovered += 1
+            self.packets_recovered += frame.recovered
+
+        return header.sequence, frame_data
+
+    def _repeat(self, header: PacketHeader) -> Optional[Tuple[int, bytes]]:
+        """Deliver the previous frame again if it is the one the server repeats."""
+        if header.sequence in self.completed:
+            return None
+
+        # last_header holds the verified CRC of last_frame (repeats copy it forward)
+        last = self.last_header
+        if self.last_frame is None or (last.frame_len, last.crc32) != (header.frame_len, header.crc32):
+            self.needs_keyframe = True
+            return None
+
+        self.completed.append(header.sequence)
+        self.frames_completed += 1
+        self.frames_repeated += 1
+        self.last_header = header
+        return header.sequence, self.last_frame
+
+    def missing(self) -> Dict[int, List[int]]:
+        """Missing data packet indices for every incomplete frame (for NACKs)."""
+        return {
+            sequence: [i for i in range(frame.header.data_packets) if i not in frame.data]
+            for sequence, frame in self.pending.items()
+        }
+
+    def _evict_stale(self) -> None:
+        """Drop the oldest incomplete frames beyond `max_pending`."""
+        while len(self.pending) > self.max_pending:
+            oldest = min(self.pending)
+            del self.pending[oldest]
+            self.frames_dropped += 1
+
+    def flush(self) -> int:
+        """Discard all incomplete frames, counting them as dropped."""
+        dropped = len(self.pending)
+        self.frames_dropped += dropped
+        self.pending.clear()
+        return dropped
@@ -0,0 +1,253 @@
+"""
+Shared-memory frame transport for clients on the same host.
+Handles a memory-mapped ring buffer file of raw BGR/RGBA frames, written by the
+server and read by local clients after a small UDP doorbell (`SHM:<sequence>`),
+so frames skip encoding, fragmentation and decoding entirely.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .utils import logger
+
+
+# Ring file layout (little-endian, both ends run on the same machine):
+#   [0:64)   ring header: magic, version, slots, slot_size, max_bytes, latest sequence
+#   [64:...) `slots` slots of `slot_size` bytes, each a 64-byte slot header + pixels
+# A frame with sequence n lives in slot n % slots.
+RING_MAGIC = b"ACSHMRNG"
+RING_VERSION = 1
+RING_HEADER = struct.Struct("<8sHHIIQ")
+RING_HEADER_SIZE = 64
+LATEST_OFFSET = RING_HEADER.size - 8
+
+# Slot header: sequence (0 while the slot is being written), capture_ts,
+# processed_ts (microseconds since epoch), width, height, channels, format, length
+SLOT_HEADER = struct.Struct("<QQQHHBBI")
+SLOT_HEADER_SIZE = 64
+
+FORMAT_BGR = 0
+FORMAT_RGBA = 1
+FORMATS = {'bgr': FORMAT_BGR, 'rgba': FORMAT_RGBA}
+FORMAT_CHANNELS = {FORMAT_BGR: 3, FORMAT_RGBA: 4}
+
+# Doorbell datagram sent to each shared-memory client after a frame is written
+DOORBELL_PREFIX = "SHM:"
+
+
+class SlotHeader(NamedTuple):
+    """Metadata of one frame in the ring."""
+    sequence: int
+    capture_ts: int
+    processed_ts: int
+    width: int
+    height: int
+    channels: int
+    format: int
+    length: int
+
+
+def default_shm_path(port: int) -> Path:
+    """Ring file path for a server port (RAM-backed /dev/shm where available)."""
+    directory = Path('/dev/shm') if Path('/dev/shm').is_dir() else Path(tempfile.gettempdir())
+    return directory / f"accessory_overlay_{port}.ring"
+
+
+def _align(size: int, alignment: int = 64) -> int:
+    return (size + alignment - 1) // alignment * alignment
+
+
+class ShmRingWriter:
+    """
+    Server side of the ring: writes raw frames into a memory-mapped file.
+
+    A slot's sequence field is zeroed before its pixels are overwritten and set
+    afterwards, so a reader that checks the sequence before and after copying
+    never returns a torn frame. With a few slots, a reader has several frame
+    intervals to copy a frame before the writer comes back to its slot.
+    """
+
+    def __init__(self, path: Path, max_width: int, max_height: int, fmt: str = 'rgba', slots: int = 4):
+        """
+        Initialize ring writer.
+
+        Args:
+            path: Ring file path (created or truncated by `open()`)
+            max_width: Largest frame width that fits a slot
+            max_height: Largest frame height that fits a slot
+            fmt: Pixel format written, 'bgr' or 'rgba' (Godot reads RGBA directly)
+            slots: Number of frames kept in the ring
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown shared-memory pixel format: {fmt} (expected one of {list(FORMATS)})")
+        if slots < 2:
+            raise ValueError(f"Ring needs at least 2 slots, got {slots}")
+
+        self.path = Path(path)
+        self.format = FORMATS[fmt]
+        self.channels = FORMAT_CHANNELS[self.format]
+        self.slots = slots
+        self.max_bytes = max_width * max_height * self.channels
+        self.slot_size = _align(SLOT_HEADER_SIZE + self.max_bytes)
+        self.size = RING_HEADER_SIZE + slots * self.slot_size
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self.frames_written = 0
+        self.frames_too_large = 0
+
+    def open(self) -> None:
+        self._file = open(self.path, 'w+b')
+        self._file.truncate(self.size)
+        self._map = mmap.mmap(self._file.fileno(), self.size)
+        RING_HEADER.pack_into(self._map, 0, RING_MAGIC, RING_VERSION, self.slots,
+                              self.slot_size, self.max_bytes, 0)
+        logger.info(f"Shared-memory ring: {self.path} ({self.slots} x {self.slot_size // 1024}KB)")
+
+    def write(self, frame: np.ndarray, sequence: int,
+              capture_ts: Optional[float] = None, processed_ts: Optional[float] = None) -> bool:
+        """
+        Write a BGR frame into the slot for `sequence`.
+
+        Args:
+            frame: BGR image (converted to the ring's pixel format)
+            sequence: Frame sequence number (> 0)
+            capture_ts: Capture time in seconds since epoch
+            processed_ts: Detection/overlay completion time in seconds since epoch
+
+        Returns:
+            False if the frame does not fit a slot
+        """
+        height, width = frame.shape[:2]
+        length = width * height * self.channels
+        if length > self.max_bytes:
+            self.frames_too_large += 1
+            return False
+
+        offset = RING_HEADER_SIZE + (sequence % self.slots) * self.slot_size
+        data_offset = offset + SLOT_HEADER_SIZE
+
+        # Invalidate, convert/copy straight into the mapping (one pass), then publish the sequence last
+        struct.pack_into("<Q", self._map, offset, 0)
+        pixels = np.ndarray((height, width, self.channels), dtype=np.uint8, buffer=self._map, offset=data_offset)
+        if self.format == FORMAT_RGBA:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=pixels)
+        else:
+            np.copyto(pixels, frame)
+        del pixels  # Release the buffer export so the map can be closed
+        SLOT_HEADER.pack_into(
+            self._map, offset,
+            sequence,
+            int((capture_ts or 0) * 1e6), int((processed_ts or 0) * 1e6),
+            width, height, self.channels, self.format, length
+        )
+        struct.pack_into("<Q", self._map, LATEST_OFFSET, sequence)
+
+        self.frames_written += 1
+        return True
+
+    def close(self, remove: bool = True) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if remove:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+
+class ShmRingReader:
+    """Client side of the ring: copies frames out by sequence number."""
+
+    def __init__(self, path: Path):
+        """
+        Initialize ring reader.
+
+        Args:
+            path: Ring file path announced by the server (`REGISTERED:SHM:<path>`)
+        """
+        self.path = Path(path)
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self.slots = 0
+        self.slot_size = 0
+        self.frames_read = 0
+        self.frames_overwritten = 0
+
+    def open(self) -> bool:
+        try:
+            self._file = open(self.path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to open shared-memory ring {self.path}: {e}")
+            self.close()
+            return False
+
+        magic, version, self.slots, self.slot_size, _, _ = RING_HEADER.unpack_from(self._map, 0)
+        if magic != RING_MAGIC or version != RING_VERSION:
+            logger.warning(f"Not a v{RING_VERSION} frame ring: {self.path}")
+            self.close()
+            return False
+        return True
+
+    @property
+    def latest(self) -> int:
+        """Sequence of the most recently written frame (0 = none yet)."""
+        return struct.unpack_from("<Q", self._map, LATEST_OFFSET)[0]
+
+    def read(self, sequence: int) -> Optional[Tuple[np.ndarray, SlotHeader]]:
+        """
+        Copy the frame with `sequence` out of the ring.
+
+        Returns:
+            (image, header) with a BGR or RGBA image per `header.format`,
+            or None if the slot already holds another frame
+        """
+        offset = RING_HEADER_SIZE + (sequence % self.slots) * self.slot_size
+        header = SlotHeader(*SLOT_HEADER.unpack_from(self._map, offset))
+        if header.sequence != sequence:
+            self.frames_overwritten += 1
+            return None
+
+        data_offset = offset + SLOT_HEADER_SIZE
+        data = self._map[data_offset:data_offset + header.length]
+
+        # The writer may have started on this slot while we copied
+        if struct.unpack_from("<Q", self._map, offset)[0] != sequence:
+            self.frames_overwritten += 1
+            return None
+
+        image = np.frombuffer(data, dtype=np.uint8).reshape(header.height, header.width, header.channels)
+        self.frames_read += 1
+        return image, header
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def parse_transport(payload: str) -> str:
+    """Read the optional `"transport"` field of a REGISTER profile payload ('udp' or 'shm')."""
+    try:
+        data = json.loads(payload) if payload else {}
+    except ValueError:
+        return 'udp'
+    if not isinstance(data, dict):
+        return 'udp'
+    return 'shm' if data.get('transport') == 'shm' else 'udp'
+
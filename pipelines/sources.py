@@ -0,0 +1,379 @@
+"""
+Frame sources for the streaming server, webcam inference and benchmarks.
+Handles cameras, looping video files, image folders and a synthetic test
+pattern behind one VideoCapture-like interface, optionally at a fixed rate.
+"""
+
+import platform
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .utils import collect_image_paths, logger
+
+
+class FrameSource:
+    """
+    Base class for frame sources.
+
+    Mirrors the part of `cv2.VideoCapture` the callers use (`read`, `release`,
+    `isOpened`), so a source can stand in for a camera. With `fps > 0`,
+    `read()` blocks until the next frame slot on a monotonic clock; a late
+    reader skips slots instead of receiving a burst of frames.
+    """
+
+    name = ''
+
+    def __init__(self, fps: float = 0.0, size: Optional[Tuple[int, int]] = None):
+        """
+        Initialize frame source.
+
+        Args:
+            fps: Fixed output rate (0 = as fast as the caller reads)
+            size: Output (width, height); None keeps the native size
+        """
+        self.fps = fps
+        self.size = size
+        self.frames_read = 0
+        self._next_deadline: Optional[float] = None
+
+    def open(self) -> bool:
+        """Open the underlying device or files. Returns True on success."""
+        return True
+
+    def isOpened(self) -> bool:
+        return True
+
+    def _read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def _wait_for_slot(self) -> None:
+        if self.fps <= 0:
+            return
+
+        interval = 1.0 / self.fps
+        now = time.monotonic()
+        if self._next_deadline is None:
+            self._next_deadline = now
+
+        if self._next_deadline > now:
+            time.sleep(self._next_deadline - now)
+            now = time.monotonic()
+
+        self._next_deadline = max(self._next_deadline + interval, now)
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Read the next BGR frame.
+
+        Returns:
+            (ok, frame) tuple, like `cv2.VideoCapture.read`
+        """
+        self._wait_for_slot()
+        ok, frame = self._read()
+        if not ok:
+            return False, None
+
+        if self.size is not None and (frame.shape[1], frame.shape[0]) != tuple(self.size):
+            frame = cv2.resize(frame, tuple(self.size), interpolation=cv2.INTER_AREA)
+
+        self.frames_read += 1
+        return True, frame
+
+    def release(self) -> None:
+        pass
+
+    def __enter__(self):
+        if not self.open():
+            raise ValueError(f"Failed to open frame source: {self}")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(fps={self.fps}, size={self.size})"
+
+
+class CameraSource(FrameSource):
+    """Webcam via OpenCV; the device itself sets the pace."""
+
+    name = 'camera'
+
+    def __init__(
+        self,
+        device: int = 0,
+        width: int = 640,
+        height: int = 480,
+        fps: float = 30.0,
+        backends: Optional[List[int]] = None
+    ):
+        """
+        Initialize camera source.
+
+        Args:
+            device: Camera device index
+            width: Requested capture width
+            height: Requested capture height
+            fps: Requested capture rate (passed to the driver, not software-paced)
+            backends: OpenCV capture backends to try (default: per platform)
+        """
+        super().__init__(fps=0.0)
+        self.device = device
+        self.width = width
+        self.height = height
+        self.capture_fps = fps
+        self.backends = backends
+        self.capture: Optional[cv2.VideoCapture] = None
+
+    def open(self) -> bool:
+        backends = self.backends
+        if backends is None:
+            system = platform.system()
+            if system == "Windows":
+                backends = [cv2.CAP_DSHOW, cv2.CAP_ANY]
+            elif system == "Linux":
+                backends = [cv2.CAP_V4L2, cv2.CAP_ANY]
+            else:
+                backends = [cv2.CAP_ANY]
+
+        for backend in backends:
+            capture = cv2.VideoCapture(self.device, backend)
+            if not capture.isOpened():
+                continue
+
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            capture.set(cv2.CAP_PROP_FPS, self.capture_fps)
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+            ok, _ = capture.read()
+            if ok:
+                self.capture = capture
+                logger.info(f"Camera {self.device} opened: "
+                            f"{int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))}x"
+                            f"{int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))}")
+                return True
+            capture.release()
+
+        logger.warning(f"Failed to open camera {self.device}")
+        return False
+
+    def isOpened(self) -> bool:
+        return self.capture is not None and self.capture.isOpened()
+
+    def _read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.capture is None:
+            return False, None
+        return self.capture.read()
+
+    def release(self) -> None:
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def __repr__(self) -> str:
+        return f"CameraSource(device={self.device})"
+
+
+class VideoFileSource(FrameSource):
+    """Video file, restarted from the first frame when it ends."""
+
+    name = 'video'
+
+    def __init__(self, path: Path, fps: float = 0.0, size: Optional[Tuple[int, int]] = None, loop: bool = True):
+        """
+        Initialize video file source.
+
+        Args:
+            path: Video file path
+            fps: Fixed output rate (0 = unpaced)
+            size: Output (width, height); None keeps the native size
+            loop: Restart at the end instead of returning False
+        """
+        super().__init__(fps=fps, size=size)
+        self.path = Path(path)
+        self.loop = loop
+        self.capture: Optional[cv2.VideoCapture] = None
+
+    def open(self) -> bool:
+        self.capture = cv2.VideoCapture(str(self.path))
+        if not self.capture.isOpened():
+            logger.warning(f"Failed to open video: {self.path}")
+            self.capture = None
+            return False
+        return True
+
+    def isOpened(self) -> bool:
+        return self.capture is not None
+
+    def _read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.capture is None:
+            return False, None
+
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        return ok, frame
+
+    def release(self) -> None:
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def __repr__(self) -> str:
+        return f"VideoFileSource({self.path})"
+
+
+class ImageFolderSource(FrameSource):
+    """Images of a directory in sorted order, cycled."""
+
+    name = 'images'
+
+    def __init__(self, directory: Path, fps: float = 0.0, size: Optional[Tuple[int, int]] = None, loop: bool = True):
+        """
+        Initialize image folder source.
+
+        Args:
+            directory: Directory searched recursively for images
+            fps: Fixed output rate (0 = unpaced)
+            size: Output (width, height); None keeps each image's size
+            loop: Cycle through the images instead of stopping after the last
+        """
+        super().__init__(fps=fps, size=size)
+        self.directory = Path(directory)
+        self.loop = loop
+        self.paths: List[Path] = []
+        self._index = 0
+
+    def open(self) -> bool:
+        self.paths = sorted(collect_image_paths(self.directory))
+        if not self.paths:
+            logger.warning(f"No images found in {self.directory}")
+            return False
+        return True
+
+    def isOpened(self) -> bool:
+        return bool(self.paths)
+
+    def _read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        # Skip unreadable files, but give up after one full pass
+        for _ in range(len(self.paths)):
+            if self._index >= len(self.paths):
+                if not self.loop:
+                    return False, None
+                self._index = 0
+
+            path = self.paths[self._index]
+            self._index += 1
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                return True, frame
+            logger.warning(f"Failed to load image: {path}")
+
+        return False, None
+
+    def __repr__(self) -> str:
+        return f"ImageFolderSource({self.directory})"
+
+
+class SyntheticSource(FrameSource):
+    """
+    Deterministic moving test pattern (gradients, shapes, sensor-like noise).
+
+    Frame `i` depends only on `seed` and `i`, so benchmark runs are reproducible.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 0.0, seed: int = 42):
+        """
+        Initialize synthetic source.
+
+        Args:
+            width: Frame width
+            height: Frame height
+            fps: Fixed output rate (0 = unpaced)
+            seed: Noise seed
+        """
+        super().__init__(fps=fps)
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self._ys, self._xs = np.mgrid[0:height, 0:width].astype(np.float32)
+
+    def _read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        i = self.frames_read
+        rng = np.random.default_rng((self.seed, i))
+        xs, ys = self._xs, self._ys
+
+        frame = np.empty((self.height, self.width, 3), dtype=np.float32)
+        frame[..., 0] = 128 + 100 * np.sin((xs + 4 * i) / 60.0)
+        frame[..., 1] = 128 + 100 * np.cos((ys - 3 * i) / 45.0)
+        frame[..., 2] = (xs + ys + 5 * i) % 256
+        frame += rng.normal(0, 6, frame.shape).astype(np.float32)
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+
+        center = (int(self.width / 2 + self.width / 4 * np.sin(i / 10.0)), self.height // 2)
+        cv2.circle(frame, center, self.height // 5, (40, 180, 220), -1)
+        cv2.rectangle(frame, (20, 20), (self.width // 3, self.height // 4), (200, 60, 60), -1)
+        return True, frame
+
+    def __repr__(self) -> str:
+        return f"SyntheticSource({self.width}x{self.height}, seed={self.seed})"
+
+
+def create_source(
+    spec: str,
+    width: int = 640,
+    height: int = 480,
+    fps: float = 0.0,
+    resize: bool = True
+) -> FrameSource:
+    """
+    Create a frame source from a command-line spec.
+
+    Specs: `camera[:N]`, `video:PATH`, `images:DIR`, `synthetic[:SEED]`.
+    A bare integer is a camera, a bare directory an image folder and a bare
+    file a video.
+
+    Args:
+        spec: Source spec
+        width: Output width (camera request / synthetic size / resize target)
+        height: Output height
+        fps: Fixed output rate for file and synthetic sources (0 = unpaced);
+            the capture rate for cameras
+        resize: Resize video and image frames to (width, height)
+
+    Returns:
+        Unopened source; call `open()` (or use it as a context manager)
+
+    Raises:
+        ValueError: If the spec is not recognised
+    """
+    size = (width, height) if resize else None
+
+    # Bare paths and device numbers first, so Windows drive letters are not split
+    if Path(spec).is_dir():
+        kind, arg = 'images', spec
+    elif Path(spec).is_file():
+        kind, arg = 'video', spec
+    elif spec.isdigit():
+        kind, arg = 'camera', spec
+    else:
+        kind, _, arg = spec.partition(':')
+
+    if kind == 'camera':
+        return CameraSource(device=int(arg or 0), width=width, height=height, fps=fps or 30.0)
+    if kind == 'video':
+        return VideoFileSource(Path(arg), fps=fps, size=size)
+    if kind == 'images':
+        return ImageFolderSource(Path(arg), fps=fps, size=size)
+    if kind == 'synthetic':
+        return SyntheticSource(width=width, height=height, fps=fps, seed=int(arg or 42))
+
+    raise ValueError(f"Unknown frame source: {spec} (expected camera[:N], video:PATH, images:DIR or synthetic[:SEED])")
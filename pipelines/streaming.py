@@ -0,0 +1,686 @@
+"""
+Server-side streaming helpers for the UDP overlay server.
+Handles per-client stream profiles, client liveness, the recent-frame cache
+used for selective retransmission (NACK), token-bucket packet pacing,
+multicast sockets, frame scheduling, duplicate-frame detection and latency
+histograms.
+"""
+
+import ipaddress
+import json
+import math
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .encoders import CODEC_IDS
+from .protocol import parse_header
+from .utils import logger
+
+
+class StreamProfile(NamedTuple):
+    """Output resolution, quality and codec a client receives."""
+    width: int
+    quality: int
+    codec: str = 'jpeg'
+
+
+def parse_profile(
+    payload: str,
+    default: StreamProfile,
+    max_width: Optional[int] = None
+) -> StreamProfile:
+    """
+    Parse the JSON part of a `REGISTER:{"w":320,"q":30,"codec":"webp"}` message.
+
+    Missing keys fall back to `default`; values are clamped to sane ranges.
+
+    Raises:
+        ValueError: If the payload is not a JSON object, has a non-numeric or
+                    non-finite width/quality, or names an unknown codec
+    """
+    data = json.loads(payload) if payload else {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Profile must be a JSON object: {payload}")
+
+    try:
+        width = int(data.get('w', default.width))
+        quality = int(data.get('q', default.quality))
+    except (TypeError, OverflowError) as e:
+        # e.g. {"w": null} or {"w": 1e400}; callers fall back to the default profile on ValueError
+        raise ValueError(f"Invalid profile size or quality: {payload}") from e
+    codec = str(data.get('codec', default.codec))
+    if codec not in CODEC_IDS:
+        raise ValueError(f"Unknown codec: {codec}")
+
+    width = max(64, width)
+    if max_width is not None:
+        width = min(width, max_width)
+    quality = min(100, max(1, quality))
+
+    return StreamProfile(width=width, quality=quality, codec=codec)
+
+
+def parse_declared_bandwidth(payload: str) -> Optional[float]:
+    """Read the optional `"kbps"` field of a REGISTER profile payload (None if absent or invalid)."""
+    try:
+        data = json.loads(payload) if payload else {}
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or 'kbps' not in data:
+        return None
+    try:
+        kbps = float(data['kbps'])
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(kbps):
+        return None
+    return max(0.0, kbps)
+
+
+def group_by_profile(
+    client_profiles: Dict[Hashable, StreamProfile],
+    clients: Iterable[Hashable],
+    default: StreamProfile
+) -> Dict[StreamProfile, List[Hashable]]:
+    """Group client addresses by profile so each profile is encoded once per frame."""
+    groups: Dict[StreamProfile, List[Hashable]] = {}
+    for addr in clients:
+        groups.setdefault(client_profiles.get(addr, default), []).append(addr)
+    return groups
+
+
+def _check_multicast_group(group: str) -> None:
+    address = ipaddress.ip_address(group)
+    if address.version != 4 or not address.is_multicast:
+        raise ValueError(f"Not an IPv4 multicast address: {group}")
+
+
+def open_multicast_sender(
+    group: str,
+    ttl: int = 1,
+    interface: Optional[str] = None,
+    loop: bool = True
+) -> socket.socket:
+    """
+    Create a UDP socket for sending to an IPv4 multicast group.
+
+    Args:
+        group: Multicast group address (e.g. 239.255.0.1), validated only
+        ttl: Multicast TTL / hop limit (1 = local subnet)
+        interface: Local interface address to send from (None = routing default)
+        loop: Deliver to receivers on this host too (needed for loopback tests)
+
+    Raises:
+        ValueError: If `group` is not an IPv4 multicast address
+    """
+    _check_multicast_group(group)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1 if loop else 0)
+    if interface:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 655360)
+    return sock
+
+
+def open_multicast_receiver(group: str, port: int, interface: str = '0.0.0.0') -> socket.socket:
+    """
+    Create a UDP socket bound to `port` that has joined a multicast group.
+
+    Raises:
+        ValueError: If `group` is not an IPv4 multicast address
+    """
+    _check_multicast_group(group)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('', port))
+    membership = struct.pack('4s4s', socket.inet_aton(group), socket.inet_aton(interface))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    return sock
+
+
+class ClientLiveness:
+    """Last-seen times and traffic counters used to evict silent clients."""
+
+    def __init__(self, timeout: float = 10.0):
+        """
+        Initialize liveness tracker.
+
+        Args:
+            timeout: Seconds without any message before a client is dead (0 = never)
+        """
+        self.timeout = timeout
+        self._clients: Dict[Hashable, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, addr: Hashable) -> None:
+        """Record that a message (PING, NACK, command...) arrived from `addr`."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.setdefault(addr, {'connected': now, 'last_seen': now, 'bytes_sent': 0})
+            entry['last_seen'] = now
+
+    def add_bytes(self, addr: Hashable, n_bytes: int) -> None:
+        with self._lock:
+            entry = self._clients.get(addr)
+            if entry is not None:
+                entry['bytes_sent'] += n_bytes
+
+    def remove(self, addr: Hashable) -> None:
+        with self._lock:
+            self._clients.pop(addr, None)
+
+    def expired(self) -> List[Hashable]:
+        """Clients not heard from within the timeout."""
+        if self.timeout <= 0:
+            return []
+        deadline = time.monotonic() - self.timeout
+        with self._lock:
+            return [addr for addr, entry in self._clients.items() if entry['last_seen'] < deadline]
+
+    def report(self) -> List[Dict]:
+        """Per-client age, time since last message and bytes sent."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'addr': f"{addr[0]}:{addr[1]}" if isinstance(addr, tuple) else str(addr),
+                    'connected_s': round(now - entry['connected'], 1),
+                    'last_seen_s': round(now - entry['last_seen'], 1),
+                    'bytes_sent': int(entry['bytes_sent'])
+                }
+                for addr, entry in self._clients.items()
+            ]
+
+
+class FrameCache:
+    """Ring buffer of recently sent frames, kept as packet lists for retransmission."""
+
+    def __init__(self, capacity: int = 8):
+        """
+        Initialize frame cache.
+
+        Args:
+            capacity: Number of most recent frames to keep
+        """
+        self.capacity = capacity
+        self._frames: "OrderedDict[Hashable, Tuple[float, Dict[int, bytes]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, packets: List[bytes]) -> None:
+        """
+        Store the datagrams of a sent frame, indexed by data packet index.
+
+        Parity packets are not cached; a NACK only ever names data packets.
+
+        Args:
+            key: Frame key (the sequence number)
+            packets: Datagrams as sent
+        """
+        by_index = {}
+        for packet in packets:
+            header, _ = parse_header(packet)
+            if not header.is_parity:
+                by_index[header.index] = packet
+
+        with self._lock:
+            self._frames.pop(key, None)
+            self._frames[key] = (time.monotonic(), by_index)
+            while len(self._frames) > self.capacity:
+                self._frames.popitem(last=False)
+
+    def get(
+        self,
+        key: Hashable,
+        indices: List[int],
+        max_age: Optional[float] = None
+    ) -> Optional[List[bytes]]:
+        """
+        Look up cached packets for a retransmission request.
+
+        Args:
+            key: Frame key used in put()
+            indices: Requested data packet indices
+            max_age: Deadline in seconds since the frame was sent (None = no deadline)
+
+        Returns:
+            Requested packets (unknown indices skipped), or None if the frame was
+            evicted or its deadline has passed
+        """
+        with self._lock:
+            entry = self._frames.get(key)
+
+        if entry is None:
+            return None
+
+        sent_at, by_index = entry
+        if max_age is not None and time.monotonic() - sent_at > max_age:
+            return None
+
+        return [by_index[i] for i in indices if i in by_index]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+
+
+class TokenBucket:
+    """Byte-rate limiter; a rate of 0 means unlimited."""
+
+    def __init__(self, rate: float = 0.0, burst: float = 0.0):
+        """
+        Initialize token bucket.
+
+        Args:
+            rate: Refill rate in bytes per second (0 = unlimited)
+            burst: Bucket capacity in bytes
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def consume(self, n_bytes: int, now: Optional[float] = None) -> bool:
+        """
+        Take `n_bytes` tokens if available.
+
+        A packet larger than the bucket is allowed once the bucket is full and
+        leaves it in debt, so oversized packets never stall forever.
+        """
+        if self.rate <= 0:
+            return True
+
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= min(n_bytes, self.burst):
+            self.tokens -= n_bytes
+            return True
+        return False
+
+    def wait_time(self, n_bytes: int) -> float:
+        """Seconds until `n_bytes` tokens are available."""
+        if self.rate <= 0:
+            return 0.0
+        return max(0.0, (min(n_bytes, self.burst) - self.tokens) / self.rate)
+
+
+class _ClientQueue:
+    """Pending packets and counters for one paced client."""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.packets: deque = deque()  # (due, expires, packet)
+        self.stats = {'queued': 0, 'sent': 0, 'dropped': 0}
+
+
+class PacedSender:
+    """
+    Background sender that spreads each frame's packets over a time window.
+
+    Every client has its own queue and token bucket. When a new frame is
+    queued for a client, packets of its previous frame that have not gone out
+    yet are dropped, so an overloaded link skips frames instead of bursting.
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        default_kbps: float = 0.0,
+        burst_seconds: float = 0.005,
+        min_burst_bytes: int = 2 * 1500,
+        on_error: Optional[Callable[[Hashable, Exception], None]] = None,
+        on_sent: Optional[Callable[[Hashable, int], None]] = None
+    ):
+        """
+        Initialize paced sender.
+
+        Args:
+            sock: UDP socket used for sending
+            default_kbps: Bandwidth for clients that declared none (0 = unlimited)
+            burst_seconds: Bucket capacity expressed as seconds of traffic
+            min_burst_bytes: Lower bound on bucket capacity
+            on_error: Called with (addr, exception) when a send fails
+            on_sent: Called with (addr, n_bytes) after each successful send
+        """
+        self.sock = sock
+        self.default_kbps = default_kbps
+        self.burst_seconds = burst_seconds
+        self.min_burst_bytes = min_burst_bytes
+        self.on_error = on_error
+        self.on_sent = on_sent
+
+        self._clients: Dict[Hashable, _ClientQueue] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+    def _make_bucket(self, kbps: float) -> TokenBucket:
+        rate = kbps * 1000.0 / 8.0
+        return TokenBucket(rate=rate, burst=max(self.min_burst_bytes, rate * self.burst_seconds))
+
+    def _client(self, addr: Hashable) -> _ClientQueue:
+        if addr not in self._clients:
+            self._clients[addr] = _ClientQueue(self._make_bucket(self.default_kbps))
+        return self._clients[addr]
+
+    def set_rate(self, addr: Hashable, kbps: float) -> None:
+        """Set a client's declared or measured bandwidth in kbit/s (0 = unlimited)."""
+        with self._cond:
+            self._client(addr).bucket = self._make_bucket(kbps)
+
+    def remove(self, addr: Hashable) -> Optional[Dict[str, int]]:
+        """Forget a client, returning its final counters."""
+        with self._cond:
+            client = self._clients.pop(addr, None)
+        return client.stats if client else None
+
+    def stats(self, addr: Hashable) -> Dict[str, int]:
+        with self._cond:
+            client = self._clients.get(addr)
+            return dict(client.stats) if client else {'queued': 0, 'sent': 0, 'dropped': 0}
+
+    def enqueue(self, addr: Hashable, packets: List[bytes], window: float, expires_after: float) -> None:
+        """
+        Queue one frame's packets for a client.
+
+        Args:
+            addr: Client address
+            packets: Datagrams of the frame in send order
+            window: Seconds over which the packets are spread
+            expires_after: Seconds after which unsent packets are dropped
+        """
+        now = time.monotonic()
+        step = window / len(packets) if packets else 0.0
+
+        with self._cond:
+            client = self._client(addr)
+            client.stats['dropped'] += len(client.packets)
+            client.packets.clear()
+
+            for i, packet in enumerate(packets):
+                client.packets.append((now + i * step, now + expires_after, packet))
+            client.stats['queued'] += len(packets)
+            self._cond.notify()
+
+    def start(self) -> None:
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    def _collect_due(self, now: float) -> Tuple[List[Tuple[Hashable, bytes]], Optional[float]]:
+        """Pop every packet that is due and within its client's budget."""
+        sends = []
+        next_wake = None
+
+        for addr, client in self._clients.items():
+            while client.packets:
+                due, expires, packet = client.packets[0]
+                if expires < now:
+                    client.packets.popleft()
+                    client.stats['dropped'] += 1
+                    continue
+
+                if due > now:
+                    wake = due
+                elif not client.bucket.consume(len(packet), now):
+                    wake = now + client.bucket.wait_time(len(packet))
+                else:
+                    client.packets.popleft()
+                    client.stats['sent'] += 1
+                    sends.append((addr, packet))
+                    continue
+
+                next_wake = wake if next_wake is None else min(next_wake, wake)
+                break
+
+        return sends, next_wake
+
+    def _run(self) -> None:
+        while self.running:
+            with self._cond:
+                now = time.monotonic()
+                sends, next_wake = self._collect_due(now)
+                if not sends:
+                    timeout = 0.1 if next_wake is None else max(0.0, next_wake - now)
+                    self._cond.wait(timeout=timeout)
+                    continue
+
+            for addr, packet in sends:
+                try:
+                    self.sock.sendto(packet, addr)
+                except OSError as e:
+                    logger.debug(f"Paced send to {addr} failed: {e}")
+                    with self._cond:
+                        client = self._clients.get(addr)
+                        if client:
+                            client.stats['sent'] -= 1
+                            client.stats['dropped'] += 1
+                    if self.on_error:
+                        self.on_error(addr, e)
+                    continue
+                if self.on_sent:
+                    self.on_sent(addr, len(packet))
+
+
+class FrameScheduler:
+    """
+    Fixed-rate frame clock driven by `time.monotonic()` deadlines.
+
+    Deadlines are spaced exactly one interval apart, so sleep overshoot does
+    not accumulate into drift. When processing overruns a whole interval the
+    missed slots are skipped rather than sent back-to-back.
+    """
+
+    def __init__(self, fps: float, history: int = 300):
+        """
+        Initialize scheduler.
+
+        Args:
+            fps: Target frame rate
+            history: Number of recent frame intervals kept for statistics
+        """
+        self.fps = fps
+        self.interval = 1.0 / fps
+        self._intervals: deque = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._deadline: Optional[float] = None
+        self._last_tick: Optional[float] = None
+        self.frames = 0
+        self.skipped = 0
+
+    def reset(self) -> None:
+        """Restart the clock after a pause, keeping counters and history."""
+        self._deadline = None
+        self._last_tick = None
+
+    def wait(self) -> float:
+        """
+        Sleep until the next frame deadline.
+
+        Returns:
+            Monotonic time of this tick
+        """
+        now = time.monotonic()
+        if self._deadline is None:
+            self._deadline = now
+
+        remaining = self._deadline - now
+        if remaining > 0:
+            time.sleep(remaining)
+            now = time.monotonic()
+
+        with self._lock:
+            if self._last_tick is not None:
+                self._intervals.append(now - self._last_tick)
+            self._last_tick = now
+            self.frames += 1
+
+        self._deadline += self.interval
+        if now > self._deadline:
+            missed = math.floor((now - self._deadline) / self.interval) + 1
+            self._deadline += missed * self.interval
+            self.skipped += missed
+
+        return now
+
+    def stats(self) -> Dict[str, float]:
+        """Achieved FPS and frame-interval jitter percentiles (ms) over the recent history."""
+        with self._lock:
+            intervals = np.array(self._intervals, dtype=np.float64)
+
+        result = {
+            'target_fps': self.fps,
+            'fps': 0.0,
+            'jitter_p50_ms': 0.0,
+            'jitter_p95_ms': 0.0,
+            'jitter_p99_ms': 0.0,
+            'frames': self.frames,
+            'skipped': self.skipped
+        }
+        if len(intervals) == 0:
+            return result
+
+        jitter_ms = np.abs(intervals - self.interval) * 1000.0
+        p50, p95, p99 = np.percentile(jitter_ms, [50, 95, 99])
+        result.update({
+            'fps': round(float(1.0 / intervals.mean()), 2),
+            'jitter_p50_ms': round(float(p50), 2),
+            'jitter_p95_ms': round(float(p95), 2),
+            'jitter_p99_ms': round(float(p99), 2)
+        })
+        return result
+
+
+class FrameChangeDetector:
+    """
+    Decides whether a composited frame can be sent as a repeat of the last full frame.
+
+    Frames are compared by a small grayscale signature (area-downsampled, so
+    sensor noise averages out). A frame repeats the reference when no signature
+    cell moved by more than `threshold` grey levels. The reference is the last
+    frame sent in full, so slow drift still triggers a new frame. A full
+    keyframe is forced every `keyframe_interval` seconds and on request.
+    """
+
+    def __init__(self, threshold: float = 4.0, keyframe_interval: float = 2.0, size: Tuple[int, int] = (32, 24)):
+        """
+        Initialize change detector.
+
+        Args:
+            threshold: Largest per-cell grey-level change still counted as unchanged
+            keyframe_interval: Longest time between full frames in seconds
+            size: Signature (width, height)
+        """
+        self.threshold = threshold
+        self.keyframe_interval = keyframe_interval
+        self.size = size
+        self._reference: Optional[np.ndarray] = None
+        self._last_keyframe = 0.0
+        self.repeated = 0
+        self.keyframes = 0
+
+    def signature(self, frame: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def force_keyframe(self) -> None:
+        """Send the next frame in full (new client, or a client missing the reference)."""
+        self._reference = None
+
+    def is_repeat(self, frame: np.ndarray, now: float) -> bool:
+        """
+        Check a frame against the last full frame; a changed frame becomes the new reference.
+
+        Args:
+            frame: Composited BGR frame
+            now: Monotonic time
+
+        Returns:
+            True if the frame may be sent as a repeat packet
+        """
+        signature = self.signature(frame)
+        if (self._reference is not None
+                and signature.shape == self._reference.shape
+                and now - self._last_keyframe < self.keyframe_interval
+                and np.abs(signature - self._reference).max() <= self.threshold):
+            self.repeated += 1
+            return True
+
+        self._reference = signature
+        self._last_keyframe = now
+        self.keyframes += 1
+        return False
+
+
+# Latency histogram bucket upper bounds in ms (plus one open-ended bucket)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class LatencyStats:
+    """Per-stage latency histograms, with recent samples kept for percentiles."""
+
+    def __init__(self, history: int = 1000):
+        """
+        Initialize latency statistics.
+
+        Args:
+            history: Recent samples kept per stage for percentiles
+        """
+        self.history = history
+        self._counts: Dict[str, List[int]] = {}
+        self._recent: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, ms: float) -> None:
+        """Add one sample (in milliseconds) to a stage."""
+        bucket = next(
+            (i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound),
+            len(LATENCY_BUCKETS_MS)
+        )
+        with self._lock:
+            if stage not in self._counts:
+                self._counts[stage] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                self._recent[stage] = deque(maxlen=self.history)
+            self._counts[stage][bucket] += 1
+            self._recent[stage].append(ms)
+
+    def report(self) -> Dict[str, Dict]:
+        """Count, percentiles of recent samples and full histogram per stage."""
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+
+        with self._lock:
+            snapshot = {
+                stage: (list(counts), np.array(self._recent[stage], dtype=np.float64))
+                for stage, counts in self._counts.items()
+            }
+
+        result = {}
+        for stage, (counts, recent) in snapshot.items():
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+            result[stage] = {
+                'count': sum(counts),
+                'p50_ms': round(float(p50), 2),
+                'p95_ms': round(float(p95), 2),
+                'p99_ms': round(float(p99), 2),
+                'histogram': dict(zip(labels, counts))
+            }
+        return result
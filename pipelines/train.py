@@ -4,26 +4,133 @@ Supports LinearSVC and RBF SVM with cross-validation and comprehensive metrics.
 """
 
 import json
+import re
+import shutil
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import cv2
 import joblib
 import numpy as np
+from scipy.stats import loguniform
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingGridSearchCV)
+from sklearn.kernel_approximation import Nystroem, RBFSampler
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
     confusion_matrix, roc_auc_score, average_precision_score,
     precision_recall_curve, roc_curve
 )
-from sklearn.model_selection import GridSearchCV
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, RandomizedSearchCV
 from sklearn.svm import LinearSVC, SVC
 from tqdm import tqdm
 
-from .dataset import DatasetManager
-from .features import FeaturePipeline
+from .dataset import DatasetManager, ImageStream
+from .descriptor_cache import DescriptorCache
+from .feature_store import FeatureStore, codebook_settings
+from .features import FeaturePipeline, HOGFeaturePipeline, load_feature_pipeline
 from .utils import logger, plot_confusion_matrix, plot_pr_curve, plot_roc_curve
 
 
+SEARCH_STRATEGIES = ('grid', 'halving', 'random')
+
+# svm_type values backed by KernelApproxSVC
+KERNEL_MAPS = ('nystroem', 'rff')
+
+
+class KernelApproxSVC(ClassifierMixin, BaseEstimator):
+    """
+    Linear SVM on an explicit approximation of the RBF kernel feature map.
+    
+    'nystroem' maps a sample to its (whitened) kernel values against
+    `n_components` training samples; 'rff' uses random Fourier features. After
+    fit() only NumPy arrays are kept, with the map's output weights folded into
+    the linear weights, so a decision is one matrix multiply for the map and one
+    dot product. Unlike SVC, the cost does not grow with the support vectors.
+    """
+    
+    def __init__(
+        self,
+        kernel_map: str = 'nystroem',
+        n_components: int = 256,
+        gamma: Any = 'scale',
+        C: float = 1.0,
+        random_state: int = 42
+    ):
+        """
+        Initialize kernel-approximation SVM.
+        
+        Args:
+            kernel_map: 'nystroem' or 'rff'
+            n_components: Dimension of the approximate feature map
+            gamma: RBF gamma, or 'scale'/'auto' as in SVC
+            C: Regularization of the linear SVM
+            random_state: Random seed for the map
+        """
+        self.kernel_map = kernel_map
+        self.n_components = n_components
+        self.gamma = gamma
+        self.C = C
+        self.random_state = random_state
+    
+    def _resolve_gamma(self, X: np.ndarray) -> float:
+        if self.gamma == 'scale':
+            variance = X.var()
+            return 1.0 / (X.shape[1] * variance) if variance > 0 else 1.0
+        if self.gamma == 'auto':
+            return 1.0 / X.shape[1]
+        return float(self.gamma)
+    
+    def fit(self, X: np.ndarray, y: np.ndarray) -> 'KernelApproxSVC':
+        X = np.asarray(X, dtype=np.float64)
+        gamma = self._resolve_gamma(X)
+        
+        if self.kernel_map == 'nystroem':
+            feature_map = Nystroem(
+                kernel='rbf', gamma=gamma,
+                n_components=min(self.n_components, X.shape[0]),
+                random_state=self.random_state
+            )
+        elif self.kernel_map == 'rff':
+            feature_map = RBFSampler(gamma=gamma, n_components=self.n_components, random_state=self.random_state)
+        else:
+            raise ValueError(f"Unknown kernel map: {self.kernel_map} (expected one of {KERNEL_MAPS})")
+        
+        linear = LinearSVC(C=self.C, dual=False, max_iter=2000, random_state=self.random_state)
+        linear.fit(feature_map.fit_transform(X), y)
+        coef = linear.coef_[0]
+        
+        self.classes_ = linear.classes_
+        self.gamma_ = gamma
+        self.intercept_ = float(linear.intercept_[0])
+        if self.kernel_map == 'nystroem':
+            # map(X) = K(X, components) @ normalization.T
+            self.basis_ = feature_map.components_
+            self.basis_sq_norms_ = np.einsum('ij,ij->i', self.basis_, self.basis_)
+            self.weights_ = feature_map.normalization_.T @ coef
+        else:
+            # map(X) = sqrt(2 / m) * cos(X @ W + offset)
+            self.basis_ = feature_map.random_weights_
+            self.offset_ = feature_map.random_offset_
+            self.weights_ = coef * np.sqrt(2.0 / self.n_components)
+        return self
+    
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if self.kernel_map == 'nystroem':
+            sq_dists = np.einsum('ij,ij->i', X, X)[:, None] + self.basis_sq_norms_[None, :] - 2.0 * (X @ self.basis_.T)
+            mapped = np.exp(-self.gamma_ * np.maximum(sq_dists, 0.0))
+        else:
+            mapped = np.cos(X @ self.basis_ + self.offset_)
+        return mapped @ self.weights_ + self.intercept_
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
 class SVMTrainer:
     """SVM trainer with hyperparameter tuning."""
     
@@ -31,21 +138,38 @@ class SVMTrainer:
         self,
         svm_type: str = 'linear',
         random_state: int = 42,
-        n_jobs: int = -1
+        n_jobs: int = -1,
+        search: str = 'grid',
+        n_iter: int = 10
     ):
         """
         Initialize SVM trainer.
         
         Args:
-            svm_type: 'linear' or 'rbf'
+            svm_type: 'linear', 'rbf', or 'nystroem'/'rff' (linear SVM on an
+                      approximate RBF feature map, see KernelApproxSVC)
             random_state: Random seed
             n_jobs: Number of parallel jobs (-1 = all cores)
+            search: Hyperparameter search strategy: 'grid' (every candidate on
+                    every fold), 'halving' (successive halving: all candidates on
+                    a subsample, the best third on 3x the samples, ...) or
+                    'random' (`n_iter` sampled candidates)
+            n_iter: Candidates tried by 'random' search
         """
+        if search not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {search} (expected one of {SEARCH_STRATEGIES})")
+        
         self.svm_type = svm_type
         self.random_state = random_state
         self.n_jobs = n_jobs
+        self.search = search
+        self.n_iter = n_iter
+        self.search_report: Dict[str, Any] = {}
         self.model = None
         self.best_params = None
+        self.n_train_samples = None
+        self.updates: List[Dict[str, Any]] = []  # Incremental updates applied since train()
+        self.version = 0  # 0 = the model from train(), N = svm_face_<type>_vN.pkl
     
     def train(
         self,
@@ -83,41 +207,173 @@ class SVMTrainer:
                 }
         
         elif self.svm_type == 'rbf':
+            # No probability estimates during search (probability=True would run an
+            # internal 5-fold Platt calibration for every candidate and fold)
             base_model = SVC(
                 kernel='rbf',
                 random_state=self.random_state,
-                probability=True,  # Enable probability estimates
                 cache_size=500
             )
             
             # Default param grid for RBF SVM
             if param_grid is None:
-                param_grid = {
-                    'C': [0.1, 1.0, 10.0, 100.0],
-                    'gamma': ['scale', 'auto', 0.001, 0.01, 0.1]
-                }
+                if self.search == 'random':
+                    param_grid = {
+                        'C': loguniform(0.1, 100.0),
+                        'gamma': loguniform(1e-4, 1e-1)
+                    }
+                else:
+                    param_grid = {
+                        'C': [0.1, 1.0, 10.0, 100.0],
+                        'gamma': ['scale', 'auto', 0.001, 0.01, 0.1]
+                    }
+        
+        elif self.svm_type in KERNEL_MAPS:
+            base_model = KernelApproxSVC(kernel_map=self.svm_type, random_state=self.random_state)
+            
+            # Default param grid for kernel-approximation SVMs
+            if param_grid is None:
+                if self.search == 'random':
+                    param_grid = {
+                        'C': loguniform(0.1, 100.0),
+                        'gamma': loguniform(1e-4, 1e-1)
+                    }
+                else:
+                    param_grid = {
+                        'C': [0.1, 1.0, 10.0, 100.0],
+                        'gamma': ['scale', 0.001, 0.01, 0.1]
+                    }
         
         else:
             raise ValueError(f"Unknown SVM type: {self.svm_type}")
         
-        # Grid search with cross-validation
-        grid_search = GridSearchCV(
-            base_model,
-            param_grid,
-            cv=cv,
-            scoring='f1',
-            n_jobs=self.n_jobs,
-            verbose=2 if verbose else 0
-        )
+        # Hyperparameter search with cross-validation
+        search_options = dict(cv=cv, scoring='f1', n_jobs=self.n_jobs, verbose=2 if verbose else 0)
+        if self.search == 'halving':
+            searcher = HalvingGridSearchCV(
+                base_model, param_grid, factor=3, random_state=self.random_state, **search_options
+            )
+        elif self.search == 'random':
+            searcher = RandomizedSearchCV(
+                base_model, param_grid, n_iter=self.n_iter, random_state=self.random_state, **search_options
+            )
+        else:
+            searcher = GridSearchCV(base_model, param_grid, **search_options)
         
-        grid_search.fit(X_train, y_train)
+        search_start = time.perf_counter()
+        searcher.fit(X_train, y_train)
+        search_seconds = time.perf_counter() - search_start
         
         # Store best model and parameters
-        self.model = grid_search.best_estimator_
-        self.best_params = grid_search.best_params_
+        self.model = searcher.best_estimator_
+        self.best_params = searcher.best_params_
+        self.n_train_samples = int(X_train.shape[0])
+        self.updates = []
+        self.version = 0
+        
+        # Calibrate probabilities once, on the final model only
+        calibration_seconds = 0.0
+        if self.svm_type == 'rbf':
+            # Platt scaling with internal CV, then one SVC refit on all data (what probability=True did)
+            calibration_start = time.perf_counter()
+            self.model = CalibratedClassifierCV(
+                self.model, method='sigmoid', cv=cv, ensemble=False, n_jobs=self.n_jobs
+            ).fit(X_train, y_train)
+            calibration_seconds = time.perf_counter() - calibration_start
+        
+        self.search_report = {
+            'strategy': self.search,
+            # Halving lists a candidate once per round it took part in
+            'candidates': len(searcher.cv_results_['params']),
+            'fits': len(searcher.cv_results_['params']) * cv,
+            'best_cv_f1': float(searcher.best_score_),
+            'search_seconds': round(search_seconds, 3),
+            'calibration_seconds': round(calibration_seconds, 3)
+        }
         
         logger.info(f"Best parameters: {self.best_params}")
-        logger.info(f"Best CV F1 score: {grid_search.best_score_:.4f}")
+        logger.info(f"Best CV F1 score: {searcher.best_score_:.4f}")
+        logger.info(f"{self.search.capitalize()} search: {self.search_report['candidates']} candidates in "
+                    f"{search_seconds:.1f}s, calibration {calibration_seconds:.1f}s")
+    
+    def update(
+        self,
+        X_new: np.ndarray,
+        y_new: np.ndarray,
+        epochs: int = 5,
+        eta0: float = 0.01,
+        X_replay: Optional[np.ndarray] = None,
+        y_replay: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """
+        Absorb a new labelled batch without retraining from scratch.
+        
+        The first update turns the LinearSVC into an SGDClassifier starting from
+        the same weights; each update then runs `epochs` passes of `partial_fit`.
+        The SGD objective is the LinearSVC one divided by C * n_train_samples
+        (squared hinge loss, alpha = 1 / (C * n_train_samples)), except that
+        liblinear also penalizes the intercept, so the warm start is close to,
+        not exactly at, the SGD optimum. The step size decays from `eta0`, so a
+        small batch moves the boundary without discarding it. Features must be
+        scaled with the scaler the model was trained with.
+        
+        Args:
+            X_new: Scaled features of the new samples
+            y_new: Labels of the new samples (a single class is fine, e.g. hard negatives)
+            epochs: Passes over the batch
+            eta0: Initial step size
+            X_replay: Optional scaled samples of the original training data, mixed in
+                      so the model does not drift towards the new batch only
+            y_replay: Labels of X_replay
+        
+        Returns:
+            Update record (samples, epochs, seconds, ...), also kept in `updates`
+        """
+        if self.model is None:
+            raise ValueError("Model not trained")
+        if self.svm_type != 'linear':
+            raise ValueError(f"Incremental updates need a linear model, not {self.svm_type}")
+        
+        start = time.perf_counter()
+        X, y = X_new, np.asarray(y_new)
+        if X_replay is not None and len(X_replay):
+            X = np.vstack([X_replay, X_new])
+            y = np.concatenate([y_replay, y])
+        
+        X = np.asarray(X, dtype=np.float64)  # SGD needs the dtype of the float64 LinearSVC weights
+        
+        if not isinstance(self.model, SGDClassifier):
+            C = (self.best_params or {}).get('C', 1.0)
+            sgd = SGDClassifier(
+                loss='squared_hinge',  # LinearSVC's default loss
+                alpha=1.0 / (C * (self.n_train_samples or X.shape[0])),
+                learning_rate='invscaling',  # 'optimal' starts with steps large enough to undo the warm start
+                eta0=eta0,
+                random_state=self.random_state
+            )
+            # partial_fit keeps existing weights, so this warm-starts from the LinearSVC solution
+            sgd.coef_ = self.model.coef_.copy()
+            sgd.intercept_ = self.model.intercept_.copy()
+            classes = self.model.classes_
+            self.model = sgd
+        else:
+            classes = self.model.classes_
+        
+        for _ in range(epochs):
+            self.model.partial_fit(X, y, classes=classes)
+        
+        record = {
+            'samples': int(len(y_new)),
+            'positives': int(np.sum(np.asarray(y_new) == 1)),
+            'replay_samples': int(0 if X_replay is None else len(X_replay)),
+            'epochs': epochs,
+            'seconds': round(time.perf_counter() - start, 4),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        self.updates.append(record)
+        logger.info(f"Updated model with {record['samples']} samples "
+                    f"({record['replay_samples']} replayed) in {record['seconds']:.3f}s")
+        return record
     
     def predict(self, X: np.ndarray) -> np.ndarray:
         """Predict class labels."""
@@ -130,13 +386,13 @@ class SVMTrainer:
         Predict class probabilities.
         
         For LinearSVC, use decision_function as proxy.
-        For SVC with probability=True, use predict_proba.
+        For calibrated RBF SVMs (or SVC with probability=True), use predict_proba.
         """
         if self.model is None:
             raise ValueError("Model not trained")
         
         if hasattr(self.model, 'predict_proba'):
-            # SVC with probability
+            # Calibrated SVC
             proba = self.model.predict_proba(X)
             return proba[:, 1]  # Probability of positive class
         else:
@@ -150,6 +406,9 @@ class SVMTrainer:
         """Get decision function scores."""
         if self.model is None:
             raise ValueError("Model not trained")
+        if isinstance(self.model, CalibratedClassifierCV):
+            # Uncalibrated margin of the SVC refitted on all data (ensemble=False)
+            return self.model.calibrated_classifiers_[0].estimator.decision_function(X)
         return self.model.decision_function(X)
     
     def save(self, path: Path) -> None:
@@ -165,11 +424,34 @@ class SVMTrainer:
         meta_path = path.parent / f"{path.stem}_meta.json"
         meta = {
             'svm_type': self.svm_type,
-            'best_params': self.best_params
+            'best_params': self.best_params,
+            'n_train_samples': self.n_train_samples,
+            'search': self.search_report,
+            'version': self.version,
+            'updates': self.updates
         }
         with open(meta_path, 'w') as f:
             json.dump(meta, f, indent=2)
     
+    def save_version(self, model_path: Path) -> Path:
+        """
+        Save as the next version next to `model_path`
+        (models/svm_face_linear.pkl -> models/svm_face_linear_v3.pkl).
+        
+        Returns:
+            Path of the saved version
+        """
+        pattern = re.compile(rf"^{re.escape(model_path.stem)}_v(\d+)\.pkl$")
+        existing = [
+            int(match.group(1))
+            for match in (pattern.match(p.name) for p in model_path.parent.glob(f"{model_path.stem}_v*.pkl"))
+            if match
+        ]
+        self.version = max(existing, default=0) + 1
+        version_path = model_path.parent / f"{model_path.stem}_v{self.version}.pkl"
+        self.save(version_path)
+        return version_path
+    
     def load(self, path: Path) -> None:
         """Load trained model."""
         self.model = joblib.load(path)
@@ -182,6 +464,42 @@ class SVMTrainer:
                 meta = json.load(f)
             self.svm_type = meta.get('svm_type', 'linear')
             self.best_params = meta.get('best_params', {})
+            self.n_train_samples = meta.get('n_train_samples')
+            self.search_report = meta.get('search', {})
+            self.version = meta.get('version', 0)
+            self.updates = meta.get('updates', [])
+
+
+def compare_search_strategies(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    svm_type: str = 'rbf',
+    strategies: Tuple[str, ...] = SEARCH_STRATEGIES,
+    cv: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Train with each search strategy and report wall-clock time and validation F1.
+    
+    Returns:
+        One `search_report` per strategy, plus 'val_f1' and 'best_params'
+    """
+    reports = []
+    for strategy in strategies:
+        trainer = SVMTrainer(svm_type=svm_type, search=strategy)
+        trainer.train(X_train, y_train, cv=cv, verbose=False)
+        report = dict(trainer.search_report)
+        report['val_f1'] = float(f1_score(y_val, trainer.predict(X_val), zero_division=0))
+        report['best_params'] = trainer.best_params
+        reports.append(report)
+    
+    logger.info(f"{'Strategy':<10} {'Fits':>6} {'Search s':>9} {'Calib. s':>9} {'CV F1':>7} {'Val F1':>7}")
+    for report in reports:
+        logger.info(f"{report['strategy']:<10} {report['fits']:>6} {report['search_seconds']:>9.2f} "
+                    f"{report['calibration_seconds']:>9.2f} {report['best_cv_f1']:>7.4f} {report['val_f1']:>7.4f}")
+    
+    return reports
 
 
 class Evaluator:
@@ -230,6 +548,9 @@ class Evaluator:
             'average_precision': average_precision_score(y_true, y_scores)
         }
         
+        # Prediction latency, per candidate as in live validation and per sample in a batch
+        metrics.update(self.measure_latency(X))
+        
         # Confusion matrix
         cm = confusion_matrix(y_true, y_pred)
         metrics['confusion_matrix'] = cm.tolist()
@@ -246,6 +567,66 @@ class Evaluator:
         
         return metrics
     
+    def measure_latency(self, X: np.ndarray, samples: int = 200, repeats: int = 3) -> Dict[str, float]:
+        """
+        Time the trainer's decision_function.
+        
+        Returns:
+            'latency_us': median time for one sample (how FaceDetector validates
+            each candidate) and 'batch_latency_us': per-sample time for all of X
+        """
+        rows = X[:samples]
+        single = []
+        for row in rows:
+            row = row.reshape(1, -1)
+            start = time.perf_counter()
+            self.trainer.decision_function(row)
+            single.append(time.perf_counter() - start)
+        
+        batch = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            self.trainer.decision_function(X)
+            batch.append(time.perf_counter() - start)
+        
+        return {
+            'latency_us': float(np.median(single) * 1e6) if single else 0.0,
+            'batch_latency_us': float(min(batch) / max(1, X.shape[0]) * 1e6)
+        }
+    
+    def compare(
+        self,
+        trainers: Dict[str, SVMTrainer],
+        X: np.ndarray,
+        y_true: np.ndarray,
+        split_name: str = 'test'
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Evaluate several trained models on the same split and keep an accuracy
+        and latency table under `<split_name>_comparison` in the report.
+        
+        Args:
+            trainers: Name -> trained SVM trainer (e.g. 'linear', 'rbf', 'nystroem')
+            X: Features
+            y_true: True labels
+            split_name: Name of dataset split
+        
+        Returns:
+            Name -> metrics (without the confusion matrix)
+        """
+        comparison = {}
+        for name, trainer in trainers.items():
+            metrics = Evaluator(trainer).evaluate(X, y_true, split_name=f"{split_name} ({name})")
+            comparison[name] = {key: value for key, value in metrics.items() if key != 'confusion_matrix'}
+        
+        logger.info(f"{'Model':<10} {'Accuracy':>9} {'F1':>7} {'ROC AUC':>8} {'us/sample':>10} {'us/batch row':>13}")
+        for name, metrics in comparison.items():
+            logger.info(f"{name:<10} {metrics['accuracy']:>9.4f} {metrics['f1']:>7.4f} {metrics['roc_auc']:>8.4f} "
+                        f"{metrics['latency_us']:>10.1f} {metrics['batch_latency_us']:>13.2f}")
+        
+        self.metrics[f'{split_name}_comparison'] = comparison
+        return comparison
+    
     def plot_metrics(
         self,
         X: np.ndarray,
@@ -300,26 +681,139 @@ class Evaluator:
         logger.info(f"Saved evaluation report to {output_path}")
 
 
+def _load_split_images(
+    split_data: List[Tuple[Path, int]],
+    split_name: str
+) -> Tuple[List[np.ndarray], List[int]]:
+    """Read a split's images into memory, skipping unreadable files."""
+    images = []
+    labels = []
+    
+    for img_path, label in tqdm(split_data, desc=f"Loading {split_name} images"):
+        img = cv2.imread(str(img_path))
+        if img is not None:
+            images.append(img)
+            labels.append(label)
+    
+    return images, labels
+
+
+def _descriptor_cache(
+    descriptor_cache_dir: Optional[Path],
+    feature_pipeline: Union[FeaturePipeline, HOGFeaturePipeline]
+) -> Optional[DescriptorCache]:
+    """Descriptor cache for an ORB/BoVW pipeline (HOG features have no descriptors to cache)."""
+    if descriptor_cache_dir is None:
+        return None
+    if isinstance(feature_pipeline, HOGFeaturePipeline):
+        logger.info("Descriptor cache not used with HOG features")
+        return None
+    return DescriptorCache(descriptor_cache_dir, feature_pipeline)
+
+
+def _split_features(
+    feature_pipeline: Union[FeaturePipeline, HOGFeaturePipeline],
+    split_data: List[Tuple[Path, int]],
+    split_name: str,
+    cache: Optional[DescriptorCache] = None,
+    stream_workers: int = 0,
+    feature_store: Optional[FeatureStore] = None,
+    build_codebook: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Features (BoVW or HOG) and labels of a split's readable images, building the codebook first if asked.
+    
+    Images come through the descriptor cache, a prefetching ImageStream
+    (`stream_workers` > 0), or are all loaded into memory up front. With a
+    feature store, features already computed for this codebook and split are
+    memory-mapped instead of extracted.
+    """
+    stream = None
+    if cache is None and stream_workers > 0:
+        # Decoded ahead in threads, never holding the whole split (one pass per stage)
+        stream = ImageStream(split_data, feature_pipeline.target_size, workers=stream_workers)
+    
+    decode = 'gray' if stream is not None else 'bgr'
+    codebook_key = None
+    if build_codebook and feature_store is not None and isinstance(feature_pipeline, FeaturePipeline):
+        codebook_key = codebook_settings(feature_pipeline, split_data, decode)
+        if feature_store.load_codebook(feature_pipeline, codebook_key):
+            build_codebook = False
+    
+    descriptors_list = images = labels = None
+    if build_codebook:
+        if cache is not None:
+            # ORB descriptors are extracted once per image and shared by codebook and features
+            descriptors_list, kept = cache.load_or_extract([img_path for img_path, _ in split_data])
+            labels = [split_data[i][1] for i in kept]
+            logger.info(f"Building codebook from {len(descriptors_list)} images...")
+            feature_pipeline.fit_codebook(descriptors_list)
+        elif stream is not None:
+            feature_pipeline.build_codebook(stream, verbose=True)
+        else:
+            images, labels = _load_split_images(split_data, split_name)
+            feature_pipeline.build_codebook(images, verbose=True)
+        if codebook_key is not None:
+            feature_store.save_codebook(feature_pipeline, codebook_key)
+    
+    store_key = None
+    if feature_store is not None:
+        store_key = feature_store.key(feature_pipeline, split_data, decode=decode)
+        stored = feature_store.load(split_name, store_key)
+        if stored is not None:
+            return stored
+    
+    if cache is not None:
+        if descriptors_list is None:
+            descriptors_list, kept = cache.load_or_extract([img_path for img_path, _ in split_data])
+            labels = [split_data[i][1] for i in kept]
+        X = feature_pipeline.encode_descriptors(descriptors_list)
+    elif stream is not None:
+        X = feature_pipeline.extract_features_stream(stream, verbose=True)
+        labels = stream.labels
+    else:
+        if images is None:
+            images, labels = _load_split_images(split_data, split_name)
+        X = feature_pipeline.extract_features_batch(images, verbose=True)
+    
+    y = np.array(labels)
+    if feature_store is not None:
+        feature_store.save(split_name, store_key, X, y)
+    return X, y
+
+
 def train_pipeline(
     dataset_manager: DatasetManager,
-    feature_pipeline: FeaturePipeline,
+    feature_pipeline: Union[FeaturePipeline, HOGFeaturePipeline],
     svm_type: str = 'linear',
     param_grid: Dict[str, List[Any]] = None,
     output_dir: Path = Path('models'),
     report_dir: Path = Path('reports'),
-    cv: int = 5
+    cv: int = 5,
+    descriptor_cache_dir: Optional[Path] = None,
+    stream_workers: int = 0,
+    feature_store_dir: Optional[Path] = None,
+    search: str = 'grid'
 ) -> Tuple[SVMTrainer, Evaluator]:
     """
     Complete training pipeline.
     
     Args:
         dataset_manager: Dataset manager with splits
-        feature_pipeline: Feature extraction pipeline
-        svm_type: 'linear' or 'rbf'
+        feature_pipeline: Feature extraction pipeline (FeaturePipeline for ORB + BoVW,
+                          HOGFeaturePipeline for HOG; one pipeline per output_dir)
+        svm_type: 'linear', 'rbf', 'nystroem' or 'rff'
         param_grid: Hyperparameter grid
         output_dir: Output directory for models
         report_dir: Output directory for reports
         cv: Number of CV folds
+        descriptor_cache_dir: Reuse ORB descriptors cached here by earlier runs
+                              (None = extract from images every time)
+        stream_workers: Decode threads for streaming images instead of loading
+                        each split into memory (0 = load up front)
+        feature_store_dir: Reuse train/val feature matrices stored here for the
+                           same codebook and splits (None = always extract)
+        search: Hyperparameter search strategy ('grid', 'halving' or 'random')
     
     Returns:
         (trainer, evaluator) tuple
@@ -328,51 +822,33 @@ def train_pipeline(
     logger.info("TRAINING PIPELINE")
     logger.info("=" * 60)
     
-    # Load training data
+    cache = _descriptor_cache(descriptor_cache_dir, feature_pipeline)
+    feature_store = FeatureStore(feature_store_dir) if feature_store_dir else None
+    
+    # Load training data, build codebook and extract features
     train_data = dataset_manager.get_split_data('train')
     logger.info(f"Loading {len(train_data)} training images...")
-    
-    train_images = []
-    train_labels = []
-    
-    for img_path, label in tqdm(train_data, desc="Loading train images"):
-        img = cv2.imread(str(img_path))
-        if img is not None:
-            train_images.append(img)
-            train_labels.append(label)
-    
-    # Build codebook
-    feature_pipeline.build_codebook(train_images, verbose=True)
-    
-    # Extract features
-    logger.info("Extracting training features...")
-    X_train = feature_pipeline.extract_features_batch(train_images, verbose=True)
-    y_train = np.array(train_labels)
+    X_train, y_train = _split_features(
+        feature_pipeline, train_data, 'train',
+        cache=cache, stream_workers=stream_workers, feature_store=feature_store, build_codebook=True
+    )
     
     # Fit scaler
     feature_pipeline.fit_scaler(X_train)
     X_train = feature_pipeline.transform_scaler(X_train)
     
     # Train SVM
-    trainer = SVMTrainer(svm_type=svm_type)
+    trainer = SVMTrainer(svm_type=svm_type, search=search)
     trainer.train(X_train, y_train, param_grid=param_grid, cv=cv, verbose=True)
     
     # Evaluate on validation set
     val_data = dataset_manager.get_split_data('val')
     logger.info(f"\nLoading {len(val_data)} validation images...")
-    
-    val_images = []
-    val_labels = []
-    
-    for img_path, label in tqdm(val_data, desc="Loading val images"):
-        img = cv2.imread(str(img_path))
-        if img is not None:
-            val_images.append(img)
-            val_labels.append(label)
-    
-    X_val = feature_pipeline.extract_features_batch(val_images, verbose=True)
+    X_val, y_val = _split_features(
+        feature_pipeline, val_data, 'val',
+        cache=cache, stream_workers=stream_workers, feature_store=feature_store
+    )
     X_val = feature_pipeline.transform_scaler(X_val)
-    y_val = np.array(val_labels)
     
     # Evaluate
     evaluator = Evaluator(trainer)
@@ -389,9 +865,13 @@ def train_pipeline(
 
 def evaluate_pipeline(
     dataset_manager: DatasetManager,
-    feature_pipeline: FeaturePipeline,
+    feature_pipeline: Union[FeaturePipeline, HOGFeaturePipeline],
     trainer: SVMTrainer,
-    report_dir: Path = Path('reports')
+    report_dir: Path = Path('reports'),
+    descriptor_cache_dir: Optional[Path] = None,
+    stream_workers: int = 0,
+    feature_store_dir: Optional[Path] = None,
+    compare_with: Optional[Dict[str, SVMTrainer]] = None
 ) -> Evaluator:
     """
     Evaluate trained pipeline on test set.
@@ -401,6 +881,11 @@ def evaluate_pipeline(
         feature_pipeline: Trained feature pipeline
         trainer: Trained SVM trainer
         report_dir: Output directory for reports
+        descriptor_cache_dir: Reuse ORB descriptors cached here by earlier runs
+        stream_workers: Decode threads for streaming test images (0 = load up front)
+        feature_store_dir: Reuse the test feature matrix stored here for the same codebook and split
+        compare_with: Candidate models (name -> trainer on the same features) to compare against
+                      `trainer` as 'baseline'; the table is saved as `test_comparison` in the report
     
     Returns:
         Evaluator with test results
@@ -409,23 +894,17 @@ def evaluate_pipeline(
     logger.info("EVALUATION ON TEST SET")
     logger.info("=" * 60)
     
-    # Load test data
+    cache = _descriptor_cache(descriptor_cache_dir, feature_pipeline)
+    feature_store = FeatureStore(feature_store_dir) if feature_store_dir else None
+    
+    # Load test data and extract features
     test_data = dataset_manager.get_split_data('test')
     logger.info(f"Loading {len(test_data)} test images...")
-    
-    test_images = []
-    test_labels = []
-    
-    for img_path, label in tqdm(test_data, desc="Loading test images"):
-        img = cv2.imread(str(img_path))
-        if img is not None:
-            test_images.append(img)
-            test_labels.append(label)
-    
-    # Extract features
-    X_test = feature_pipeline.extract_features_batch(test_images, verbose=True)
+    X_test, y_test = _split_features(
+        feature_pipeline, test_data, 'test',
+        cache=cache, stream_workers=stream_workers, feature_store=feature_store
+    )
     X_test = feature_pipeline.transform_scaler(X_test)
-    y_test = np.array(test_labels)
     
     # Evaluate
     evaluator = Evaluator(trainer)
@@ -434,7 +913,87 @@ def evaluate_pipeline(
     # Generate plots
     evaluator.plot_metrics(X_test, y_test, report_dir, split_name='test')
     
+    if compare_with:
+        evaluator.compare(dict({'baseline': trainer}, **compare_with), X_test, y_test, split_name='test')
+    
     # Save report
     evaluator.save_report(report_dir / 'test_metrics.json')
     
     return evaluator
+
+
+def update_pipeline(
+    new_data: List[Tuple[Path, int]],
+    models_dir: Path = Path('models'),
+    replay_data: Optional[List[Tuple[Path, int]]] = None,
+    replay_samples: int = 1000,
+    epochs: int = 5,
+    promote: bool = False,
+    descriptor_cache_dir: Optional[Path] = None,
+    stream_workers: int = 0,
+    feature_store_dir: Optional[Path] = None,
+    random_state: int = 42
+) -> Tuple[SVMTrainer, Path]:
+    """
+    Incrementally update the trained linear SVM with new labelled images
+    (e.g. hard negatives from a new venue) and save it as a new version.
+    
+    The codebook and scaler stay as they are, so the new model is a drop-in
+    replacement for svm_face_linear.pkl.
+    
+    Args:
+        new_data: (path, label) pairs of the new images
+        models_dir: Directory with the trained feature pipeline and svm_face_linear.pkl
+        replay_data: Original training split to mix a sample of into the update
+        replay_samples: Replayed samples drawn from replay_data
+        epochs: Passes over the update batch
+        promote: Also overwrite svm_face_linear.pkl (the model the server loads)
+        descriptor_cache_dir: Reuse ORB descriptors cached here by earlier runs
+        stream_workers: Decode threads for streaming images (0 = load up front)
+        feature_store_dir: Reuse the replay split's stored feature matrix
+        random_state: Seed for drawing replay samples
+    
+    Returns:
+        (trainer, version_path) tuple
+    """
+    logger.info("=" * 60)
+    logger.info("INCREMENTAL UPDATE")
+    logger.info("=" * 60)
+    
+    models_dir = Path(models_dir)
+    model_path = models_dir / 'svm_face_linear.pkl'
+    
+    feature_pipeline = load_feature_pipeline(models_dir)
+    trainer = SVMTrainer(svm_type='linear', random_state=random_state)
+    trainer.load(model_path)
+    
+    cache = _descriptor_cache(descriptor_cache_dir, feature_pipeline)
+    feature_store = FeatureStore(feature_store_dir) if feature_store_dir else None
+    
+    logger.info(f"Loading {len(new_data)} new images...")
+    X_new, y_new = _split_features(feature_pipeline, new_data, 'update', cache=cache, stream_workers=stream_workers)
+    X_new = feature_pipeline.transform_scaler(X_new)
+    
+    X_replay = y_replay = None
+    if replay_data:
+        X_replay, y_replay = _split_features(
+            feature_pipeline, replay_data, 'train',
+            cache=cache, stream_workers=stream_workers, feature_store=feature_store
+        )
+        rng = np.random.default_rng(random_state)
+        rows = np.sort(rng.choice(len(y_replay), min(replay_samples, len(y_replay)), replace=False))
+        X_replay = feature_pipeline.transform_scaler(np.asarray(X_replay[rows]))
+        y_replay = y_replay[rows]
+    
+    trainer.update(X_new, y_new, epochs=epochs, X_replay=X_replay, y_replay=y_replay)
+    
+    version_path = trainer.save_version(model_path)
+    if promote:
+        shutil.copyfile(version_path, model_path)
+        shutil.copyfile(
+            version_path.parent / f"{version_path.stem}_meta.json",
+            model_path.parent / f"{model_path.stem}_meta.json"
+        )
+        logger.info(f"Promoted {version_path.name} to {model_path.name}")
+    
+    return trainer, version_path
@@ -0,0 +1,342 @@
+"""
+Multi-process execution of the detection + overlay pipeline.
+Handles a pool of worker processes, each with its own FaceDetector and
+AccessoryOverlay, fed through shared-memory frame slots, with results released
+in submission order and a bounded number of frames in flight.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import signal
+import time
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .features import load_feature_pipeline
+from .infer import FaceDetector, InferencePipeline
+from .overlay import AccessoryOverlay
+from .train import SVMTrainer
+from .utils import load_json, logger
+
+
+class PipelineSpec(NamedTuple):
+    """Everything a worker needs to build its own InferencePipeline."""
+    cascade_dir: str
+    models_dir: Optional[str] = None  # Directory with the SVM model; None = Haar only
+    config_path: Optional[str] = None  # Overlay/detector config JSON
+    svm_model: str = 'svm_face_linear.pkl'  # Model file in models_dir
+
+
+def build_pipeline(spec: PipelineSpec) -> InferencePipeline:
+    """
+    Build an InferencePipeline from a spec (in the calling process).
+
+    Accessories start empty; the pool sends them with `update_state`.
+    """
+    config_file = Path(spec.config_path) if spec.config_path else None
+    if config_file is not None and not config_file.exists():
+        config_file = None
+    config = load_json(config_file) if config_file else None
+
+    feature_pipeline = None
+    trainer = None
+    if spec.models_dir:
+        models_path = Path(spec.models_dir)
+        model_file = models_path / spec.svm_model
+        if model_file.exists():
+            feature_pipeline = load_feature_pipeline(models_path)
+            trainer = SVMTrainer()
+            trainer.load(model_file)
+
+    detector = FaceDetector(
+        cascade_dir=Path(spec.cascade_dir),
+        feature_pipeline=feature_pipeline,
+        svm_trainer=trainer,
+        config=config
+    )
+    return InferencePipeline(detector, AccessoryOverlay(config_path=config_file), {})
+
+
+def apply_state(pipeline: InferencePipeline, state: Dict[str, Any]) -> None:
+    """
+    Apply runtime changes made in the server to a worker's pipeline.
+
+    Keys: 'accessories' (type -> RGBA image), 'overlay_config' (AccessoryOverlay
+    config dict), 'face_cascade' (path of the face_default cascade XML).
+    """
+    if 'accessories' in state:
+        pipeline.accessories = state['accessories']
+    if 'overlay_config' in state:
+        pipeline.overlay_system.config = state['overlay_config']
+    if 'face_cascade' in state:
+        cascade = cv2.CascadeClassifier(str(state['face_cascade']))
+        if cascade.empty():
+            logger.warning(f"Worker failed to load cascade: {state['face_cascade']}")
+        else:
+            pipeline.detector.cascades['face_default'] = cascade
+
+
+def _worker_main(spec: PipelineSpec, slot_names: List[str], cv_threads: int, tasks, results) -> None:
+    """Worker process: process frames in their slots in place until told to stop."""
+    # Ctrl+C reaches the whole process group; the parent stops workers through `close()`
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Each worker gets its share of the cores for OpenCV's own threads
+    cv2.setNumThreads(cv_threads)
+    pipeline = build_pipeline(spec)
+    # Spawned workers share the parent's resource tracker, which unlinks the slots
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    results.put(('ready', os.getpid()))
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            if task[0] == 'state':
+                apply_state(pipeline, task[1])
+                continue
+
+            _, sequence, slot, shape, options = task
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=slots[slot].buf)
+            try:
+                frame[...] = pipeline.process_image(frame, **options)
+                results.put(('done', sequence, dict(pipeline.last_timings), None))
+            except Exception as e:
+                # The unprocessed frame stays in the slot and is sent as is
+                results.put(('done', sequence, {}, str(e)))
+            del frame
+    finally:
+        for segment in slots:
+            segment.close()
+
+
+class _InFlight(NamedTuple):
+    slot: int
+    shape: Tuple[int, ...]
+    context: Any
+    worker: int
+
+
+class DetectionWorkerPool:
+    """
+    Runs `InferencePipeline.process_image` in worker processes.
+
+    Threads cannot run the Python-level parts of detection and overlay in
+    parallel, so each worker process holds its own pipeline. A frame is copied
+    into one of `depth` shared-memory slots, processed in place by the least
+    busy worker and copied back out. `collect()` returns frames strictly in
+    submission order, so a fast worker never lets a later frame overtake an
+    earlier one. `depth` bounds the frames in flight, which trades latency
+    (up to `depth` frames) for throughput (up to `workers` frames at once).
+    """
+
+    def __init__(
+        self,
+        spec: PipelineSpec,
+        workers: int = 2,
+        depth: Optional[int] = None,
+        max_width: int = 640,
+        max_height: int = 640,
+        timeout: float = 10.0
+    ):
+        """
+        Initialize worker pool.
+
+        Args:
+            spec: How workers build their pipeline
+            workers: Number of worker processes
+            depth: Frames in flight (default: one per worker)
+            max_width: Largest BGR frame width that fits a slot
+            max_height: Largest BGR frame height that fits a slot
+            timeout: Seconds to wait for a result before checking the workers are alive
+        """
+        if workers < 1:
+            raise ValueError(f"Worker pool needs at least 1 worker, got {workers}")
+
+        self.spec = spec
+        self.workers = workers
+        self.depth = max(1, depth or workers)
+        self.slot_bytes = max_width * max_height * 3
+        self.timeout = timeout
+
+        self._context = mp.get_context('spawn')  # Fork is unsafe with the server's threads and OpenCV
+        self._slots: List[shared_memory.SharedMemory] = []
+        self._free_slots: List[int] = []
+        self._tasks = []
+        self._results = None
+        self._processes = []
+        self._in_flight: Dict[int, _InFlight] = {}
+        self._done: Dict[int, Tuple[Dict, Optional[str]]] = {}
+        self._next_sequence = 0
+        self._next_output = 0
+
+        # Statistics
+        self.frames_submitted = 0
+        self.frames_failed = 0
+
+    def start(self) -> None:
+        """Create the slots and start the workers; returns once every worker has built its pipeline."""
+        self._slots = [shared_memory.SharedMemory(create=True, size=self.slot_bytes) for _ in range(self.depth)]
+        self._free_slots = list(range(self.depth))
+        self._results = self._context.Queue()
+        slot_names = [segment.name for segment in self._slots]
+        cv_threads = max(1, (os.cpu_count() or 1) // self.workers)
+
+        for _ in range(self.workers):
+            tasks = self._context.Queue()
+            process = self._context.Process(
+                target=_worker_main, args=(self.spec, slot_names, cv_threads, tasks, self._results), daemon=True
+            )
+            process.start()
+            self._tasks.append(tasks)
+            self._processes.append(process)
+
+        ready = 0
+        deadline = time.monotonic() + 60.0
+        while ready < self.workers:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Detection workers did not start in time")
+                continue
+            if message[0] == 'ready':
+                ready += 1
+        logger.info(f"Detection worker pool: {self.workers} workers, depth {self.depth}")
+
+    def update_state(self, **state) -> None:
+        """Send runtime changes (see `apply_state`) to every worker, ahead of later frames."""
+        for tasks in self._tasks:
+            tasks.put(('state', state))
+
+    def full(self) -> bool:
+        return len(self._in_flight) >= self.depth
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def submit(self, frame: np.ndarray, context: Any = None, **options) -> int:
+        """
+        Queue a BGR frame for processing.
+
+        Args:
+            frame: BGR frame (uint8)
+            context: Returned unchanged with the processed frame
+            **options: Keyword arguments for `process_image`
+
+        Returns:
+            Submission sequence number
+
+        Raises:
+            RuntimeError: If `depth` frames are already in flight
+            ValueError: If the frame does not fit a slot
+        """
+        if self.full():
+            raise RuntimeError("Worker pool is full; collect() results first")
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {frame.shape} does not fit a {self.slot_bytes} byte slot")
+
+        slot = self._free_slots.pop()
+        buffer = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._slots[slot].buf)
+        buffer[...] = frame
+        del buffer
+
+        # Least busy worker; ties go to the lowest index
+        load = [0] * self.workers
+        for job in self._in_flight.values():
+            load[job.worker] += 1
+        worker = load.index(min(load))
+
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        self._in_flight[sequence] = _InFlight(slot, frame.shape, context, worker)
+        self._tasks[worker].put(('frame', sequence, slot, frame.shape, options))
+        self.frames_submitted += 1
+        return sequence
+
+    def collect(self, block: bool = False) -> List[Tuple[np.ndarray, Any, Dict, Optional[str]]]:
+        """
+        Return processed frames that are next in submission order.
+
+        Args:
+            block: Wait until at least the oldest frame in flight is done
+
+        Returns:
+            List of (frame, context, timings, error) tuples; `error` is None on
+            success, else the worker's message (the frame is then unprocessed)
+
+        Raises:
+            RuntimeError: If a worker process died
+        """
+        self._drain_results(block=block and self._next_output in self._in_flight)
+
+        output = []
+        while self._next_output in self._done:
+            sequence = self._next_output
+            timings, error = self._done.pop(sequence)
+            job = self._in_flight.pop(sequence)
+
+            frame = np.ndarray(job.shape, dtype=np.uint8, buffer=self._slots[job.slot].buf).copy()
+            self._free_slots.append(job.slot)
+            if error is not None:
+                self.frames_failed += 1
+
+            output.append((frame, job.context, timings, error))
+            self._next_output += 1
+        return output
+
+    def drain(self) -> None:
+        """Wait for every frame in flight and discard the results."""
+        while self._in_flight:
+            self.collect(block=True)
+
+    def _drain_results(self, block: bool) -> None:
+        while True:
+            try:
+                if block and self._next_output not in self._done:
+                    message = self._results.get(timeout=self.timeout)
+                else:
+                    message = self._results.get_nowait()
+            except queue.Empty:
+                if block and self._next_output not in self._done:
+                    self._check_workers()
+                    continue
+                return
+
+            if message[0] == 'done':
+                _, sequence, timings, error = message
+                self._done[sequence] = (timings, error)
+
+    def _check_workers(self) -> None:
+        for index, process in enumerate(self._processes):
+            if not process.is_alive():
+                raise RuntimeError(f"Detection worker {index} exited with code {process.exitcode}")
+
+    def close(self) -> None:
+        """Stop the workers and release the shared memory."""
+        for tasks in self._tasks:
+            try:
+                tasks.put(None)
+            except (OSError, ValueError):
+                pass
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._tasks = []
+
+        for segment in self._slots:
+            segment.close()
+            segment.unlink()
+        self._slots = []
+        self._in_flight.clear()
+        self._done.clear()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Stream Encoder Benchmark
+Compares encode time, decode time and bytes per frame of the stream codecs
+(JPEG variants, WebP, raw YUV420) at the server's output resolution
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pipelines.encoders import JPEG_SUBSAMPLING, JpegEncoder, WebpEncoder, Yuv420Encoder, benchmark_encoders
+from pipelines.protocol import DEFAULT_PACKET_SIZE, HEADER_V2
+from pipelines.sources import create_source
+
+
+def read_frames(source, count):
+    """Read up to `count` frames from an opened frame source."""
+    frames = []
+    for _ in range(count):
+        ok, frame = source.read()
+        if not ok:
+            break
+        frames.append(frame)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark stream encoders (encode time and bytes per frame)')
+    parser.add_argument('--source', default='synthetic',
+                        help='Frame source: synthetic[:SEED], images:DIR, video:PATH or camera[:N] (default: synthetic)')
+    parser.add_argument('--width', type=int, default=480, help='Frame width (default: 480)')
+    parser.add_argument('--height', type=int, default=360, help='Frame height (default: 360)')
+    parser.add_argument('--frames', type=int, default=60, help='Frames to encode (default: 60)')
+    parser.add_argument('--quality', type=int, default=40, help='Encoder quality (default: 40)')
+    parser.add_argument('--json', default=None, help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    try:
+        with create_source(args.source, args.width, args.height) as source:
+            frames = read_frames(source, args.frames)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    if not frames:
+        print("❌ No frames to benchmark")
+        return
+
+    encoders = [JpegEncoder(subsampling=s) for s in JPEG_SUBSAMPLING]
+    encoders += [
+        JpegEncoder(optimize=True),
+        JpegEncoder(progressive=True),
+        WebpEncoder(),
+        Yuv420Encoder()
+    ]
+
+    results = benchmark_encoders(frames, encoders, quality=args.quality)
+    payload_size = DEFAULT_PACKET_SIZE - HEADER_V2.size
+
+    print("=" * 70)
+    print("  STREAM ENCODER BENCHMARK")
+    print("=" * 70)
+    height, width = frames[0].shape[:2]
+    print(f"📐 {len(frames)} frames, {width}x{height}, quality {args.quality}")
+    print(f"\n   {'Codec':<26} {'Encode ms':>10} {'p95':>7} {'Decode ms':>10} {'KB/frame':>9} {'Packets':>8}")
+
+    for result in results:
+        options = result['options']
+        label = result['codec']
+        if result['codec'] == 'jpeg':
+            label += f" {options['subsampling']}"
+            label += ' optimize' if options['optimize'] else ''
+            label += ' progressive' if options['progressive'] else ''
+        packets = int(np.ceil(result['bytes_mean'] / payload_size))
+        print(f"   {label:<26} {result['encode_ms_mean']:>10.2f} {result['encode_ms_p95']:>7.2f} "
+              f"{result['decode_ms_mean']:>10.2f} {result['bytes_mean'] / 1024:>9.1f} {packets:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'width': width, 'height': height, 'quality': args.quality, 'results': results}, f, indent=2)
+        print(f"\n💾 Saved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
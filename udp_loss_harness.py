@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Loopback Loss Simulation Harness
+Measures delivered-frame rate against packet size, FEC parity and NACK retransmission
+overhead over a lossy UDP loopback link
+"""
+
+import argparse
+import math
+import random
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pipelines.protocol import (
+    HEADER_V1, HEADER_V2, FrameReassembler, packetize_frame, packetize_frame_v1
+)
+from pipelines.encoders import JpegEncoder
+from pipelines.sources import create_source
+from pipelines.streaming import FrameCache
+
+# IPv4 + UDP header bytes per datagram / per IP fragment
+IP_UDP_OVERHEAD = 28
+
+
+def datagram_loss_rate(datagram_size, loss_rate, link_mtu=None):
+    """
+    Probability that a datagram is lost.
+
+    Without `link_mtu` the loss rate applies per datagram. With it, datagrams
+    larger than the MTU are IP-fragmented and lost if any fragment is lost.
+    """
+    if not link_mtu:
+        return loss_rate
+    fragments = math.ceil((datagram_size + IP_UDP_OVERHEAD) / (link_mtu - 20))
+    return 1.0 - (1.0 - loss_rate) ** fragments
+
+
+def encoded_payloads(source_spec, count, width=480, height=360, quality=40):
+    """JPEG-encode `count` frames of a frame source, for realistic frame sizes."""
+    encoder = JpegEncoder()
+    payloads = []
+    with create_source(source_spec, width, height) as source:
+        for _ in range(count):
+            ok, frame = source.read()
+            if not ok:
+                break
+            payloads.append(encoder.encode(frame, quality))
+    return payloads
+
+
+def run_trial(frame_size, packet_size, fec_group, loss_rate, frames,
+              seed=42, nack=False, protocol_version=2, link_mtu=None, payloads=None):
+    """
+    Send `frames` frames over loopback, dropping packets at `loss_rate`.
+
+    Frames are random bytes of `frame_size`, or cycle through `payloads`
+    (e.g. encoded frames from `encoded_payloads`) when given.
+
+    With `nack`, the receiver requests missing packets once per frame and the
+    sender answers from a FrameCache (retransmissions are subject to loss too).
+
+    Returns:
+        Dict with delivered-frame rate, overhead and recovery statistics
+    """
+    rng = random.Random(seed)
+
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.setblocking(False)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    addr = receiver.getsockname()
+
+    header_size = HEADER_V2.size if protocol_version >= 2 else HEADER_V1.size
+    payload_size = packet_size - header_size
+
+    reassembler = FrameReassembler()
+    cache = FrameCache()
+    delivered = 0
+    retransmitted = 0
+    packets_sent = 0
+    packets_dropped = 0
+    bytes_sent = 0
+
+    def transmit(batch):
+        nonlocal packets_sent, packets_dropped, bytes_sent
+        for packet in batch:
+            bytes_sent += len(packet)
+            if rng.random() < datagram_loss_rate(len(packet), loss_rate, link_mtu):
+                packets_dropped += 1
+                continue
+            sender.sendto(packet, addr)
+            packets_sent += 1
+
+    def drain():
+        nonlocal delivered
+        # Drain receiver after every send so the socket buffer never overflows
+        while True:
+            try:
+                data, _ = receiver.recvfrom(65536)
+            except BlockingIOError:
+                break
+            result = reassembler.add_packet(data)
+            if result is not None and result[1] == frame_data:
+                delivered += 1
+
+    frame_data = b''
+    start = time.perf_counter()
+    for sequence in range(1, frames + 1):
+        frame_data = payloads[(sequence - 1) % len(payloads)] if payloads else rng.randbytes(frame_size)
+
+        if protocol_version >= 2:
+            packets = packetize_frame(frame_data, sequence, payload_size, fec_group)
+        else:
+            packets = packetize_frame_v1(frame_data, sequence, payload_size)
+
+        cache.put(sequence, packets)
+
+        transmit(packets)
+        drain()
+
+        if nack:
+            for missing_sequence, indices in reassembler.missing().items():
+                if missing_sequence != sequence:
+                    continue
+                resend = cache.get(missing_sequence, indices) or []
+                retransmitted += len(resend)
+                transmit(resend)
+            drain()
+
+    elapsed = time.perf_counter() - start
+    sender.close()
+    receiver.close()
+
+    if payloads:
+        payload_bytes = sum(len(payloads[i % len(payloads)]) for i in range(frames))
+    else:
+        payload_bytes = frame_size * frames
+    return {
+        'packet_size': packet_size,
+        'protocol_version': protocol_version,
+        'fec_group': fec_group,
+        'nack': nack,
+        'retransmitted': retransmitted,
+        'overhead': bytes_sent / payload_bytes - 1.0,
+        'delivered_rate': delivered / frames,
+        'frames_recovered': reassembler.frames_recovered,
+        'packets_recovered': reassembler.packets_recovered,
+        'packets_dropped': packets_dropped,
+        'frames_corrupt': reassembler.frames_corrupt,
+        'elapsed': elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Loopback loss simulation for the UDP frame protocol')
+    parser.add_argument('--frame-size', type=int, default=20000, help='Random frame size in bytes (default: 20000)')
+    parser.add_argument('--source', default=None,
+                        help='Use JPEG-encoded frames from a frame source instead of random bytes '
+                             '(e.g. synthetic, video:PATH, images:DIR)')
+    parser.add_argument('--packet-sizes', type=int, nargs='+', default=[1200],
+                        help='UDP datagram sizes incl. header to compare (default: 1200)')
+    parser.add_argument('--protocol-v1', action='store_true', help='Use the legacy 12-byte header (no FEC)')
+    parser.add_argument('--link-mtu', type=int, default=None,
+                        help='Apply loss per link frame of this MTU (models IP fragmentation, e.g. 1500)')
+    parser.add_argument('--loss', type=float, nargs='+', default=[0.01, 0.02, 0.05], help='Packet loss rates to simulate')
+    parser.add_argument('--fec-groups', type=int, nargs='+', default=[0, 16, 8, 4], help='FEC group sizes (0 = no FEC)')
+    parser.add_argument('--nack', action='store_true', help='Also run every configuration with NACK retransmission')
+    parser.add_argument('--frames', type=int, default=500, help='Frames per trial (default: 500)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    protocol_version = 1 if args.protocol_v1 else 2
+    fec_groups = [0] if args.protocol_v1 else args.fec_groups
+
+    print("=" * 70)
+    print("  UDP LOOPBACK LOSS SIMULATION")
+    print("=" * 70)
+    payloads = None
+    if args.source:
+        try:
+            payloads = encoded_payloads(args.source, min(args.frames, 300))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        mean_size = sum(len(p) for p in payloads) // max(len(payloads), 1)
+        print(f"📐 Frames: {len(payloads)} JPEG frames from {args.source} (mean {mean_size} bytes), "
+              f"protocol v{protocol_version}, {args.frames} frames/trial")
+    else:
+        print(f"📐 Frame: {args.frame_size} bytes, protocol v{protocol_version}, {args.frames} frames/trial")
+    if args.link_mtu:
+        print(f"🔗 Loss applied per {args.link_mtu}-byte link frame (IP fragmentation modelled)")
+
+    for loss_rate in args.loss:
+        print(f"\n📉 Packet loss {loss_rate * 100:.1f}%")
+        print(f"   {'Packet':>7} {'FEC k':>6} {'NACK':>5} {'Overhead':>9} {'Delivered':>10} {'Recovered':>10} {'Resent':>7}")
+        for packet_size in args.packet_sizes:
+            for nack in ([False, True] if args.nack else [False]):
+                for fec_group in fec_groups:
+                    result = run_trial(
+                        args.frame_size, packet_size, fec_group, loss_rate, args.frames,
+                        seed=args.seed, nack=nack, protocol_version=protocol_version,
+                        link_mtu=args.link_mtu, payloads=payloads
+                    )
+                    label = str(fec_group) if fec_group > 0 else 'off'
+                    print(f"   {packet_size:>7} {label:>6} {'on' if nack else 'off':>5} "
+                          f"{result['overhead'] * 100:>8.1f}% {result['delivered_rate'] * 100:>9.1f}% "
+                          f"{result['frames_recovered']:>10} {result['retransmitted']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Headless UDP Stream Benchmark
+Registers N simulated clients with the overlay server, reassembles their frames
+and reports per-client FPS, completeness, latency and loss as JSON, together with
+the server's per-stage latency histograms
+"""
+
+import argparse
+import json
+import random
+import select
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pipelines.encoders import decode_frame
+from pipelines.protocol import FrameReassembler, build_nack, parse_header
+from pipelines.shm_transport import DOORBELL_PREFIX, ShmRingReader
+from pipelines.streaming import open_multicast_receiver
+
+PING_INTERVAL = 2.0
+NACK_DELAY = 0.02  # Seconds without new packets before an incomplete frame is NACKed
+LATENCY_REPORT_EVERY = 15  # Decode and send a LAT report for every Nth frame, like the Godot client
+
+
+def percentiles(values):
+    """p50/p95/p99/max of a list of milliseconds (zeros when empty)."""
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': round(float(p50), 2), 'p95': round(float(p95), 2),
+            'p99': round(float(p99), 2), 'max': round(float(max(values)), 2)}
+
+
+class SimulatedClient:
+    """One headless receiver: registers, reassembles frames and keeps statistics."""
+
+    def __init__(self, server, profile=None, loss=0.0, reorder=0.0, nack=False, seed=42):
+        """
+        Initialize simulated client.
+
+        Args:
+            server: (host, port) of the overlay server
+            profile: Optional stream profile dict sent with REGISTER
+            loss: Probability of dropping each received datagram
+            reorder: Probability of delaying a datagram behind the next one
+            nack: Request missing packets like the Godot client
+            seed: Seed for loss/reorder injection
+        """
+        self.server = server
+        self.profile = profile
+        self.loss = loss
+        self.reorder = reorder
+        self.nack = nack
+        self.rng = random.Random(seed)
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.sock.bind(('0.0.0.0', 0))
+        self.sock.setblocking(False)
+        self.addr = "%s:%d" % self.sock.getsockname()
+        self.multicast_sock = None
+        self.shm_reader = None  # Shared-memory ring, when registered with {"transport":"shm"}
+
+        self.reassembler = FrameReassembler()
+        self.registered = False
+        self.held = None  # Datagram delayed for reordering
+        self.first_packet = {}  # sequence -> arrival time of its first packet
+        self.last_packet = {}  # sequence -> arrival time of its latest packet
+        self.nacked = set()
+        self.last_ping = 0.0
+
+        # Statistics
+        self.sequences_seen = set()
+        self.packets_received = 0
+        self.packets_dropped = 0
+        self.packets_reordered = 0
+        self.nacks_sent = 0
+        self.keyframe_requests = 0
+        self.shm_frames = 0
+        self.shm_missed = 0
+        self.reassembly_ms = []
+        self.latency_ms = []
+        self.server_ms = []  # Capture to encode-done, from the header timestamps
+        self.decode_ms = []
+        self.latency_reports = 0
+        self.first_frame_time = None
+        self.last_frame_time = None
+
+    def sockets(self):
+        return [s for s in (self.sock, self.multicast_sock) if s is not None]
+
+    def send(self, message):
+        self.sock.sendto(message.encode('utf-8') if isinstance(message, str) else message, self.server)
+
+    def register(self):
+        message = "REGISTER"
+        if self.profile:
+            message += ":" + json.dumps(self.profile)
+        self.send(message)
+
+    def unregister(self):
+        self.send("UNREGISTER")
+
+    def tick(self, now):
+        """Heartbeat and NACKs; called regularly from the receive loop."""
+        if now - self.last_ping >= PING_INTERVAL:
+            self.send("PING")
+            self.last_ping = now
+
+        if self.nack:
+            for sequence, indices in self.reassembler.missing().items():
+                if sequence in self.nacked or not indices:
+                    continue
+                if now - self.last_packet.get(sequence, now) > NACK_DELAY:
+                    self.send(build_nack(sequence, indices))
+                    self.nacked.add(sequence)
+                    self.nacks_sent += 1
+
+    def on_datagram(self, data, now):
+        # Control replies are ASCII text; frame packets start with 0x00 (v1) or the v2 magic
+        if data[:1].isupper():
+            self._on_control(data.decode('utf-8', errors='replace'), now)
+            return
+
+        self.packets_received += 1
+        if self.rng.random() < self.loss:
+            self.packets_dropped += 1
+            return
+
+        if self.held is not None:
+            held, self.held = self.held, None
+            self._feed(data, now)
+            self._feed(held, now)
+        elif self.rng.random() < self.reorder:
+            self.held = data
+            self.packets_reordered += 1
+        else:
+            self._feed(data, now)
+
+    def _on_control(self, message, now):
+        if message.startswith(DOORBELL_PREFIX):
+            if self.shm_reader is not None:
+                self._read_shm(int(message[len(DOORBELL_PREFIX):]), now)
+        elif message.startswith("REGISTERED"):
+            self.registered = True
+            if message.startswith("REGISTERED:MULTICAST:") and self.multicast_sock is None:
+                _, _, group, port = message.split(":")
+                self.multicast_sock = open_multicast_receiver(group, int(port))
+                self.multicast_sock.setblocking(False)
+            elif message.startswith("REGISTERED:SHM:") and self.shm_reader is None:
+                # The path may itself contain ':' (Windows drive letters)
+                reader = ShmRingReader(message.split(":", 2)[2])
+                if reader.open():
+                    self.shm_reader = reader
+        elif message == "UNREGISTERED":
+            self.register()
+
+    def _read_shm(self, sequence, now):
+        """Copy a doorbelled frame out of the shared-memory ring."""
+        self.sequences_seen.add(sequence)
+        start = time.perf_counter()
+        result = self.shm_reader.read(sequence)
+        copy_s = time.perf_counter() - start
+        if result is None:
+            self.shm_missed += 1
+            return
+
+        _, header = result
+        self.shm_frames += 1
+        self.decode_ms.append(copy_s * 1000.0)
+        if header.capture_ts:
+            self.latency_ms.append(time.time() * 1000.0 - header.capture_ts / 1000.0)
+            if self.shm_frames % LATENCY_REPORT_EVERY == 0:
+                self.send("LAT:" + json.dumps({
+                    'seq': sequence, 'cap': header.capture_ts, 'enc': 0,
+                    'reasm_us': 0, 'decode_us': int(copy_s * 1e6)
+                }))
+                self.latency_reports += 1
+
+        if self.first_frame_time is None:
+            self.first_frame_time = now
+        self.last_frame_time = now
+
+    def _feed(self, data, now):
+        try:
+            header, _ = parse_header(data)
+        except ValueError:
+            return
+
+        self.sequences_seen.add(header.sequence)
+        self.first_packet.setdefault(header.sequence, now)
+        self.last_packet[header.sequence] = now
+
+        result = self.reassembler.add_packet(data)
+        if self.reassembler.needs_keyframe:
+            # Repeat packet for a frame this client never got
+            self.reassembler.needs_keyframe = False
+            self.send("KEYFRAME")
+            self.keyframe_requests += 1
+        if result is None:
+            return
+
+        sequence, frame_data = result
+        reassembly_s = now - self.first_packet.pop(sequence, now)
+        self.reassembly_ms.append(reassembly_s * 1000.0)
+        self.last_packet.pop(sequence, None)
+
+        header = self.reassembler.last_header
+        if header.capture_ts:
+            # Server and client share a clock when both run on this machine
+            self.latency_ms.append(time.time() * 1000.0 - header.capture_ts / 1000.0)
+            if header.encoded_ts:
+                self.server_ms.append((header.encoded_ts - header.capture_ts) / 1000.0)
+
+        if header.capture_ts and self.reassembler.frames_completed % LATENCY_REPORT_EVERY == 0:
+            self._report_latency(header, frame_data, reassembly_s)
+
+        if self.first_frame_time is None:
+            self.first_frame_time = now
+        self.last_frame_time = now
+
+        # Forget per-frame bookkeeping of frames the reassembler gave up on
+        for stale in [s for s in self.first_packet if s not in self.reassembler.pending]:
+            self.first_packet.pop(stale, None)
+            self.last_packet.pop(stale, None)
+
+    def _report_latency(self, header, frame_data, reassembly_s):
+        """Decode a sampled frame and echo its timestamps to the server."""
+        start = time.perf_counter()
+        decode_frame(header.codec, frame_data)
+        decode_s = time.perf_counter() - start
+        self.decode_ms.append(decode_s * 1000.0)
+
+        self.send("LAT:" + json.dumps({
+            'seq': header.sequence,
+            'cap': header.capture_ts,
+            'enc': header.encoded_ts,
+            'reasm_us': int(reassembly_s * 1e6),
+            'decode_us': int(decode_s * 1e6)
+        }))
+        self.latency_reports += 1
+
+    def report(self):
+        completed = self.reassembler.frames_completed + self.shm_frames
+        if self.sequences_seen:
+            expected = max(self.sequences_seen) - min(self.sequences_seen) + 1
+        else:
+            expected = 0
+
+        fps = 0.0
+        if completed > 1 and self.last_frame_time > self.first_frame_time:
+            fps = (completed - 1) / (self.last_frame_time - self.first_frame_time)
+
+        return {
+            'addr': self.addr,
+            'profile': self.profile,
+            'registered': self.registered,
+            'fps': round(fps, 2),
+            'frames_completed': completed,
+            'frames_expected': expected,
+            'completeness': round(completed / expected, 4) if expected else 0.0,
+            'frames_recovered': self.reassembler.frames_recovered,
+            'frames_corrupt': self.reassembler.frames_corrupt,
+            'frames_repeated': self.reassembler.frames_repeated,
+            'keyframe_requests': self.keyframe_requests,
+            'shm_frames': self.shm_frames,
+            'shm_missed': self.shm_missed,
+            'packets_received': self.packets_received,
+            'packets_dropped_injected': self.packets_dropped,
+            'packets_reordered_injected': self.packets_reordered,
+            'nacks_sent': self.nacks_sent,
+            'reassembly_ms': percentiles(self.reassembly_ms),
+            'capture_to_frame_ms': percentiles(self.latency_ms),
+            'capture_to_encoded_ms': percentiles(self.server_ms),
+            'decode_ms': percentiles(self.decode_ms),
+            'latency_reports': self.latency_reports
+        }
+
+    def close(self):
+        for sock in self.sockets():
+            sock.close()
+        if self.shm_reader is not None:
+            self.shm_reader.close()
+
+
+def run_benchmark(server, clients, duration):
+    """Receive on all clients for `duration` seconds."""
+    for client in clients:
+        client.register()
+
+    by_socket = {}
+    deadline = time.monotonic() + duration
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+
+        for client in clients:
+            for sock in client.sockets():
+                by_socket[sock] = client
+            client.tick(now)
+
+        readable, _, _ = select.select(list(by_socket), [], [], 0.005)
+        now = time.monotonic()
+        for sock in readable:
+            client = by_socket[sock]
+            while True:
+                try:
+                    data, _ = sock.recvfrom(65536)
+                except BlockingIOError:
+                    break
+                client.on_datagram(data, now)
+
+    for client in clients:
+        client.unregister()
+        client.close()
+
+
+def summarize(reports):
+    fps = [r['fps'] for r in reports]
+    completeness = [r['completeness'] for r in reports]
+    return {
+        'clients': len(reports),
+        'fps_mean': round(float(np.mean(fps)), 2) if fps else 0.0,
+        'fps_min': round(float(np.min(fps)), 2) if fps else 0.0,
+        'completeness_mean': round(float(np.mean(completeness)), 4) if completeness else 0.0,
+        'completeness_min': round(float(np.min(completeness)), 4) if completeness else 0.0,
+        'capture_to_frame_p95_ms': max((r['capture_to_frame_ms']['p95'] for r in reports), default=0.0)
+    }
+
+
+def spawn_server(port, source, extra_args):
+    """Start the overlay server without overlay on a fixed frame source."""
+    command = [
+        sys.executable, str(Path(__file__).parent / 'udp_webcam_overlay_server.py'),
+        '--no-overlay', '--port', str(port), '--source', source
+    ] + extra_args
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def query_server(server, message, timeout=15.0):
+    """Send a control query until the server answers; returns the reply text or None."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(0.5)
+    deadline = time.monotonic() + timeout
+    try:
+        while time.monotonic() < deadline:
+            sock.sendto(message.encode('utf-8'), server)
+            try:
+                data, _ = sock.recvfrom(65536)
+                return data.decode('utf-8', errors='replace')
+            except (socket.timeout, ConnectionResetError):
+                continue
+        return None
+    finally:
+        sock.close()
+
+
+def wait_for_server(server, timeout=15.0):
+    """Poll the server with STATS until it answers."""
+    return query_server(server, "STATS", timeout) is not None
+
+
+def fetch_server_latency(server):
+    """Server-side per-stage latency histograms (empty if the server does not answer)."""
+    reply = query_server(server, "LATENCY", timeout=2.0)
+    if not reply or not reply.startswith("LATENCY:"):
+        return {}
+    return json.loads(reply[len("LATENCY:"):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless load generator and stream benchmark for the UDP overlay server')
+    parser.add_argument('--host', default='127.0.0.1', help='Server host (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8888, help='Server port (default: 8888)')
+    parser.add_argument('--clients', type=int, default=4, help='Simulated clients (default: 4)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to measure (default: 10)')
+    parser.add_argument('--profile', default=None, help='Stream profile JSON sent with REGISTER, e.g. \'{"w":320,"q":30}\'')
+    parser.add_argument('--transport', choices=['udp', 'shm'], default='udp',
+                        help='Frame transport to request; shm needs a server started with --shm (default: udp)')
+    parser.add_argument('--loss', type=float, default=0.0, help='Injected receive-side packet loss rate (default: 0)')
+    parser.add_argument('--reorder', type=float, default=0.0, help='Injected packet reordering rate (default: 0)')
+    parser.add_argument('--nack', action='store_true', help='Send NACKs for missing packets')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for injection')
+    parser.add_argument('--spawn-server', metavar='SOURCE', default=None,
+                        help='Start a server on --port with this frame source (e.g. synthetic) and stop it afterwards')
+    parser.add_argument('--server-args', default='', help='Extra arguments for the spawned server')
+    parser.add_argument('--json', default=None, help='Write the report to this JSON file')
+    args = parser.parse_args()
+
+    server = (args.host, args.port)
+    profile = json.loads(args.profile) if args.profile else None
+    if args.transport == 'shm':
+        profile = dict(profile or {}, transport='shm')
+
+    print("=" * 70)
+    print("  UDP STREAM BENCHMARK")
+    print("=" * 70)
+
+    process = None
+    if args.spawn_server:
+        print(f"🚀 Spawning server on port {args.port} with source {args.spawn_server}")
+        process = spawn_server(args.port, args.spawn_server, args.server_args.split())
+
+    try:
+        if not wait_for_server(server):
+            print(f"❌ No answer from server at {args.host}:{args.port}")
+            return
+
+        clients = [
+            SimulatedClient(server, profile=profile, loss=args.loss, reorder=args.reorder,
+                            nack=args.nack, seed=args.seed + i)
+            for i in range(args.clients)
+        ]
+        print(f"👥 {args.clients} clients, {args.duration:.0f}s, loss {args.loss * 100:.1f}%, "
+              f"reorder {args.reorder * 100:.1f}%, NACK {'on' if args.nack else 'off'}")
+
+        run_benchmark(server, clients, args.duration)
+        server_latency = fetch_server_latency(server)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    reports = [client.report() for client in clients]
+    summary = summarize(reports)
+
+    print(f"\n   {'Client':<22} {'FPS':>6} {'Complete':>9} {'Reasm p95':>10} {'Latency p95':>12} {'NACKs':>6}")
+    for r in reports:
+        print(f"   {r['addr']:<22} {r['fps']:>6.1f} {r['completeness'] * 100:>8.1f}% "
+              f"{r['reassembly_ms']['p95']:>8.1f}ms {r['capture_to_frame_ms']['p95']:>10.1f}ms {r['nacks_sent']:>6}")
+    print(f"\n📊 Mean FPS {summary['fps_mean']:.1f} (min {summary['fps_min']:.1f}), "
+          f"completeness {summary['completeness_mean'] * 100:.1f}% (min {summary['completeness_min'] * 100:.1f}%)")
+
+    if server_latency:
+        print(f"\n   {'Stage':<14} {'Samples':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for stage, stats in server_latency.items():
+            print(f"   {stage:<14} {stats['count']:>8} {stats['p50_ms']:>7.2f}ms "
+                  f"{stats['p95_ms']:>7.2f}ms {stats['p99_ms']:>7.2f}ms")
+
+    if args.json:
+        report = {
+            'config': {
+                'server': f"{args.host}:{args.port}",
+                'source': args.spawn_server,
+                'clients': args.clients,
+                'duration_s': args.duration,
+                'profile': profile,
+                'transport': args.transport,
+                'loss': args.loss,
+                'reorder': args.reorder,
+                'nack': args.nack
+            },
+            'summary': summary,
+            'server_latency': server_latency,
+            'clients': reports
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved report to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,14 @@ Integrated with CV Accessory Overlay System
 """
 
 import cv2
+import ipaddress
+import json
+import platform
 import socket
-import struct
 import threading
 import time
-import math
 import sys
+import zlib
 import argparse
 from pathlib import Path
 
@@ -19,13 +21,31 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from pipelines.infer import FaceDetector, InferencePipeline
 from pipelines.overlay import AccessoryOverlay
-from pipelines.features import FeaturePipeline
+from pipelines.encoders import CODEC_IDS, JPEG_SUBSAMPLING, get_encoder
+from pipelines.shm_transport import DOORBELL_PREFIX, ShmRingWriter, default_shm_path, parse_transport
+from pipelines.sources import CameraSource, create_source
+from pipelines.protocol import (
+    DEFAULT_PACKET_SIZE, HEADER_V1, HEADER_V2,
+    build_repeat_packet, packetize_frame, packetize_frame_v1, parse_nack
+)
+from pipelines.streaming import (
+    ClientLiveness, FrameCache, FrameChangeDetector, FrameScheduler, LatencyStats, PacedSender, StreamProfile,
+    group_by_profile, open_multicast_sender, parse_declared_bandwidth, parse_profile
+)
+from pipelines.features import load_feature_pipeline
 from pipelines.train import SVMTrainer
 from pipelines.utils import load_json
+from pipelines.workers import DetectionWorkerPool, PipelineSpec
 
 
 class UDPWebcamOverlayServer:
-    def __init__(self, host='127.0.0.1', port=8888, use_overlay=True, use_svm=False, mirror=True, show_boxes=True):
+    def __init__(self, host='127.0.0.1', port=8888, use_overlay=True, use_svm=False, mirror=True, show_boxes=True,
+                 fec_group=0, nack_cache=8, nack_deadline_ms=None, protocol_version=2, packet_size=None,
+                 pace_fraction=0.0, pace_kbps=0.0, client_timeout=10.0,
+                 multicast_group=None, multicast_port=None, multicast_ttl=1, multicast_interface=None,
+                 codec='jpeg', jpeg_options=None, source='camera',
+                 suppress_duplicates=False, change_threshold=4.0, keyframe_interval=2.0,
+                 shm_path=None, shm_format='rgba', workers=0, pipeline_depth=None):
         self.host = host
         self.port = port
         self.server_socket = None
@@ -34,18 +54,94 @@ class UDPWebcamOverlayServer:
         self.running = False
         self.sequence_number = 0
         
+        # Wire format: v2 = MTU-sized packets with versioned header (timestamp, length, CRC32),
+        # v1 = legacy 12-byte header with 32KB datagrams (IP-fragmented)
+        self.protocol_version = protocol_version
+        if packet_size is None:
+            packet_size = DEFAULT_PACKET_SIZE if protocol_version >= 2 else 32768
+        
         # Optimized settings
-        self.max_packet_size = 32768  # 32KB packets
+        self.max_packet_size = packet_size
         self.target_fps = 15
         self.jpeg_quality = 40
         self.frame_width = 480
         self.frame_height = 360
         
-        # Performance monitoring
+        # Encoder backends (JPEG options apply to every JPEG stream); v1 headers
+        # carry no codec id, so v1 clients always get JPEG
+        self.encoders = {
+            name: get_encoder(name, **(jpeg_options or {})) if name == 'jpeg' else get_encoder(name)
+            for name in CODEC_IDS
+        }
+        if protocol_version < 2:
+            codec = 'jpeg'
+        
+        # Per-client stream profiles negotiated at REGISTER time, e.g. REGISTER:{"w":320,"q":30,"codec":"webp"}
+        # (plain REGISTER gets the default profile)
+        self.default_profile = StreamProfile(width=self.frame_width, quality=self.jpeg_quality, codec=codec)
+        self.client_profiles = {}  # addr -> StreamProfile
+        
+        # Liveness: any message (clients send PING periodically) refreshes a client;
+        # silent clients are evicted after `client_timeout` seconds (0 = never)
+        self.liveness = ClientLiveness(timeout=client_timeout)
+        
+        # Forward error correction: one XOR parity packet per `fec_group` data packets
+        # (0 = disabled; requires the v2 header)
+        self.fec_group = fec_group if protocol_version >= 2 else 0
+        
+        # Selective retransmission: recent frames kept as packet lists for NACKs,
+        # one cache per stream profile (deadline defaults to one frame interval)
+        self.nack_cache = nack_cache
+        self.frame_caches = {}  # StreamProfile -> FrameCache
+        self.nack_deadline = (nack_deadline_ms / 1000.0) if nack_deadline_ms else 1.0 / self.target_fps
+        self.retransmit_stats = {}  # addr -> {'nacks', 'requested', 'resent', 'expired'}
+        
+        # Performance monitoring: monotonic deadline scheduler with jitter statistics
         self.frame_send_time = 1.0 / self.target_fps
+        self.scheduler = FrameScheduler(self.target_fps)
+        
+        # Glass-to-glass tracing: server stages are timed per frame; clients echo
+        # LAT reports for sampled frames to add network/reassembly/decode time
+        self.latency = LatencyStats()
+        
+        # Duplicate-frame suppression (v2 only): an unchanged composited frame goes out as a
+        # header-only repeat packet instead of being re-encoded; a full keyframe is still sent
+        # every `keyframe_interval` seconds, after each REGISTER and when a client asks (KEYFRAME)
+        self.change_detector = None
+        if suppress_duplicates and protocol_version >= 2:
+            self.change_detector = FrameChangeDetector(threshold=change_threshold,
+                                                       keyframe_interval=keyframe_interval)
+        self.last_sent = {}  # StreamProfile -> (frame_len, crc32) of its last full frame
         
-        # Camera settings
+        # Packet pacing: spread each frame over `pace_fraction` of the frame interval,
+        # limited per client by a token bucket at its declared bandwidth
+        # (REGISTER:{"kbps":...} or BANDWIDTH:<kbps>; `pace_kbps` otherwise, 0 = unlimited)
+        self.pace_fraction = min(1.0, max(0.0, pace_fraction))
+        self.pace_kbps = pace_kbps
+        self.pacer = None
+        
+        # Multicast output: each frame is sent once to the group instead of once per client.
+        # Control (REGISTER, PING, NACK, commands) and retransmits stay unicast on `port`;
+        # all multicast receivers get the default stream profile.
+        self.multicast_group = multicast_group
+        self.multicast_port = multicast_port or port + 1
+        self.multicast_ttl = multicast_ttl
+        # Loopback server => loopback multicast, so a single machine can test it
+        self.multicast_interface = multicast_interface or (host if host.startswith('127.') else None)
+        self.multicast_socket = None
+        
+        # Shared-memory transport: loopback clients that REGISTER with {"transport":"shm"} get
+        # raw frames through a memory-mapped ring file plus a `SHM:<seq>` doorbell instead of
+        # encoded UDP packets (`shm_path` enables it; '' = default path for this port)
+        self.shm_path = None if shm_path is None else Path(shm_path or default_shm_path(port))
+        self.shm_format = shm_format
+        self.shm_writer = None
+        self.shm_clients = set()
+        
+        # Camera settings; `source` may also name a video file, image folder or
+        # synthetic pattern (see pipelines/sources.py) for runs without a webcam
         self.mirror = mirror
+        self.source_spec = source
         
         # Face detection & overlay
         self.use_overlay = use_overlay
@@ -59,10 +155,18 @@ class UDPWebcamOverlayServer:
         self.current_package = 1  # Current active package
         self.inference_pipeline = None
         
+        # Detection worker processes (0 = detect and overlay in the broadcast thread);
+        # up to `pipeline_depth` frames (default: one per worker) are in flight at once
+        self.workers = workers
+        self.pipeline_depth = pipeline_depth
+        self.pipeline_spec = None  # Set by initialize_face_detection()
+        self.worker_pool = None
+        
     def initialize_face_detection(self, cascade_dir='assets/cascades', 
                                    models_dir='models',
                                    config_path='assets/overlay_config.json',
-                                   accessories_config=None):
+                                   accessories_config=None,
+                                   svm_model='svm_face_linear.pkl'):
         """Initialize face detection and overlay system."""
         print("\n🎭 Initializing Face Detection & Overlay System...")
         
@@ -82,17 +186,16 @@ class UDPWebcamOverlayServer:
                 print("📊 Loading SVM classifier...")
                 models_path = Path(models_dir)
                 
-                feature_pipeline = FeaturePipeline()
-                feature_pipeline.load(models_path)
-                
                 trainer = SVMTrainer()
-                model_file = models_path / 'svm_face_linear.pkl'
+                model_file = models_path / svm_model
                 if not model_file.exists():
                     print(f"⚠️ SVM model not found at {model_file}, using Haar only")
                     self.use_svm = False
                 else:
+                    # ORB + BoVW or HOG, whichever the models directory was trained with
+                    feature_pipeline = load_feature_pipeline(models_path)
                     trainer.load(model_file)
-                    print("✅ SVM classifier loaded")
+                    print(f"✅ SVM classifier loaded ({model_file.name}, {type(feature_pipeline).__name__})")
             
             # Create detector
             self.detector = FaceDetector(
@@ -174,6 +277,14 @@ class UDPWebcamOverlayServer:
             )
             print("✅ Inference pipeline ready")
             
+            # Worker processes rebuild the same pipeline from paths
+            self.pipeline_spec = PipelineSpec(
+                cascade_dir=str(cascade_dir),
+                models_dir=str(models_dir) if self.use_svm else None,
+                config_path=str(config_file) if config_file.exists() else None,
+                svm_model=svm_model
+            )
+            
             return True
             
         except Exception as e:
@@ -307,6 +418,8 @@ class UDPWebcamOverlayServer:
                 if key in self.accessories:
                     img = self.accessories[key]
                     print(f"   ✓ {key}: shape={img.shape if img is not None else 'None'}")
+        if self.worker_pool:
+            self.worker_pool.update_state(accessories=self.accessories)
         
         print(f"✨ SWITCHED TO: Package {package_id} - {package['name']}")
         print(f"� Description: {package['description']}")
@@ -361,6 +474,9 @@ class UDPWebcamOverlayServer:
             self.overlay_system.config[config_key].update(settings)
             print(f"  ✓ Updated {config_key}: {settings}")
         
+        if self.worker_pool:
+            self.worker_pool.update_state(overlay_config=self.overlay_system.config)
+        
         print("✅ Settings applied to overlay system")
         print("="*60 + "\n")
     
@@ -395,6 +511,8 @@ class UDPWebcamOverlayServer:
         
         # Replace the cascade in detector
         self.detector.cascades['face_default'] = new_cascade
+        if self.worker_pool:
+            self.worker_pool.update_state(face_cascade=str(cascade_path))
         
         print(f"  ✓ Loaded: {cascade_path}")
         print(f"  ✓ File size: {cascade_path.stat().st_size} bytes")
@@ -402,73 +520,111 @@ class UDPWebcamOverlayServer:
         print("="*60 + "\n")
     
     def initialize_camera(self):
-        print("🎥 Initializing optimized camera...")
-        
-        import platform
-        
-        backends_to_try = []
-        
-        # Detect platform
-        system = platform.system()
-        if system == "Windows":
-            backends_to_try = [cv2.CAP_DSHOW, cv2.CAP_ANY]
-        elif system == "Linux":
-            backends_to_try = [cv2.CAP_V4L2, cv2.CAP_ANY]
-        else:  # macOS or other
-            backends_to_try = [cv2.CAP_ANY]
-        
-        print(f"📌 Platform: {system}")
-        
-        # Try each backend
-        for backend in backends_to_try:
-            backend_name = {
-                cv2.CAP_DSHOW: "DirectShow",
-                cv2.CAP_V4L2: "V4L2",
-                cv2.CAP_ANY: "Auto"
-            }.get(backend, "Unknown")
-            
-            print(f"🔍 Trying backend: {backend_name}...")
-            
-            self.camera = cv2.VideoCapture(0, backend)
-            
-            if self.camera.isOpened():
-                # Set optimized resolution
-                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
-                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
-                self.camera.set(cv2.CAP_PROP_FPS, self.target_fps)
-                self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimal buffer
-                
-                ret, frame = self.camera.read()
-                if ret and frame is not None:
-                    actual_width = int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    actual_height = int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    print(f"✅ Camera ready with {backend_name}")
-                    print(f"📐 Resolution: {actual_width}x{actual_height} @ {self.target_fps}FPS")
-                    return True
-                else:
-                    print(f"⚠️ {backend_name} opened but can't read frame")
-                    self.camera.release()
+        try:
+            # Unpaced: the broadcast scheduler sets the frame rate
+            source = create_source(self.source_spec, self.frame_width, self.frame_height)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        
+        if isinstance(source, CameraSource):
+            print("🎥 Initializing optimized camera...")
+            print(f"📌 Platform: {platform.system()}")
+            # The driver paces the camera; ask it for the broadcast rate
+            source.capture_fps = self.target_fps
+        else:
+            print(f"🎞️ Opening frame source: {source}")
+        
+        if not source.open():
+            if isinstance(source, CameraSource):
+                print("❌ Camera initialization failed - No working backend found")
+                print("💡 Troubleshooting tips:")
+                print("   1. Check if webcam is connected: ls /dev/video*")
+                print("   2. Check permissions: sudo usermod -a -G video $USER")
+                print("   3. Test with: ffplay /dev/video0")
             else:
-                print(f"❌ {backend_name} failed to open")
+                print(f"❌ Frame source failed to open: {self.source_spec}")
+            return False
         
-        print("❌ Camera initialization failed - No working backend found")
-        print("💡 Troubleshooting tips:")
-        print("   1. Check if webcam is connected: ls /dev/video*")
-        print("   2. Check permissions: sudo usermod -a -G video $USER")
-        print("   3. Test with: ffplay /dev/video0")
-        return False
+        self.camera = source
+        if isinstance(source, CameraSource):
+            actual_width = int(source.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            actual_height = int(source.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            print(f"✅ Camera ready: {actual_width}x{actual_height} @ {self.target_fps}FPS")
+        else:
+            print(f"✅ Frame source ready, {self.frame_width}x{self.frame_height} @ {self.target_fps}FPS")
+        return True
     
     def start_server(self):
         if not self.initialize_camera():
             return
         
+        if self.multicast_group:
+            try:
+                self.multicast_socket = open_multicast_sender(
+                    self.multicast_group, ttl=self.multicast_ttl, interface=self.multicast_interface
+                )
+            except (ValueError, OSError) as e:
+                print(f"❌ Multicast setup failed: {e}")
+                return
+        
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 655360)  # 640KB send buffer
         self.server_socket.bind((self.host, self.port))
         
+        if self.shm_path:
+            try:
+                # Square slots so portrait and landscape frames up to frame_width both fit
+                self.shm_writer = ShmRingWriter(self.shm_path, self.frame_width, self.frame_width, fmt=self.shm_format)
+                self.shm_writer.open()
+            except (ValueError, OSError) as e:
+                print(f"❌ Shared-memory ring setup failed: {e}")
+                return
+        
+        if self.workers > 0 and self.use_overlay and self.pipeline_spec:
+            print(f"🧵 Starting {self.workers} detection workers...")
+            try:
+                # Square slots so portrait and landscape frames up to frame_width both fit
+                self.worker_pool = DetectionWorkerPool(
+                    self.pipeline_spec, workers=self.workers, depth=self.pipeline_depth,
+                    max_width=self.frame_width, max_height=self.frame_width
+                )
+                self.worker_pool.start()
+            except (ValueError, RuntimeError, OSError) as e:
+                print(f"❌ Detection workers failed to start: {e}")
+                if self.worker_pool:
+                    self.worker_pool.close()
+                return
+            self.worker_pool.update_state(accessories=self.accessories, overlay_config=self.overlay_system.config)
+        
+        if self.pace_fraction > 0:
+            self.pacer = PacedSender(self._data_socket(), default_kbps=self.pace_kbps,
+                                     on_error=self._on_send_error, on_sent=self._credit_bytes)
+            self.pacer.start()
+        
         print(f"\n🚀 UDP Server: {self.host}:{self.port}")
-        print(f"📊 Settings: {self.frame_width}x{self.frame_height}, {self.target_fps}FPS, Q{self.jpeg_quality}")
+        print(f"📊 Settings: {self.frame_width}x{self.frame_height}, {self.target_fps}FPS, "
+              f"Q{self.jpeg_quality} {self.default_profile.codec}")
+        print(f"📦 Protocol: v{self.protocol_version}, {self.max_packet_size}B packets")
+        if self.fec_group > 0:
+            print(f"🛡️ FEC: 1 parity per {self.fec_group} packets ({100 / self.fec_group:.0f}% overhead)")
+        if self.pacer:
+            rate = f"{self.pace_kbps:.0f} kbps/client" if self.pace_kbps > 0 else "unlimited rate"
+            print(f"⏱️ Pacing: {self.pace_fraction * 100:.0f}% of frame interval, {rate}")
+        if self.multicast_socket:
+            print(f"📡 Multicast: {self.multicast_group}:{self.multicast_port} (TTL {self.multicast_ttl}"
+                  f"{', via ' + self.multicast_interface if self.multicast_interface else ''})")
+        if self.worker_pool:
+            print(f"🧵 Detection workers: {self.worker_pool.workers} processes, "
+                  f"{self.worker_pool.depth} frames in flight")
+        if self.shm_writer:
+            print(f"🧠 Shared memory: {self.shm_path} ({self.shm_format.upper()}, {self.shm_writer.slots} slots)")
+        if self.change_detector:
+            print(f"💤 Duplicate suppression: threshold {self.change_detector.threshold:g}, "
+                  f"keyframe every {self.change_detector.keyframe_interval:g}s")
+        if self.liveness.timeout > 0:
+            print(f"💓 Client timeout: {self.liveness.timeout:g}s without PING")
         print(f"🎭 Overlay: {'Enabled' if self.use_overlay else 'Disabled'}")
         print(f"🤖 SVM: {'Enabled' if self.use_svm else 'Disabled'}")
         
@@ -508,19 +664,107 @@ class UDPWebcamOverlayServer:
         
         while self.running:
             try:
+                self._evict_dead_clients()
                 data, addr = self.server_socket.recvfrom(1024)
                 message = data.decode('utf-8')
                 
-                if message == "REGISTER":
+                if addr in self.clients:
+                    self.liveness.touch(addr)
+                
+                if message == "PING":
+                    # Heartbeat; an evicted client is told to register again
+                    reply = "PONG" if addr in self.clients else "UNREGISTERED"
+                    self.server_socket.sendto(reply.encode('utf-8'), addr)
+                
+                elif message == "STATS":
+                    stats = self.scheduler.stats()
+                    if self.change_detector:
+                        stats['repeated'] = self.change_detector.repeated
+                        stats['keyframes'] = self.change_detector.keyframes
+                    response = "STATS:" + json.dumps(stats)
+                    self.server_socket.sendto(response.encode('utf-8'), addr)
+                
+                elif message == "LATENCY":
+                    response = "LATENCY:" + json.dumps(self.latency.report())
+                    self.server_socket.sendto(response.encode('utf-8'), addr)
+                
+                elif message.startswith("LAT:"):
+                    self._handle_latency_report(message[4:], addr)
+                
+                elif message == "CLIENTS":
+                    response = "CLIENTS:" + json.dumps(self.liveness.report())
+                    self.server_socket.sendto(response.encode('utf-8'), addr)
+                
+                elif message == "REGISTER" or message.startswith("REGISTER:"):
+                    try:
+                        profile = parse_profile(message[9:], self.default_profile, max_width=self.frame_width)
+                    except (ValueError, TypeError) as e:
+                        print(f"⚠️ Invalid stream profile from {addr}: {e}, using default")
+                        profile = self.default_profile
+                    if self.protocol_version < 2:
+                        profile = profile._replace(codec='jpeg')
+                    
                     if addr not in self.clients:
                         self.clients.add(addr)
+                        self.liveness.touch(addr)
                         print(f"✅ Client connected: {addr} (Total: {len(self.clients)})")
                     
-                    self.server_socket.sendto("REGISTERED".encode('utf-8'), addr)
+                    self.client_profiles[addr] = profile
+                    if profile != self.default_profile:
+                        if self.multicast_socket:
+                            print("   ⚠️ Stream profiles are ignored in multicast mode")
+                        else:
+                            print(f"   📐 Stream profile: {profile.width}px wide, Q{profile.quality} {profile.codec}")
+                    
+                    # The new client has no frame to repeat yet
+                    if self.change_detector:
+                        self.change_detector.force_keyframe()
+                    
+                    kbps = parse_declared_bandwidth(message[9:])
+                    if kbps is not None and self.pacer:
+                        self.pacer.set_rate(addr, kbps)
+                        print(f"   ⏱️ Declared bandwidth: {kbps:.0f} kbps")
+                    
+                    # Same-host clients may take raw frames from the shared-memory ring
+                    use_shm = parse_transport(message[9:]) == 'shm'
+                    if use_shm and not (self.shm_writer and ipaddress.ip_address(addr[0]).is_loopback):
+                        print("   ⚠️ Shared-memory transport unavailable (needs --shm and a loopback client), using UDP")
+                        use_shm = False
+                    if use_shm:
+                        self.shm_clients.add(addr)
+                    else:
+                        self.shm_clients.discard(addr)
+                    
+                    # Multicast receivers learn where to join, and shared-memory clients
+                    # which ring file to map, from the reply
+                    reply = "REGISTERED"
+                    if use_shm:
+                        reply += f":SHM:{self.shm_path}"
+                    elif self.multicast_socket:
+                        reply += f":MULTICAST:{self.multicast_group}:{self.multicast_port}"
+                    self.server_socket.sendto(reply.encode('utf-8'), addr)
                 
                 elif message == "UNREGISTER":
-                    self.clients.discard(addr)
                     print(f"❌ Client disconnected: {addr}")
+                    self._remove_client(addr)
+                
+                elif message.startswith("BANDWIDTH:"):
+                    # Client-measured or declared downlink bandwidth in kbit/s
+                    try:
+                        kbps = max(0.0, float(message[10:]))
+                    except ValueError:
+                        print(f"⚠️ Malformed BANDWIDTH from {addr}: {message}")
+                        continue
+                    if self.pacer and addr in self.clients:
+                        self.pacer.set_rate(addr, kbps)
+                
+                elif message.startswith("NACK:"):
+                    self._handle_nack(message, addr)
+                
+                elif message == "KEYFRAME":
+                    # Client got a repeat packet for a frame it never received
+                    if self.change_detector:
+                        self.change_detector.force_keyframe()
                 
                 elif message.startswith("PACKAGE:"):
                     # Handle package switch command
@@ -541,7 +785,6 @@ class UDPWebcamOverlayServer:
                     # Handle settings update command
                     print(f"⚙️ Received settings update from {addr}")
                     try:
-                        import json
                         settings_json = message[9:]  # Remove "SETTINGS:" prefix
                         settings_data = json.loads(settings_json)
                         print(f"📝 Settings data: {settings_data}")
@@ -601,119 +844,407 @@ class UDPWebcamOverlayServer:
                 if self.running:
                     print(f"⚠️ Client error: {e}")
     
+    def _remove_client(self, addr):
+        """Forget a client and print its transmission statistics."""
+        self.clients.discard(addr)
+        self.shm_clients.discard(addr)
+        self.client_profiles.pop(addr, None)
+        self.liveness.remove(addr)
+        stats = self.retransmit_stats.pop(addr, None)
+        pacing = self.pacer.remove(addr) if self.pacer else None
+        if stats and stats['nacks']:
+            print(f"   🔁 Retransmits: {stats['resent']}/{stats['requested']} packets, {stats['expired']} expired")
+        if pacing:
+            print(f"   ⏱️ Paced: {pacing['sent']}/{pacing['queued']} packets sent, {pacing['dropped']} dropped")
+    
+    def _evict_dead_clients(self):
+        """Drop clients that stopped sending PINGs; encoding pauses once none are left."""
+        for addr in self.liveness.expired():
+            if addr not in self.clients:
+                self.liveness.remove(addr)
+                continue
+            print(f"💤 Client timed out: {addr} (no PING for {self.liveness.timeout:g}s)")
+            self._remove_client(addr)
+            if not self.clients:
+                print("⏸️ No live clients, pausing encoding")
+    
+    def _handle_latency_report(self, payload: str, addr):
+        """
+        Record a client's latency report for one displayed frame.
+        
+        The report echoes the frame's capture/encode timestamps from the header and
+        adds client-side durations, so everything is measured on the server clock:
+        end-to-end runs from capture until the report arrives, and network is
+        encode-done until arrival minus the client's decode time.
+        """
+        try:
+            report = json.loads(payload)
+            capture_us = int(report['cap'])
+            encoded_us = int(report.get('enc', 0))
+            reassembly_ms = float(report.get('reasm_us', 0)) / 1000.0
+            decode_ms = float(report.get('decode_us', 0)) / 1000.0
+        except (ValueError, KeyError, TypeError):
+            print(f"⚠️ Malformed latency report from {addr}: {payload}")
+            return
+        
+        if capture_us <= 0:
+            return
+        
+        now_us = time.time() * 1e6
+        self.latency.record('end_to_end', (now_us - capture_us) / 1000.0)
+        if encoded_us > 0:
+            self.latency.record('network', (now_us - encoded_us) / 1000.0 - decode_ms)
+        self.latency.record('reassembly', reassembly_ms)
+        self.latency.record('decode', decode_ms)
+    
+    def _handle_nack(self, message: str, addr):
+        """Resend the data packets a client reports missing, if the frame is still fresh."""
+        profile = self.default_profile if self.multicast_socket else self.client_profiles.get(addr, self.default_profile)
+        frame_cache = self.frame_caches.get(profile)
+        if addr not in self.clients or frame_cache is None:
+            return
+        
+        try:
+            sequence, indices = parse_nack(message)
+        except ValueError:
+            print(f"⚠️ Malformed NACK from {addr}: {message}")
+            return
+        
+        stats = self.retransmit_stats.setdefault(
+            addr, {'nacks': 0, 'requested': 0, 'resent': 0, 'expired': 0}
+        )
+        stats['nacks'] += 1
+        stats['requested'] += len(indices)
+        
+        packets = frame_cache.get(sequence, indices, max_age=self.nack_deadline)
+        if packets is None:
+            stats['expired'] += 1
+            return
+        
+        for udp_packet in packets:
+            self.server_socket.sendto(udp_packet, addr)
+        stats['resent'] += len(packets)
+        self.liveness.add_bytes(addr, sum(len(p) for p in packets))
+    
+    def _client_groups(self):
+        """Current UDP destinations per stream profile, and the shared-memory clients."""
+        clients = self.clients.copy()
+        shm_clients = clients & self.shm_clients
+        udp_clients = clients - shm_clients
+        if self.multicast_socket:
+            multicast_addr = (self.multicast_group, self.multicast_port)
+            profile_groups = {self.default_profile: [multicast_addr]} if udp_clients else {}
+        else:
+            profile_groups = group_by_profile(self.client_profiles, udp_clients, self.default_profile)
+        return profile_groups, shm_clients
+    
+    def _overlay_options(self):
+        """process_image() arguments for the current package and toggles."""
+        # Map loaded accessories to enabled types
+        # Overlay system uses shorthand: 'hat', 'ear', 'piercing', 'tattoo'
+        enabled_accessories = []
+        if 'hat' in self.accessories:
+            enabled_accessories.append('hat')
+        if 'earring_left' in self.accessories or 'earring_right' in self.accessories:
+            enabled_accessories.append('ear')
+        if 'piercing_nose' in self.accessories:
+            enabled_accessories.append('piercing')
+        if 'tattoo_face' in self.accessories:
+            enabled_accessories.append('tattoo')
+        
+        return {
+            'enabled_accessories': enabled_accessories,
+            'use_svm': self.use_svm,
+            'visualize_boxes': self.show_boxes  # Show bounding boxes if enabled
+        }
+    
+    def _process_frame(self, frame):
+        """Detect and overlay in this thread. Returns (frame, timings, error)."""
+        if not (self.use_overlay and self.inference_pipeline):
+            return frame, {}, None
+        
+        try:
+            # CRITICAL: Force update pipeline accessories from current package
+            # This ensures threading doesn't cause stale reference
+            self.inference_pipeline.accessories = self.accessories
+            frame = self.inference_pipeline.process_image(frame, **self._overlay_options())
+            return frame, self.inference_pipeline.last_timings, None
+        except Exception as e:
+            # If overlay fails, just send original frame
+            return frame, {}, str(e)
+    
     def _broadcast_frames(self):
-        last_frame_time = 0
         frame_count = 0
         
         while self.running:
-            current_time = time.time()
-            
             # Skip if no clients
             if len(self.clients) == 0:
+                if self.worker_pool:
+                    self.worker_pool.drain()  # Frames in flight would be stale when clients return
+                self.scheduler.reset()
                 time.sleep(0.1)
                 continue
             
-            # Frame rate control
-            if current_time - last_frame_time < self.frame_send_time:
-                time.sleep(0.01)
-                continue
+            # Frame rate control: sleep until the next deadline; overruns skip frames
+            self.scheduler.wait()
             
+            read_start = time.perf_counter()
             ret, frame = self.camera.read()
             if not ret:
                 break
+            capture_ts = time.time()
+            self.latency.record('capture_wait', (time.perf_counter() - read_start) * 1000.0)
             
             # Apply mirror mode (flip horizontally for natural selfie view)
             if self.mirror:
                 frame = cv2.flip(frame, 1)
             
-            # Apply face detection and overlay if enabled
-            if self.use_overlay and self.inference_pipeline:
-                try:
-                    # CRITICAL: Force update pipeline accessories from current package
-                    # This ensures threading doesn't cause stale reference
-                    self.inference_pipeline.accessories = self.accessories
-                    
-                    # Map loaded accessories to enabled types
-                    # Overlay system uses shorthand: 'hat', 'ear', 'piercing', 'tattoo'
-                    enabled_accessories = []
-                    if 'hat' in self.accessories:
-                        enabled_accessories.append('hat')
-                    if 'earring_left' in self.accessories or 'earring_right' in self.accessories:
-                        enabled_accessories.append('ear')
-                    if 'piercing_nose' in self.accessories:
-                        enabled_accessories.append('piercing')
-                    if 'tattoo_face' in self.accessories:
-                        enabled_accessories.append('tattoo')
-                    
-                    frame = self.inference_pipeline.process_image(
-                        frame,
-                        enabled_accessories=enabled_accessories,
-                        use_svm=self.use_svm,
-                        visualize_boxes=self.show_boxes  # Show bounding boxes if enabled
-                    )
-                    
-                    # Add visual indicator showing current package
-                    pkg_name = self.accessory_packages.get(self.current_package, {}).get('name', 'Unknown')
-                    cv2.putText(
-                        frame,
-                        f"Package {self.current_package}: {pkg_name}",
-                        (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.7,
-                        (0, 255, 0),
-                        2
-                    )
-                    
-                except Exception as e:
-                    # If overlay fails, just send original frame
-                    if frame_count % 100 == 0:  # Log occasionally
-                        print(f"⚠️ Overlay error: {e}")
+            # Process once at the highest resolution any client asked for
+            # (shared-memory clients always get the full frame width)
+            profile_groups, shm_clients = self._client_groups()
+            if not profile_groups and not shm_clients:
+                continue
+            widths = [profile.width for profile in profile_groups]
+            if shm_clients:
+                widths.append(self.frame_width)
+            frame = self._resize_to_width(frame, max(widths))
             
-            # Encode with optimized settings
-            encode_param = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
-            result, encoded_img = cv2.imencode('.jpg', frame, encode_param)
+            if not self.worker_pool:
+                frame, timings, error = self._process_frame(frame)
+                self._publish_frame(frame, capture_ts, timings, error, frame_count)
+                frame_count += 1
+                continue
             
-            if result:
-                frame_data = encoded_img.tobytes()
-                self.send_frame_to_clients(frame_data)
-                last_frame_time = current_time
+            # Worker pool: submit this frame and publish whatever is next in capture
+            # order, waiting for the oldest frame only when `depth` frames are in flight
+            try:
+                ready = self.worker_pool.collect(block=True) if self.worker_pool.full() else []
+                self.worker_pool.submit(frame, capture_ts, **self._overlay_options())
+                ready += self.worker_pool.collect()
+            except ValueError as e:
+                print(f"⚠️ Skipping frame: {e}")
+                continue
+            except RuntimeError as e:
+                print(f"❌ Detection worker pool failed: {e}; processing in the server from now on")
+                self.worker_pool.close()
+                self.worker_pool = None
+                continue
+            
+            for frame, capture_ts, timings, error in ready:
+                self._publish_frame(frame, capture_ts, timings, error, frame_count)
                 frame_count += 1
     
-    def send_frame_to_clients(self, frame_data):
-        if not frame_data or len(self.clients) == 0:
+    def _publish_frame(self, frame, capture_ts, timings, error, frame_count):
+        """Send a processed frame to the clients connected now (encode, repeat or shared memory)."""
+        if error is not None:
+            if frame_count % 100 == 0:  # Log occasionally
+                print(f"⚠️ Overlay error: {error}")
+        elif timings:
+            self.latency.record('detect', timings['detect_ms'])
+            self.latency.record('overlay', timings['overlay_ms'])
+            
+            # Add visual indicator showing current package
+            pkg_name = self.accessory_packages.get(self.current_package, {}).get('name', 'Unknown')
+            cv2.putText(
+                frame,
+                f"Package {self.current_package}: {pkg_name}",
+                (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.7,
+                (0, 255, 0),
+                2
+            )
+        
+        processed_ts = time.time()
+        self.latency.record('process', (processed_ts - capture_ts) * 1000.0)
+        
+        # Clients may have come or gone while the frame was in a worker
+        profile_groups, shm_clients = self._client_groups()
+        if not profile_groups and not shm_clients:
+            return
+        
+        repeat = self.change_detector is not None and self.change_detector.is_repeat(frame, time.monotonic())
+        
+        # Encode each distinct profile once and fan it out to the clients using it
+        self._advance_sequence()
+        for profile in list(self.frame_caches):
+            if profile not in profile_groups:
+                del self.frame_caches[profile]
+        for profile in list(self.last_sent):
+            if profile not in profile_groups:
+                del self.last_sent[profile]
+        
+        if shm_clients:
+            self._write_shm_frame(frame, shm_clients, capture_ts, processed_ts)
+        
+        for profile, profile_clients in profile_groups.items():
+            if repeat and profile in self.last_sent:
+                self.send_repeat_to_clients(profile_clients, profile, capture_ts, processed_ts)
+                continue
+            
+            encode_start = time.time()
+            frame_data = self._encode_frame(frame, profile)
+            encoded_ts = time.time()
+            self.latency.record('encode', (encoded_ts - encode_start) * 1000.0)
+            if frame_data:
+                self.send_frame_to_clients(
+                    frame_data, capture_ts=capture_ts,
+                    clients=profile_clients, profile=profile,
+                    processed_ts=processed_ts, encoded_ts=encoded_ts
+                )
+    
+    @staticmethod
+    def _resize_to_width(frame, width):
+        """Downscale frame to `width` keeping aspect ratio (never upscales)."""
+        height, current_width = frame.shape[:2]
+        if current_width <= width:
+            return frame
+        new_height = round(height * width / current_width)
+        return cv2.resize(frame, (width, new_height), interpolation=cv2.INTER_AREA)
+    
+    def _encode_frame(self, frame, profile):
+        """Encode a processed frame for one stream profile with its codec."""
+        img = self._resize_to_width(frame, profile.width)
+        return self.encoders[profile.codec].encode(img, profile.quality)
+    
+    def _advance_sequence(self):
+        # v1 clients expect 16-bit sequence numbers; v2 uses the full 32-bit field
+        sequence_wrap = 2 ** 32 if self.protocol_version >= 2 else 65536
+        self.sequence_number = (self.sequence_number + 1) % sequence_wrap
+    
+    def send_frame_to_clients(self, frame_data, capture_ts=None, clients=None, profile=None,
+                              processed_ts=None, encoded_ts=None):
+        """
+        Packetize an encoded frame under the current sequence number and send it.
+        
+        Args:
+            frame_data: Encoded frame bytes
+            capture_ts: Camera capture time (seconds since epoch)
+            clients: Client (or multicast group) addresses to send to (default: all clients)
+            profile: Stream profile the frame was encoded for (selects the NACK cache)
+            processed_ts: Detection/overlay completion time (seconds since epoch)
+            encoded_ts: Encode completion time (seconds since epoch)
+        """
+        if clients is None:
+            clients = self.clients.copy()
+        if profile is None:
+            profile = self.default_profile
+        if not frame_data or len(clients) == 0:
             return
         
-        self.sequence_number = (self.sequence_number + 1) % 65536
         frame_size = len(frame_data)
         
-        header_size = 12
-        payload_size = self.max_packet_size - header_size
-        total_packets = math.ceil(frame_size / payload_size)
+        # Packetize once, then fan the same datagrams out to every client
+        if self.protocol_version >= 2:
+            payload_size = self.max_packet_size - HEADER_V2.size
+            packets = packetize_frame(
+                frame_data, self.sequence_number, payload_size,
+                fec_group=self.fec_group, capture_ts=capture_ts,
+                codec=CODEC_IDS[profile.codec],
+                processed_ts=processed_ts, encoded_ts=encoded_ts
+            )
+        else:
+            payload_size = self.max_packet_size - HEADER_V1.size
+            packets = packetize_frame_v1(frame_data, self.sequence_number, payload_size)
+        
+        if self.protocol_version >= 2:
+            self.last_sent[profile] = (frame_size, zlib.crc32(frame_data) & 0xFFFFFFFF)
+        
+        if self.nack_cache > 0:
+            if profile not in self.frame_caches:
+                self.frame_caches[profile] = FrameCache(capacity=self.nack_cache)
+            self.frame_caches[profile].put(self.sequence_number, packets)
+        
+        self._send_packets(packets, clients)
         
-        # Send to all clients efficiently
-        for client_addr in self.clients.copy():
+        # Less frequent logging
+        if self.sequence_number % 60 == 1:  # Every 4 seconds at 15FPS
+            print(f"📤 Frame {self.sequence_number} [{profile.width}px Q{profile.quality} {profile.codec}]: "
+                  f"{frame_size//1024}KB ({len(packets)} packets) → {len(clients)} clients")
+            if self.pacer:
+                dropped = sum(self.pacer.stats(addr)['dropped'] for addr in clients)
+                if dropped:
+                    print(f"   ⏱️ Pacer dropped {dropped} packets so far for these clients")
+    
+    def _write_shm_frame(self, frame, clients, capture_ts, processed_ts):
+        """Write the processed frame into the shared-memory ring and ring each local client's doorbell."""
+        write_start = time.perf_counter()
+        written = self.shm_writer.write(frame, self.sequence_number, capture_ts=capture_ts, processed_ts=processed_ts)
+        self.latency.record('shm_write', (time.perf_counter() - write_start) * 1000.0)
+        if not written:
+            if self.shm_writer.frames_too_large == 1:
+                height, width = frame.shape[:2]
+                print(f"⚠️ Frame {width}x{height} does not fit the shared-memory ring, skipping")
+            return
+        
+        doorbell = f"{DOORBELL_PREFIX}{self.sequence_number}".encode('utf-8')
+        for client_addr in clients:
             try:
-                for packet_index in range(total_packets):
-                    start_pos = packet_index * payload_size
-                    end_pos = min(start_pos + payload_size, frame_size)
-                    
-                    header = struct.pack("!III", self.sequence_number, total_packets, packet_index)
-                    udp_packet = header + frame_data[start_pos:end_pos]
-                    
-                    self.server_socket.sendto(udp_packet, client_addr)
-                
-                # Less frequent logging
-                if self.sequence_number % 60 == 1:  # Every 4 seconds at 15FPS
-                    print(f"📤 Frame {self.sequence_number}: {frame_size//1024}KB → {len(self.clients)} clients")
-                    
+                self.server_socket.sendto(doorbell, client_addr)
             except Exception as e:
-                print(f"❌ Send error to {client_addr}: {e}")
-                self.clients.discard(client_addr)
+                self._on_send_error(client_addr, e)
+    
+    def send_repeat_to_clients(self, clients, profile, capture_ts, processed_ts):
+        """Send a repeat packet for the profile's last full frame under the current sequence number."""
+        frame_len, crc = self.last_sent[profile]
+        packet = build_repeat_packet(
+            self.sequence_number, frame_len, crc, codec=CODEC_IDS[profile.codec],
+            capture_ts=capture_ts, processed_ts=processed_ts
+        )
+        self._send_packets([packet], clients)
+        
+        if self.sequence_number % 60 == 1:
+            detector = self.change_detector
+            print(f"💤 Frame {self.sequence_number} unchanged: repeat packet → {len(clients)} clients "
+                  f"({detector.repeated} repeats, {detector.keyframes} full frames so far)")
+    
+    def _send_packets(self, packets, clients):
+        # Paced: hand the packets to the sender thread; unsent packets of a frame
+        # expire after one frame interval so a slow link skips instead of bursting
+        if self.pacer:
+            window = self.frame_send_time * self.pace_fraction
+            for client_addr in clients:
+                self.pacer.enqueue(client_addr, packets, window, expires_after=self.frame_send_time)
+        else:
+            # Send to all clients efficiently
+            data_socket = self._data_socket()
+            frame_bytes = sum(len(p) for p in packets)
+            for client_addr in clients:
+                try:
+                    for udp_packet in packets:
+                        data_socket.sendto(udp_packet, client_addr)
+                    self._credit_bytes(client_addr, frame_bytes)
+                except Exception as e:
+                    self._on_send_error(client_addr, e)
+    
+    def _credit_bytes(self, addr, n_bytes):
+        """Count sent bytes against the client, or against every UDP client for the multicast group."""
+        if self.multicast_socket and addr == (self.multicast_group, self.multicast_port):
+            for client_addr in self.clients.copy() - self.shm_clients:
+                self.liveness.add_bytes(client_addr, n_bytes)
+        else:
+            self.liveness.add_bytes(addr, n_bytes)
+    
+    def _data_socket(self):
+        """Socket that carries frame packets (the multicast sender in multicast mode)."""
+        return self.multicast_socket or self.server_socket
+    
+    def _on_send_error(self, client_addr, error):
+        print(f"❌ Send error to {client_addr}: {error}")
+        self._remove_client(client_addr)
     
     def stop_server(self):
         print("⏹️ Stopping server...")
         self.running = False
         
+        if self.pacer:
+            self.pacer.stop()
+        if self.multicast_socket:
+            self.multicast_socket.close()
+        if self.shm_writer:
+            self.shm_writer.close()
+        if self.worker_pool:
+            self.worker_pool.close()
         if self.server_socket:
             self.server_socket.close()
         if self.camera:
@@ -734,9 +1265,73 @@ def main():
     parser.add_argument('--use-svm', action='store_true', help='Enable SVM face validation')
     parser.add_argument('--no-boxes', action='store_true', help='Disable bounding boxes')
     
+    # Streaming
+    parser.add_argument('--packet-size', type=int, default=None,
+                        help=f'UDP datagram size incl. header (default: {DEFAULT_PACKET_SIZE} for v2, 32768 for v1)')
+    parser.add_argument('--protocol-v1', action='store_true',
+                        help='Use the legacy 12-byte header for old clients (disables FEC)')
+    parser.add_argument('--fec-group', type=int, default=0,
+                        help='Data packets per XOR parity packet (0 = no FEC, default: 0)')
+    parser.add_argument('--nack-cache', type=int, default=8,
+                        help='Recent frames kept for NACK retransmission (0 = disabled, default: 8)')
+    parser.add_argument('--nack-deadline-ms', type=float, default=None,
+                        help='Max frame age for retransmission in ms (default: one frame interval)')
+    parser.add_argument('--pace-fraction', type=float, default=0.0,
+                        help='Spread each frame over this fraction of the frame interval (0 = burst, default: 0)')
+    parser.add_argument('--pace-kbps', type=float, default=0.0,
+                        help='Per-client bandwidth when the client declares none (0 = unlimited, default: 0)')
+    parser.add_argument('--client-timeout', type=float, default=10.0,
+                        help='Evict clients silent for this many seconds (0 = never, default: 10)')
+    parser.add_argument('--multicast', metavar='GROUP', default=None,
+                        help='Send frames once to this IPv4 multicast group, e.g. 239.255.0.1 (control stays unicast)')
+    parser.add_argument('--multicast-port', type=int, default=None,
+                        help='Multicast destination port (default: --port + 1)')
+    parser.add_argument('--multicast-ttl', type=int, default=1,
+                        help='Multicast TTL, 1 = local subnet only (default: 1)')
+    parser.add_argument('--multicast-if', default=None,
+                        help='Local interface address for multicast (default: loopback if --host is 127.x, else system route)')
+    
+    # Encoding
+    parser.add_argument('--codec', choices=list(CODEC_IDS), default='jpeg',
+                        help='Default stream codec; clients may pick another at REGISTER (default: jpeg)')
+    parser.add_argument('--jpeg-optimize', action='store_true',
+                        help='Optimize JPEG Huffman tables (smaller frames, slower encode)')
+    parser.add_argument('--jpeg-progressive', action='store_true',
+                        help='Progressive JPEG (slower; normally off for streaming)')
+    parser.add_argument('--jpeg-subsampling', choices=JPEG_SUBSAMPLING, default='420',
+                        help='JPEG chroma subsampling (default: 420)')
+    
+    # Duplicate-frame suppression
+    parser.add_argument('--suppress-duplicates', action='store_true',
+                        help='Send a tiny repeat packet instead of re-encoding unchanged frames (v2 only)')
+    parser.add_argument('--change-threshold', type=float, default=4.0,
+                        help='Largest grey-level change of the 32x24 frame signature counted as unchanged (default: 4)')
+    parser.add_argument('--keyframe-interval', type=float, default=2.0,
+                        help='Send a full frame at least this often in seconds while suppressing (default: 2)')
+    
+    # Same-host transport
+    parser.add_argument('--shm', metavar='PATH', nargs='?', const='', default=None,
+                        help='Offer raw frames to loopback clients through a shared-memory ring file '
+                             '(default path: /dev/shm or the temp dir)')
+    parser.add_argument('--shm-format', choices=['rgba', 'bgr'], default='rgba',
+                        help='Pixel format in the shared-memory ring (default: rgba, what Godot reads)')
+    
+    # Parallel detection
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Detection/overlay worker processes (0 = in the broadcast thread, default: 0)')
+    parser.add_argument('--pipeline-depth', type=int, default=None,
+                        help='Frames in flight with --workers; more adds latency (default: one per worker)')
+    
+    # Input
+    parser.add_argument('--source', default='camera',
+                        help='Frame source: camera[:N], video:PATH, images:DIR or synthetic[:SEED] (default: camera)')
+    
     # Paths
     parser.add_argument('--cascade-dir', default='assets/cascades', help='Haar cascades directory')
     parser.add_argument('--models-dir', default='models', help='Models directory (for SVM)')
+    parser.add_argument('--svm-model', default='svm_face_linear.pkl',
+                        help='SVM model file in --models-dir, e.g. svm_face_nystroem.pkl (default: svm_face_linear.pkl); '
+                             'the ORB/BoVW or HOG feature pipeline is read from its feature_config.json')
     parser.add_argument('--config', default='assets/overlay_config.json', help='Overlay config file')
     
     # Accessories
@@ -761,7 +1356,33 @@ def main():
         port=args.port,
         use_overlay=not args.no_overlay,
         use_svm=args.use_svm,
-        show_boxes=not args.no_boxes
+        show_boxes=not args.no_boxes,
+        fec_group=args.fec_group,
+        nack_cache=args.nack_cache,
+        nack_deadline_ms=args.nack_deadline_ms,
+        protocol_version=1 if args.protocol_v1 else 2,
+        packet_size=args.packet_size,
+        pace_fraction=args.pace_fraction,
+        pace_kbps=args.pace_kbps,
+        client_timeout=args.client_timeout,
+        multicast_group=args.multicast,
+        multicast_port=args.multicast_port,
+        multicast_ttl=args.multicast_ttl,
+        multicast_interface=args.multicast_if,
+        codec=args.codec,
+        jpeg_options={
+            'optimize': args.jpeg_optimize,
+            'progressive': args.jpeg_progressive,
+            'subsampling': args.jpeg_subsampling
+        },
+        source=args.source,
+        suppress_duplicates=args.suppress_duplicates,
+        change_threshold=args.change_threshold,
+        keyframe_interval=args.keyframe_interval,
+        shm_path=args.shm,
+        shm_format=args.shm_format,
+        workers=args.workers,
+        pipeline_depth=args.pipeline_depth
     )
     
     # Initialize face detection if overlay enabled
@@ -814,7 +1435,8 @@ def main():
             cascade_dir=args.cascade_dir,
             models_dir=args.models_dir,
             config_path=args.config,
-            accessories_config=accessories_config if accessories_config else None
+            accessories_config=accessories_config if accessories_config else None,
+            svm_model=args.svm_model
         ):
             print("\n⚠️ Face detection initialization failed!")
             print("Server will run without overlay.")